@@ -1,28 +1,34 @@
-from django.contrib import admin
-
-from .risk_engine import calculate_lot_risk
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .forms import ImportDataForm
+from .importer import DataImporter, detect_format, open_upload
+from .risk_engine import assign_lot_risk, update_lots_risk
 from .models import (
     Lot,
     Node,
     LotMovement,
     Farm,
     PondLog,
+    PondTelemetryRollup,
     Sampling,
     LabTest,
+    LabStandard,
     Document,
     Incident,
     IncidentRelatedLot,
 )
 
 
-# Helper: update risk & status untuk satu lot
-def update_lot_risk_for(lot: Lot):
-    score, level, status = calculate_lot_risk(lot)
-    Lot.objects.filter(pk=lot.pk).update(
-        risk_score=score,
-        risk_level=level,
-        status=status,
-    )
+# Helper: update risk & status untuk satu lot atau banyak lot (satu bulk_update).
+# Perubahan PondLog / LabTest / Incident / dll. tidak lagi dihitung di sini,
+# tapi diantrekan lewat signal (lihat tracker/recompute.py).
+def update_lot_risk_for(lots):
+    if isinstance(lots, Lot):
+        lots = [lots]
+    update_lots_risk(lots)
 
 
 @admin.register(Lot)
@@ -31,16 +37,52 @@ class LotAdmin(admin.ModelAdmin):
     list_filter = ("status", "risk_level", "farm")
     search_fields = ("lot_id",)
 
-    readonly_fields = ("risk_score", "risk_level", "status")
+    readonly_fields = ("risk_score", "risk_level", "status", "risk_breakdown")
+    actions = ["recalculate_risk"]
 
     def save_model(self, request, obj, form, change):
-        # Hitung risk & status sebelum simpan
-        score, level, status = calculate_lot_risk(obj)
-        obj.risk_score = score
-        obj.risk_level = level
-        obj.status = status
+        # Hitung risk, status & breakdown sebelum simpan
+        assign_lot_risk(obj)
         super().save_model(request, obj, form, change)
 
+    @admin.action(description="Hitung ulang risiko lot terpilih")
+    def recalculate_risk(self, request, queryset):
+        update_lot_risk_for(queryset)
+
+    def get_urls(self):
+        urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="tracker_lot_import",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        # impor massal lot / movement / hasil lab (lihat tracker/importer.py)
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        result = None
+        form = ImportDataForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            importer = DataImporter(kind=form.cleaned_data["kind"] or None)
+            importer.load(open_upload(upload.file), detect_format(upload.name))
+            result = importer.finish()
+            level = messages.WARNING if result.error_count else messages.SUCCESS
+            self.message_user(request, f"{upload.name}: {result.summary()}", level)
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Impor lot, movement & hasil lab",
+            "form": form,
+            "result": result,
+        }
+        return TemplateResponse(request, "admin/tracker/import_data.html", context)
+
 
 @admin.register(Node)
 class NodeAdmin(admin.ModelAdmin):
@@ -67,29 +109,40 @@ class PondLogAdmin(admin.ModelAdmin):
     list_display = ("farm", "date", "ph", "temperature_c", "salinity_ppt")
     list_filter = ("farm", "date")
 
-    def save_model(self, request, obj, form, change):
-        super().save_model(request, obj, form, change)
-        # Update semua lot dari farm ini
-        for lot in Lot.objects.filter(farm=obj.farm):
-            update_lot_risk_for(lot)
+
+@admin.register(PondTelemetryRollup)
+class PondTelemetryRollupAdmin(admin.ModelAdmin):
+    # diisi ingest telemetri (tracker/telemetry_ingest.py), hanya untuk dilihat
+    list_display = ("farm", "pond", "period", "start", "ph_mean", "ph_out", "salinity_ppt_mean", "salinity_ppt_out")
+    list_filter = ("period", "farm")
+    date_hierarchy = "start"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Sampling)
 class SamplingAdmin(admin.ModelAdmin):
-    list_display = ("lot", "date", "location", "status")
+    list_display = ("lot", "date", "location", "status", "external_id")
     list_filter = ("status", "date")
-    search_fields = ("lot__lot_id",)
+    search_fields = ("lot__lot_id", "external_id")
 
 
 @admin.register(LabTest)
 class LabTestAdmin(admin.ModelAdmin):
     list_display = ("sampling", "parameter", "value", "unit", "result")
     list_filter = ("parameter", "result")
+    search_fields = ("external_id", "sampling__lot__lot_id")
 
-    def save_model(self, request, obj, form, change):
-        super().save_model(request, obj, form, change)
-        if obj.sampling and obj.sampling.lot:
-            update_lot_risk_for(obj.sampling.lot)
+
+@admin.register(LabStandard)
+class LabStandardAdmin(admin.ModelAdmin):
+    list_display = ("parameter", "label", "comparator", "limit", "severity", "is_active", "updated_at")
+    list_filter = ("is_active", "comparator")
+    search_fields = ("parameter", "label")
 
 
 @admin.register(Document)
@@ -105,19 +158,7 @@ class IncidentAdmin(admin.ModelAdmin):
     list_filter = ("incident_type", "status")
     search_fields = ("lot__lot_id",)
 
-    def save_model(self, request, obj, form, change):
-        super().save_model(request, obj, form, change)
-        if obj.lot:
-            update_lot_risk_for(obj.lot)
-        for rel in IncidentRelatedLot.objects.filter(incident=obj):
-            update_lot_risk_for(rel.lot)
-
 
 @admin.register(IncidentRelatedLot)
 class IncidentRelatedLotAdmin(admin.ModelAdmin):
     list_display = ("incident", "lot")
-
-    def save_model(self, request, obj, form, change):
-        super().save_model(request, obj, form, change)
-        if obj.lot:
-            update_lot_risk_for(obj.lot)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tracker'
+
+    def ready(self):
+        # daftarkan signal hitung ulang risiko (lihat tracker/recompute.py)
+        from . import signals  # noqa: F401
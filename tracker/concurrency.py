@@ -0,0 +1,30 @@
+"""
+Menjalankan beberapa fungsi ORM sinkron secara bersamaan dari view async.
+
+ORM async Django (aget, afirst, ...) menjalankan query di satu thread per
+request (thread_sensitive), jadi asyncio.gather atas query-query itu tetap
+berurutan. Di sini tiap fungsi dijalankan di thread pool terpisah
+(thread_sensitive=False) sehingga memakai koneksi DB sendiri dan benar-benar
+berjalan paralel. Koneksi thread dirapikan seperti akhir request biasa
+(close_old_connections: dipakai ulang selama CONN_MAX_AGE).
+"""
+
+import asyncio
+from typing import Any, Callable, List, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _run_with_own_connection(func: Callable, *args) -> Any:
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def gather_in_threads(*calls: Tuple) -> List[Any]:
+    """calls = (func, arg1, arg2, ...) per bagian; hasil urut sesuai calls."""
+    run = sync_to_async(_run_with_own_connection, thread_sensitive=False)
+    return await asyncio.gather(*(run(func, *args) for func, *args in calls))
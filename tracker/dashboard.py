@@ -0,0 +1,95 @@
+"""
+Snapshot dashboard (semua counter + daftar ringkas) yang di-cache.
+
+- Counter Lot & Incident masing-masing diambil dengan satu query
+  conditional aggregation.
+- Snapshot disimpan di cache default selama DASHBOARD_CACHE_SECONDS dan
+  dibuang setelah transaksi yang mengubah Lot / Incident commit, jadi banyak
+  operator yang membuka dashboard cukup memicu satu kali perhitungan.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Farm, Incident, Lot, LotMovement
+
+CACHE_KEY = "tracker:dashboard:snapshot"
+
+PROBLEMATIC_STATUSES = Lot.PROBLEMATIC_STATUSES
+STATUSES = [code for code, _label in Lot.CONTAM_STATUS_CHOICES]
+RISK_LEVELS = [code for code, _label in Lot.RISK_LEVEL_CHOICES]
+
+
+def _lot_counts():
+    aggregates = {"total": Count("id")}
+    aggregates.update({f"status_{s}": Count("id", filter=Q(status=s)) for s in STATUSES})
+    aggregates.update({f"risk_{r}": Count("id", filter=Q(risk_level=r)) for r in RISK_LEVELS})
+    row = Lot.objects.aggregate(**aggregates)
+    return (
+        row["total"],
+        {s: row[f"status_{s}"] for s in STATUSES},
+        {r: row[f"risk_{r}"] for r in RISK_LEVELS},
+    )
+
+
+def _incident_counts():
+    return Incident.objects.aggregate(
+        total=Count("id"),
+        open=Count("id", filter=~Q(status__iexact="closed")),
+        closed=Count("id", filter=Q(status__iexact="closed")),
+    )
+
+
+def build_dashboard_snapshot():
+    total_lots, status_counts, risk_counts = _lot_counts()
+
+    recent_problem_lots = list(
+        Lot.objects.filter(status__in=PROBLEMATIC_STATUSES)
+        .select_related("farm")
+        .order_by("-created_at")[:5]
+    )
+
+    # ringkasan per farm dibaca dari FarmStats (dipelihara incremental)
+    top_farms = list(
+        Farm.objects.filter(stats__lot_count__gt=0)
+        .annotate(
+            lot_count=F("stats__lot_count"),
+            problematic_lot_count=F("stats__problematic_lot_count"),
+        )
+        .order_by("-problematic_lot_count")[:5]
+    )
+
+    top_nodes = list(
+        LotMovement.objects.filter(lot__status__in=PROBLEMATIC_STATUSES)
+        .values("node__name", "node__type")
+        .annotate(
+            movement_count=Count("id"),
+            lots_count=Count("lot", distinct=True),
+        )
+        .order_by("-movement_count")[:5]
+    )
+
+    return {
+        "total_lots": total_lots,
+        "status_counts": status_counts,
+        "risk_counts": risk_counts,
+        "incident_counts": _incident_counts(),
+        "recent_problem_lots": recent_problem_lots,
+        "top_farms": top_farms,
+        "top_nodes": top_nodes,
+    }
+
+
+def get_dashboard_snapshot():
+    snapshot = cache.get(CACHE_KEY)
+    if snapshot is None:
+        snapshot = build_dashboard_snapshot()
+        cache.set(CACHE_KEY, snapshot, getattr(settings, "DASHBOARD_CACHE_SECONDS", 30))
+    return snapshot
+
+
+def invalidate_dashboard():
+    """Buang snapshot setelah transaksi saat ini commit (langsung kalau di luar transaksi)."""
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
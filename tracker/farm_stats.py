@@ -0,0 +1,254 @@
+"""
+Pemeliharaan tabel FarmStats (ringkasan reputasi per farm).
+
+- Perubahan Lot / Incident diterapkan sebagai delta (F() + n) pada baris farm
+  terkait, di transaksi yang sama dengan perubahan datanya.
+- Farm yang belum punya baris stats dibangun ulang dari agregat saat pertama
+  kali disentuh, jadi delta tidak pernah diterapkan ke baris yang belum ada.
+- rebuild_farm_stats() menghitung semuanya dari nol (perbaikan drift).
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from .models import Farm, FarmStats, Incident, Lot, PondLog
+
+PROBLEMATIC_STATUSES = Lot.PROBLEMATIC_STATUSES
+
+_STAT_FIELDS = [
+    "lot_count",
+    "problematic_lot_count",
+    "incident_count",
+    "open_incident_count",
+    "last_pond_date",
+    "last_ph",
+    "last_temperature_c",
+    "last_salinity_ppt",
+]
+
+# potongan farm_id per query agar parameter IN tetap kecil
+_CHUNK_SIZE = 500
+
+
+def _is_problematic(status: Optional[str]) -> bool:
+    return status in PROBLEMATIC_STATUSES
+
+
+def _is_open(status: Optional[str]) -> bool:
+    return (status or "").lower() != "closed"
+
+
+def _latest_pond_logs():
+    return PondLog.objects.filter(farm_id=OuterRef("pk")).order_by("-date", "-id")
+
+
+def rebuild_farm_stats(farm_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Hitung ulang FarmStats dari agregat (semua farm kalau farm_ids=None).
+    Return: jumlah baris yang ditulis.
+    """
+    if farm_ids is None:
+        farm_ids = list(Farm.objects.values_list("pk", flat=True))
+    else:
+        farm_ids = list(set(farm_ids))
+
+    written = 0
+    for start in range(0, len(farm_ids), _CHUNK_SIZE):
+        rows = _build_rows(farm_ids[start:start + _CHUNK_SIZE])
+        FarmStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["farm"],
+            update_fields=_STAT_FIELDS,
+        )
+        written += len(rows)
+    return written
+
+
+def _build_rows(chunk: List[int]) -> List[FarmStats]:
+    """Baris FarmStats (belum disimpan) untuk satu potongan farm, dari agregat."""
+    lot_counts = {
+        row["farm_id"]: row
+        for row in Lot.objects.filter(farm_id__in=chunk)
+        .values("farm_id")
+        .annotate(
+            total=Count("id"),
+            problematic=Count("id", filter=Q(status__in=PROBLEMATIC_STATUSES)),
+        )
+    }
+    incident_counts = {
+        row["lot__farm_id"]: row
+        for row in Incident.objects.filter(lot__farm_id__in=chunk)
+        .values("lot__farm_id")
+        .annotate(
+            total=Count("id"),
+            open=Count("id", filter=~Q(status__iexact="closed")),
+        )
+    }
+    latest = _latest_pond_logs()
+    farms = Farm.objects.filter(pk__in=chunk).annotate(
+        pond_date=Subquery(latest.values("date")[:1]),
+        pond_ph=Subquery(latest.values("ph")[:1]),
+        pond_temperature=Subquery(latest.values("temperature_c")[:1]),
+        pond_salinity=Subquery(latest.values("salinity_ppt")[:1]),
+    )
+
+    rows = []
+    for farm in farms:
+        lots = lot_counts.get(farm.pk, {"total": 0, "problematic": 0})
+        incidents = incident_counts.get(farm.pk, {"total": 0, "open": 0})
+        rows.append(
+            FarmStats(
+                farm_id=farm.pk,
+                lot_count=lots["total"],
+                problematic_lot_count=lots["problematic"],
+                incident_count=incidents["total"],
+                open_incident_count=incidents["open"],
+                last_pond_date=farm.pond_date,
+                last_ph=farm.pond_ph,
+                last_temperature_c=farm.pond_temperature,
+                last_salinity_ppt=farm.pond_salinity,
+            )
+        )
+    return rows
+
+
+def get_farm_stats(farm_ids: Iterable[int], save: bool = True) -> Dict[int, FarmStats]:
+    """
+    Ambil FarmStats untuk farm-farm ini (1 query); baris yang belum ada dibangun dulu.
+    save=False: baris yang belum ada hanya dihitung di memori (mis. --dry-run).
+    """
+    farm_ids = {pk for pk in farm_ids if pk}
+    if not farm_ids:
+        return {}
+
+    stats = {s.farm_id: s for s in FarmStats.objects.filter(farm_id__in=farm_ids)}
+    missing = list(farm_ids - stats.keys())
+    if missing and not save:
+        for start in range(0, len(missing), _CHUNK_SIZE):
+            stats.update({s.farm_id: s for s in _build_rows(missing[start:start + _CHUNK_SIZE])})
+    elif missing:
+        rebuild_farm_stats(missing)
+        stats.update({s.farm_id: s for s in FarmStats.objects.filter(farm_id__in=missing)})
+    return stats
+
+
+def _apply_deltas(deltas: Dict[int, Dict[str, int]]):
+    deltas = {
+        farm_id: {field: n for field, n in fields.items() if n}
+        for farm_id, fields in deltas.items()
+        if farm_id
+    }
+    deltas = {farm_id: fields for farm_id, fields in deltas.items() if fields}
+    if not deltas:
+        return
+
+    existing = set(
+        FarmStats.objects.filter(farm_id__in=deltas.keys()).values_list("farm_id", flat=True)
+    )
+    # baris baru dibangun dari data saat ini (sudah termasuk perubahan ini)
+    missing = deltas.keys() - existing
+    if missing:
+        rebuild_farm_stats(missing)
+
+    for farm_id in existing:
+        FarmStats.objects.filter(farm_id=farm_id).update(
+            **{field: F(field) + n for field, n in deltas[farm_id].items()}
+        )
+
+
+# === Lot ===
+
+def lot_saved(lot: Lot, old: Optional[Tuple[Optional[int], str]]):
+    """
+    old: (farm_id, status) sebelum save, None kalau lot baru.
+    """
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    if old is not None:
+        old_farm_id, old_status = old
+        deltas[old_farm_id]["lot_count"] -= 1
+        deltas[old_farm_id]["problematic_lot_count"] -= _is_problematic(old_status)
+    deltas[lot.farm_id]["lot_count"] += 1
+    deltas[lot.farm_id]["problematic_lot_count"] += _is_problematic(lot.status)
+
+    # lot pindah farm -> insidennya ikut pindah
+    if old is not None and old[0] != lot.farm_id:
+        counts = Incident.objects.filter(lot_id=lot.pk).aggregate(
+            total=Count("id"),
+            open=Count("id", filter=~Q(status__iexact="closed")),
+        )
+        for farm_id, sign in ((old[0], -1), (lot.farm_id, 1)):
+            deltas[farm_id]["incident_count"] += sign * counts["total"]
+            deltas[farm_id]["open_incident_count"] += sign * counts["open"]
+
+    _apply_deltas(deltas)
+
+
+def lot_deleted(lot: Lot):
+    _apply_deltas({
+        lot.farm_id: {
+            "lot_count": -1,
+            "problematic_lot_count": -_is_problematic(lot.status),
+        }
+    })
+
+
+def lots_status_changed(changes: Iterable[Tuple[Optional[int], str, str]]):
+    """Dipakai jalur bulk_update: changes = [(farm_id, old_status, new_status), ...]."""
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for farm_id, old_status, new_status in changes:
+        deltas[farm_id]["problematic_lot_count"] += (
+            _is_problematic(new_status) - _is_problematic(old_status)
+        )
+    _apply_deltas(deltas)
+
+
+# === Incident ===
+
+def incident_saved(farm_id: Optional[int], status: str, old: Optional[Tuple[Optional[int], str]]):
+    """
+    farm_id: farm dari lot insiden saat ini.
+    old: (farm_id, status) sebelum save, None kalau insiden baru.
+    """
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    if old is not None:
+        old_farm_id, old_status = old
+        deltas[old_farm_id]["incident_count"] -= 1
+        deltas[old_farm_id]["open_incident_count"] -= _is_open(old_status)
+    deltas[farm_id]["incident_count"] += 1
+    deltas[farm_id]["open_incident_count"] += _is_open(status)
+    _apply_deltas(deltas)
+
+
+def incident_deleted(farm_id: Optional[int], status: str):
+    _apply_deltas({
+        farm_id: {
+            "incident_count": -1,
+            "open_incident_count": -_is_open(status),
+        }
+    })
+
+
+# === PondLog ===
+
+def refresh_last_pond_reading(farm_id: int):
+    """
+    Perbarui PondLog terakhir untuk satu farm (1 query terindeks + 1 update).
+    Farm tanpa baris stats dilewati (dibangun get_farm_stats saat dibaca): saat
+    farm dihapus, cascade PondLog tidak boleh membuat baris stats baru.
+    """
+    last_log = (
+        PondLog.objects.filter(farm_id=farm_id)
+        .order_by("-date", "-id")
+        .values("date", "ph", "temperature_c", "salinity_ppt")
+        .first()
+    ) or {}
+    FarmStats.objects.filter(farm_id=farm_id).update(
+        last_pond_date=last_log.get("date"),
+        last_ph=last_log.get("ph"),
+        last_temperature_c=last_log.get("temperature_c"),
+        last_salinity_ppt=last_log.get("salinity_ppt"),
+    )
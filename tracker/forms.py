@@ -48,3 +48,19 @@ class LotForm(forms.ModelForm):
                 }
             ),
         }
+
+
+class ImportDataForm(forms.Form):
+    """Upload file CSV / JSONL di admin (lihat tracker/importer.py)."""
+
+    file = forms.FileField(label="File CSV / JSONL")
+    kind = forms.ChoiceField(
+        label="Jenis data",
+        choices=[
+            ("", "Dari kolom 'kind' per baris"),
+            ("lots", "Lot"),
+            ("movements", "Movement"),
+            ("lab_results", "Hasil lab"),
+        ],
+        required=False,
+    )
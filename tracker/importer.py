@@ -0,0 +1,419 @@
+"""
+Impor massal lot, movement & hasil lab dari file CSV / JSONL.
+
+- File dibaca satu kali secara streaming, baris per baris.
+- Natural key (lot_id, nama node, nama farm) di-resolve lewat peta di memori:
+  node & farm dimuat sekali, lot_id dicari per potongan (dan lot yang baru
+  dibuat langsung masuk peta).
+- Baris valid ditulis per potongan `batch_size` dengan bulk_create, satu
+  transaksi per potongan; baris invalid dicatat (nomor baris + alasan) dan
+  dilewati.
+- bulk_create tidak memicu signal, jadi setelah semua baris dimuat:
+  FarmStats / NodeStats dibangun ulang untuk farm & node terdampak, lalu lot
+  terdampak di-score ulang sekali dalam batch.
+
+Jenis data (kolom; * = wajib):
+  lots        : lot_id*, farm, harvest_date, volume_kg, status, jenis_kontaminasi
+  movements   : lot_id*, node*, timestamp*, location, quantity_kg
+  lab_results : lot_id*, sampling_date*, parameter*, value, unit, limit_value, result
+Baris JSONL boleh membawa kolom "kind" sendiri (file campuran).
+"""
+
+import csv
+import io
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .dashboard import invalidate_dashboard
+from .farm_stats import rebuild_farm_stats
+from .models import Farm, LabTest, Lot, LotMovement, Node, Sampling
+from .node_stats import rebuild_node_stats
+from .public_page import touch_lots
+from .recompute import mark_lots_dirty, recompute_lots
+
+KINDS = ("lots", "movements", "lab_results")
+FORMATS = ("csv", "jsonl")
+DEFAULT_BATCH_SIZE = 2000
+# detail error yang disimpan di ImportResult untuk ringkasan admin / CLI; sisanya
+# hanya dihitung (semua error tetap diteruskan ke on_error, mis. file --errors)
+MAX_ERROR_DETAILS = 1000
+# potongan parameter IN untuk query / update pasca-impor
+_ID_CHUNK = 500
+
+STATUSES = {code for code, _label in Lot.CONTAM_STATUS_CHOICES}
+LAB_RESULTS = {code for code, _label in LabTest.RESULT_CHOICES}
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(filename: str) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+
+def iter_rows(stream, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """(nomor baris, dict) per baris; baris yang rusak menghasilkan RowError."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {k.strip(): v for k, v in row.items() if k}
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_no, RowError(f"JSON tidak valid: {exc}")
+            continue
+        if not isinstance(row, dict):
+            yield line_no, RowError("Baris JSONL harus berupa objek")
+            continue
+        yield line_no, row
+
+
+def open_upload(uploaded_file) -> io.TextIOWrapper:
+    """File upload (bytes) -> stream teks untuk iter_rows (BOM Excel diabaikan)."""
+    return io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+
+
+# === parsing kolom ===
+
+def _text(row, key, required=False) -> str:
+    value = row.get(key)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f"Kolom '{key}' wajib diisi")
+    return value
+
+
+def _float(row, key) -> Optional[float]:
+    value = _text(row, key)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise RowError(f"Kolom '{key}' harus angka, bukan '{value}'")
+
+
+def _date(row, key, required=False) -> Optional[date]:
+    value = _text(row, key, required)
+    if not value:
+        return None
+    parsed = parse_date(value[:10]) if len(value) >= 10 else None
+    if parsed is None:
+        raise RowError(f"Kolom '{key}' harus tanggal YYYY-MM-DD, bukan '{value}'")
+    return parsed
+
+
+def _datetime(row, key) -> datetime:
+    value = _text(row, key, required=True)
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise RowError(f"Kolom '{key}' harus waktu ISO 8601, bukan '{value}'")
+        parsed = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _name_map(queryset) -> Dict[str, Optional[int]]:
+    """nama -> pk; nama yang dipakai lebih dari satu baris -> None (ambigu)."""
+    names: Dict[str, Optional[int]] = {}
+    for pk, name in queryset.values_list("pk", "name").iterator():
+        key = name.strip().lower()
+        names[key] = None if key in names else pk
+    return names
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    error_count: int = 0
+    lot_ids: Set[int] = field(default_factory=set)
+    farm_ids: Set[int] = field(default_factory=set)
+    node_ids: Set[int] = field(default_factory=set)
+    moved_lot_ids: Set[int] = field(default_factory=set)
+    rescored: int = 0
+    changed: int = 0
+    # dipanggil untuk SETIAP baris yang gagal, tanpa batas MAX_ERROR_DETAILS
+    on_error: Optional[Callable[[Dict[str, Any]], None]] = field(default=None, repr=False)
+
+    def add_error(self, line: int, kind: Optional[str], message: str):
+        error = {"line": line, "kind": kind, "error": message}
+        self.error_count += 1
+        if self.on_error is not None:
+            self.on_error(error)
+        if len(self.errors) < MAX_ERROR_DETAILS:
+            self.errors.append(error)
+
+    @property
+    def more_errors(self) -> int:
+        """Jumlah error yang tidak ikut disimpan di errors."""
+        return self.error_count - len(self.errors)
+
+    def summary(self) -> str:
+        created = ", ".join(f"{n} {kind}" for kind, n in self.created.items() if n) or "tidak ada"
+        return (
+            f"{self.rows} baris dibaca · dibuat: {created} · {self.error_count} error · "
+            f"{self.rescored} lot di-score ulang ({self.changed} berubah)"
+        )
+
+
+class DataImporter:
+    def __init__(
+        self,
+        kind: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        rescore: bool = True,
+        log: Optional[Callable[[str], None]] = None,
+        on_error: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        """on_error(error): dipanggil per baris yang gagal, mis. untuk menulis semuanya ke file."""
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"kind harus salah satu dari {', '.join(KINDS)}")
+        self.kind = kind
+        self.batch_size = max(1, batch_size)
+        self.rescore = rescore
+        self.log = log or (lambda message: None)
+        self.result = ImportResult(on_error=on_error)
+
+        self._buffers: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {k: [] for k in KINDS}
+        self._lots: Dict[str, int] = {}
+        self._farms = _name_map(Farm.objects.all())
+        self._nodes = _name_map(Node.objects.all())
+
+    # === alur utama ===
+
+    def load(self, stream, fmt: str) -> ImportResult:
+        """Muat satu file; boleh dipanggil berulang sebelum finish()."""
+        if fmt not in FORMATS:
+            raise ValueError(f"format harus salah satu dari {', '.join(FORMATS)}")
+        for line_no, row in iter_rows(stream, fmt):
+            self.result.rows += 1
+            if isinstance(row, RowError):
+                self.result.add_error(line_no, self.kind, str(row))
+                continue
+            kind = _text(row, "kind") or self.kind
+            if kind not in KINDS:
+                self.result.add_error(line_no, kind or None, "Jenis data tidak diketahui (isi kolom 'kind' atau --kind)")
+                continue
+            buffer = self._buffers[kind]
+            buffer.append((line_no, row))
+            if len(buffer) >= self.batch_size:
+                self._flush(kind)
+        return self.result
+
+    def finish(self) -> ImportResult:
+        """Tulis sisa buffer, perbarui stats & score ulang lot terdampak (sekali)."""
+        for kind in KINDS:
+            self._flush(kind)
+
+        result = self.result
+        if result.farm_ids:
+            rebuild_farm_stats(result.farm_ids)
+        if result.node_ids:
+            rebuild_node_stats(result.node_ids)
+
+        lot_ids = sorted(result.lot_ids)
+        if lot_ids and self.rescore:
+            self.log(f"Menghitung ulang risiko {len(lot_ids)} lot...")
+            result.rescored = len(lot_ids)
+            result.changed = recompute_lots(lot_ids)
+        elif lot_ids:
+            mark_lots_dirty(lot_ids)
+
+        # halaman publik menampilkan jalur lot
+        moved = sorted(result.moved_lot_ids)
+        for start in range(0, len(moved), _ID_CHUNK):
+            touch_lots(moved[start:start + _ID_CHUNK])
+        if result.rows:
+            invalidate_dashboard()
+        return result
+
+    def _flush(self, kind: str):
+        rows = self._buffers[kind]
+        if not rows:
+            return
+        # movement / hasil lab bisa merujuk lot yang baru ada di buffer lot
+        if kind != "lots":
+            self._flush("lots")
+        self._buffers[kind] = []
+
+        handler = getattr(self, f"_write_{kind}")
+        try:
+            with transaction.atomic():
+                created = handler(rows)
+        except DatabaseError as exc:
+            for line_no, _row in rows:
+                self.result.add_error(line_no, kind, f"Potongan gagal ditulis: {exc}")
+            return
+        self.result.created[kind] += created
+        self.log(f"  {kind}: +{created} (baris s/d {rows[-1][0]})")
+
+    # === resolve natural key ===
+
+    def _resolve_lots(self, lot_ids: Iterable[str]):
+        missing = {lot_id for lot_id in lot_ids if lot_id and lot_id not in self._lots}
+        if missing:
+            self._lots.update(Lot.objects.filter(lot_id__in=missing).values_list("lot_id", "pk"))
+
+    def _lot_pk(self, lot_id: str) -> int:
+        pk = self._lots.get(lot_id)
+        if pk is None:
+            raise RowError(f"Lot '{lot_id}' tidak ditemukan")
+        return pk
+
+    def _by_name(self, names: Dict[str, Optional[int]], label: str, value: str) -> int:
+        key = value.lower()
+        if key not in names:
+            raise RowError(f"{label} '{value}' tidak ditemukan")
+        if names[key] is None:
+            raise RowError(f"Nama {label.lower()} '{value}' dipakai lebih dari satu {label.lower()}")
+        return names[key]
+
+    def _parse_rows(self, kind, rows, parse):
+        """Jalankan parse per baris; baris yang gagal dicatat sebagai error."""
+        parsed = []
+        for line_no, row in rows:
+            try:
+                parsed.append(parse(row))
+            except RowError as exc:
+                self.result.add_error(line_no, kind, str(exc))
+        return parsed
+
+    # === penulis per jenis ===
+
+    def _write_lots(self, rows) -> int:
+        lot_ids = [_text(row, "lot_id") for _line, row in rows]
+        self._resolve_lots(lot_ids)
+        seen: Set[str] = set()
+
+        def parse(row):
+            lot_id = _text(row, "lot_id", required=True)
+            if lot_id in self._lots or lot_id in seen:
+                raise RowError(f"Lot '{lot_id}' sudah ada")
+            status = _text(row, "status").upper() or "OK"
+            if status not in STATUSES:
+                raise RowError(f"Status '{status}' tidak dikenal")
+            farm_name = _text(row, "farm")
+            lot = Lot(
+                lot_id=lot_id,
+                farm_id=self._by_name(self._farms, "Farm", farm_name) if farm_name else None,
+                harvest_date=_date(row, "harvest_date"),
+                volume_kg=_float(row, "volume_kg"),
+                status=status,
+                jenis_kontaminasi=_text(row, "jenis_kontaminasi") or None,
+                # Lot.save() tidak dipanggil oleh bulk_create
+                public_token=get_random_string(24),
+            )
+            seen.add(lot_id)
+            return lot
+
+        lots = Lot.objects.bulk_create(self._parse_rows("lots", rows, parse), batch_size=self.batch_size)
+        for lot in lots:
+            self._lots[lot.lot_id] = lot.pk
+            self.result.lot_ids.add(lot.pk)
+            if lot.farm_id:
+                self.result.farm_ids.add(lot.farm_id)
+        return len(lots)
+
+    def _write_movements(self, rows) -> int:
+        self._resolve_lots(_text(row, "lot_id") for _line, row in rows)
+
+        def parse(row):
+            return LotMovement(
+                lot_id=self._lot_pk(_text(row, "lot_id", required=True)),
+                node_id=self._by_name(self._nodes, "Node", _text(row, "node", required=True)),
+                timestamp=_datetime(row, "timestamp"),
+                location=_text(row, "location"),
+                quantity_kg=_float(row, "quantity_kg"),
+            )
+
+        movements = LotMovement.objects.bulk_create(
+            self._parse_rows("movements", rows, parse), batch_size=self.batch_size
+        )
+        for mv in movements:
+            self.result.lot_ids.add(mv.lot_id)
+            self.result.moved_lot_ids.add(mv.lot_id)
+            self.result.node_ids.add(mv.node_id)
+        return len(movements)
+
+    def _write_lab_results(self, rows) -> int:
+        self._resolve_lots(_text(row, "lot_id") for _line, row in rows)
+
+        def parse(row):
+            value = _float(row, "value")
+            limit_value = _float(row, "limit_value")
+            result = _text(row, "result").upper()
+            if not result:
+                result = "FAIL" if value is not None and limit_value is not None and value > limit_value else "PASS"
+            if result not in LAB_RESULTS:
+                raise RowError(f"Hasil '{result}' harus PASS atau FAIL")
+            sampling_key = (
+                self._lot_pk(_text(row, "lot_id", required=True)),
+                _date(row, "sampling_date", required=True),
+            )
+            test = LabTest(
+                parameter=_text(row, "parameter", required=True),
+                value=value,
+                unit=_text(row, "unit"),
+                limit_value=limit_value,
+                result=result,
+            )
+            return sampling_key, test
+
+        parsed = self._parse_rows("lab_results", rows, parse)
+        if not parsed:
+            return 0
+
+        # satu sampling per (lot, tanggal): pakai yang sudah ada, buat sisanya
+        keys = {key for key, _test in parsed}
+        samplings: Dict[Tuple[int, date], int] = {}
+        existing = (
+            Sampling.objects.filter(
+                lot_id__in={lot_pk for lot_pk, _day in keys},
+                date__in={day for _lot_pk, day in keys},
+            )
+            .order_by("pk")
+            .values_list("lot_id", "date", "pk")
+        )
+        for lot_pk, day, pk in existing:
+            samplings.setdefault((lot_pk, day), pk)
+        new_samplings = Sampling.objects.bulk_create(
+            [
+                Sampling(lot_id=lot_pk, date=day, status="SENT_TO_LAB")
+                for lot_pk, day in sorted(keys - samplings.keys())
+            ],
+            batch_size=self.batch_size,
+        )
+        samplings.update({(s.lot_id, s.date): s.pk for s in new_samplings})
+
+        tests = []
+        for key, test in parsed:
+            test.sampling_id = samplings[key]
+            tests.append(test)
+            self.result.lot_ids.add(key[0])
+        LabTest.objects.bulk_create(tests, batch_size=self.batch_size)
+        return len(tests)
@@ -0,0 +1,317 @@
+"""
+Ingest hasil lab massal dari lab kontrak (POST /lab/results/).
+
+Satu kiriman berisi banyak sampling, masing-masing dengan puluhan uji:
+    {"samplings": [
+        {"external_id": "LAB-A/CERT-0012", "lot_id": "LOT-2024-0001", "date": "2026-10-01",
+         "location": "...", "requested_by": "...", "status": "SENT_TO_LAB",
+         "tests": [{"parameter": "Timbal (Pb)", "value": 0.12, "unit": "ppm",
+                    "limit_value": 0.5, "result": "PASS", "external_id": "..."}]}
+    ]}
+
+- Sampling & LabTest di-upsert berdasarkan external_id (default external_id
+  uji = "<external_id sampling>:<parameter>"), jadi kiriman ulang tidak
+  menggandakan data; baris yang isinya sama tidak ditulis ulang. Baris "baru"
+  ditulis dengan bulk_create update_conflicts, jadi kiriman ulang yang jalan
+  bersamaan (baris sudah dibuat transaksi lain setelah dibaca) tetap sukses.
+- Seluruh kiriman divalidasi dulu; kalau ada yang salah tidak ada yang ditulis.
+  Penulisan dalam satu transaksi dengan bulk_create / bulk_update.
+- Hasil PASS/FAIL untuk parameter yang punya LabStandard dihitung dari tabel
+  standar terkompilasi (satu kali muat per kiriman); parameter lain memakai
+  result dari lab atau value vs limit_value.
+- bulk_* tidak memicu signal: lot terdampak ditandai sekali lewat
+  mark_lots_dirty (satu rescore gabungan per lot setelah commit).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from .lab_standards import get_lab_standards
+from .models import LabTest, Lot, Sampling
+from .recompute import mark_lots_dirty
+
+# potongan parameter IN saat mencari baris yang sudah ada
+_CHUNK = 500
+# jumlah error validasi yang dikembalikan ke klien
+MAX_REPORTED_ERRORS = 100
+
+SAMPLING_STATUSES = {code for code, _label in Sampling._meta.get_field("status").choices}
+RESULTS = {code for code, _label in LabTest.RESULT_CHOICES}
+SAMPLING_FIELDS = ["lot_id", "date", "location", "requested_by", "status"]
+TEST_FIELDS = ["sampling_id", "parameter", "value", "unit", "limit_value", "result"]
+_SAMPLING_ID_MAX = Sampling._meta.get_field("external_id").max_length
+_TEST_ID_MAX = LabTest._meta.get_field("external_id").max_length
+
+
+class IngestError(ValueError):
+    """Kiriman tidak valid; errors = [{"path", "error"}, ...]."""
+
+    def __init__(self, errors: List[Dict[str, str]]):
+        super().__init__(f"{len(errors)} error validasi")
+        self.errors = errors
+
+
+@dataclass
+class IngestResult:
+    samplings_created: int = 0
+    samplings_updated: int = 0
+    tests_created: int = 0
+    tests_updated: int = 0
+    unchanged: int = 0
+    lot_ids: Set[int] = field(default_factory=set)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "samplings_created": self.samplings_created,
+            "samplings_updated": self.samplings_updated,
+            "tests_created": self.tests_created,
+            "tests_updated": self.tests_updated,
+            "unchanged": self.unchanged,
+            "lots_rescored": len(self.lot_ids),
+        }
+
+
+def max_results() -> int:
+    return getattr(settings, "LAB_INGEST_MAX_RESULTS", 20000)
+
+
+def _chunked(items: List, size: int = _CHUNK) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _number(value, path: str, errors: List) -> Any:
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        errors.append({"path": path, "error": "harus angka"})
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        errors.append({"path": path, "error": f"harus angka, bukan '{value}'"})
+        return None
+
+
+def _text(value, path: str, errors: List, required: bool = False, max_length: int = None) -> str:
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        errors.append({"path": path, "error": "wajib diisi"})
+    elif max_length and len(value) > max_length:
+        errors.append({"path": path, "error": f"maksimal {max_length} karakter"})
+    return value
+
+
+# === validasi ===
+
+def parse_payload(payload: Any) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validasi & normalisasi kiriman -> (samplings, tests) tanpa menyentuh DB
+    kecuali untuk resolve lot_id. IngestError kalau ada yang salah.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("samplings"), list):
+        raise IngestError([{"path": "samplings", "error": "harus berupa list"}])
+
+    errors: List[Dict[str, str]] = []
+    samplings: List[Dict[str, Any]] = []
+    tests: List[Dict[str, Any]] = []
+    seen_samplings: Set[str] = set()
+    seen_tests: Set[str] = set()
+
+    total_tests = sum(
+        len(s["tests"]) for s in payload["samplings"] if isinstance(s, dict) and isinstance(s.get("tests"), list)
+    )
+    if total_tests > max_results():
+        raise IngestError([{"path": "samplings", "error": f"maksimal {max_results()} hasil uji per kiriman"}])
+
+    for i, raw in enumerate(payload["samplings"]):
+        path = f"samplings[{i}]"
+        if not isinstance(raw, dict):
+            errors.append({"path": path, "error": "harus berupa objek"})
+            continue
+
+        external_id = _text(raw.get("external_id"), f"{path}.external_id", errors, True, _SAMPLING_ID_MAX)
+        if external_id in seen_samplings:
+            errors.append({"path": f"{path}.external_id", "error": f"'{external_id}' muncul lebih dari sekali"})
+        seen_samplings.add(external_id)
+
+        try:
+            day = parse_date(str(raw.get("date") or ""))
+        except ValueError:
+            day = None
+        if day is None:
+            errors.append({"path": f"{path}.date", "error": "harus tanggal YYYY-MM-DD"})
+        status = _text(raw.get("status"), f"{path}.status", errors) or "SENT_TO_LAB"
+        if status not in SAMPLING_STATUSES:
+            errors.append({"path": f"{path}.status", "error": f"status '{status}' tidak dikenal"})
+
+        samplings.append({
+            "path": path,
+            "external_id": external_id,
+            "lot": _text(raw.get("lot_id"), f"{path}.lot_id", errors, required=True),
+            "date": day,
+            "location": _text(raw.get("location"), f"{path}.location", errors, max_length=200),
+            "requested_by": _text(raw.get("requested_by"), f"{path}.requested_by", errors, max_length=100),
+            "status": status,
+        })
+
+        raw_tests = raw.get("tests") or []
+        if not isinstance(raw_tests, list):
+            errors.append({"path": f"{path}.tests", "error": "harus berupa list"})
+            continue
+        for j, raw_test in enumerate(raw_tests):
+            test_path = f"{path}.tests[{j}]"
+            if not isinstance(raw_test, dict):
+                errors.append({"path": test_path, "error": "harus berupa objek"})
+                continue
+            parameter = _text(raw_test.get("parameter"), f"{test_path}.parameter", errors, True, 100)
+            test_id = _text(raw_test.get("external_id"), f"{test_path}.external_id", errors) or (
+                f"{external_id}:{parameter}"
+            )
+            if len(test_id) > _TEST_ID_MAX:
+                errors.append({"path": f"{test_path}.external_id", "error": f"maksimal {_TEST_ID_MAX} karakter"})
+            if test_id in seen_tests:
+                errors.append({"path": f"{test_path}.external_id", "error": f"'{test_id}' muncul lebih dari sekali"})
+            seen_tests.add(test_id)
+
+            result = _text(raw_test.get("result"), f"{test_path}.result", errors).upper()
+            if result and result not in RESULTS:
+                errors.append({"path": f"{test_path}.result", "error": "harus PASS atau FAIL"})
+            tests.append({
+                "external_id": test_id,
+                "sampling": external_id,
+                "parameter": parameter,
+                "value": _number(raw_test.get("value"), f"{test_path}.value", errors),
+                "unit": _text(raw_test.get("unit"), f"{test_path}.unit", errors, max_length=20),
+                "limit_value": _number(raw_test.get("limit_value"), f"{test_path}.limit_value", errors),
+                "result": result,
+            })
+
+    # lot_id -> pk sekaligus
+    lot_pks: Dict[str, int] = {}
+    wanted = sorted({s["lot"] for s in samplings if s["lot"]})
+    for chunk in _chunked(wanted):
+        lot_pks.update(Lot.objects.filter(lot_id__in=chunk).values_list("lot_id", "pk"))
+    for s in samplings:
+        if s["lot"] and s["lot"] not in lot_pks:
+            errors.append({"path": f"{s['path']}.lot_id", "error": f"lot '{s['lot']}' tidak ditemukan"})
+        s["lot_id"] = lot_pks.get(s["lot"])
+
+    if errors:
+        raise IngestError(errors)
+    return samplings, tests
+
+
+def evaluate_results(tests: List[Dict[str, Any]]):
+    """Isi result (& limit_value kosong) dari tabel standar; satu kali muat untuk semua uji."""
+    standards = get_lab_standards(max_age=0)
+    for test in tests:
+        evaluator = standards.evaluators.get(test["parameter"])
+        if evaluator is not None:
+            violated, _delta, _message = evaluator(test["value"], test["unit"])
+            test["result"] = "FAIL" if violated else "PASS"
+            if test["limit_value"] is None:
+                test["limit_value"] = standards.specs[test["parameter"]].limit
+        elif not test["result"]:
+            value, limit = test["value"], test["limit_value"]
+            test["result"] = "FAIL" if value is not None and limit is not None and value > limit else "PASS"
+
+
+# === penulisan ===
+
+def _existing(model, external_ids: List[str], fields: List[str]) -> Dict[str, Tuple]:
+    """external_id -> (pk, *fields) untuk baris yang sudah ada."""
+    rows: Dict[str, Tuple] = {}
+    for chunk in _chunked(external_ids):
+        for external_id, *values in model.objects.filter(external_id__in=chunk).values_list(
+            "external_id", "pk", *fields
+        ):
+            rows[external_id] = tuple(values)
+    return rows
+
+
+def _write_samplings(samplings: List[Dict[str, Any]], result: IngestResult) -> Dict[str, Tuple[int, int]]:
+    """Upsert sampling; return external_id -> (pk, lot_id)."""
+    existing = _existing(Sampling, [s["external_id"] for s in samplings], SAMPLING_FIELDS)
+    created, updated = [], []
+    for s in samplings:
+        values = tuple(s[name] for name in SAMPLING_FIELDS)
+        row = existing.get(s["external_id"])
+        if row is None:
+            created.append(Sampling(external_id=s["external_id"], **dict(zip(SAMPLING_FIELDS, values))))
+        elif row[1:] != values:
+            updated.append(Sampling(pk=row[0], external_id=s["external_id"], **dict(zip(SAMPLING_FIELDS, values))))
+            # sampling pindah lot -> lot lama juga perlu di-score ulang
+            result.lot_ids.update({row[1], s["lot_id"]})
+        else:
+            result.unchanged += 1
+
+    # upsert: external_id yang dibuat transaksi lain sejak dibaca di atas ditimpa, bukan IntegrityError
+    Sampling.objects.bulk_create(
+        created,
+        batch_size=_CHUNK,
+        update_conflicts=True,
+        unique_fields=["external_id"],
+        update_fields=SAMPLING_FIELDS,
+    )
+    Sampling.objects.bulk_update(updated, SAMPLING_FIELDS, batch_size=_CHUNK)
+    result.samplings_created += len(created)
+    result.samplings_updated += len(updated)
+    result.lot_ids.update(s.lot_id for s in created)
+
+    # pk sampling baru diambil ulang agar tidak bergantung pada dukungan RETURNING backend
+    ids = _existing(Sampling, [s["external_id"] for s in samplings], ["lot_id"])
+    return {external_id: (pk, lot_id) for external_id, (pk, lot_id) in ids.items()}
+
+
+def _write_tests(tests: List[Dict[str, Any]], samplings: Dict[str, Tuple[int, int]], result: IngestResult):
+    existing = _existing(LabTest, [t["external_id"] for t in tests], TEST_FIELDS)
+    created, updated = [], []
+    moved_from: Set[int] = set()
+    for t in tests:
+        sampling_id, lot_id = samplings[t["sampling"]]
+        values = (sampling_id, t["parameter"], t["value"], t["unit"], t["limit_value"], t["result"])
+        row = existing.get(t["external_id"])
+        if row is None:
+            created.append(LabTest(external_id=t["external_id"], **dict(zip(TEST_FIELDS, values))))
+        elif row[1:] != values:
+            updated.append(LabTest(pk=row[0], external_id=t["external_id"], **dict(zip(TEST_FIELDS, values))))
+        else:
+            result.unchanged += 1
+            continue
+        result.lot_ids.add(lot_id)
+        if row is not None and row[1] != sampling_id:
+            moved_from.add(row[1])
+
+    # uji yang pindah sampling: lot sampling lamanya ikut terdampak
+    for chunk in _chunked(sorted(moved_from)):
+        result.lot_ids.update(Sampling.objects.filter(pk__in=chunk).values_list("lot_id", flat=True))
+
+    LabTest.objects.bulk_create(
+        created,
+        batch_size=_CHUNK,
+        update_conflicts=True,
+        unique_fields=["external_id"],
+        update_fields=TEST_FIELDS,
+    )
+    LabTest.objects.bulk_update(updated, TEST_FIELDS, batch_size=_CHUNK)
+    result.tests_created += len(created)
+    result.tests_updated += len(updated)
+
+
+def ingest_lab_results(payload: Any) -> IngestResult:
+    """Validasi lalu upsert seluruh kiriman dalam satu transaksi. IngestError kalau tidak valid."""
+    samplings, tests = parse_payload(payload)
+    evaluate_results(tests)
+
+    result = IngestResult()
+    with transaction.atomic():
+        sampling_ids = _write_samplings(samplings, result)
+        _write_tests(tests, sampling_ids, result)
+        # satu rescore gabungan per lot setelah commit (antrean DirtyLot / langsung)
+        mark_lots_dirty(result.lot_ids)
+    return result
@@ -0,0 +1,113 @@
+"""
+Tabel standar lab yang sudah "dikompilasi".
+
+LabStandard (DB) diubah sekali menjadi dict parameter -> evaluator (closure
+dengan limit, comparator, severity & label yang sudah terikat), jadi evaluasi
+satu hasil uji = satu lookup dict + satu pemanggilan fungsi.
+
+Hasil kompilasi disimpan per proses dan dibuang kalau LabStandardVersion naik.
+Versi dicek ulang paling cepat tiap LAB_STANDARDS_RECHECK_SECONDS detik
+(jalur batch memaksa cek versi dengan max_age=0).
+"""
+
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import LabStandard, LabStandardVersion
+
+# comparator -> pembuat fungsi "apakah value melanggar limit"
+_VIOLATION_CHECKS = {
+    "<=": lambda limit: (lambda value: value > limit),
+    "<": lambda limit: (lambda value: value >= limit),
+    "==": lambda limit: (lambda value: value != limit),
+}
+
+
+def _fmt(number):
+    # 1000000.0 -> 1000000, 0.5 -> 0.5 (sama seperti tampilan standar lama)
+    return int(number) if float(number).is_integer() else number
+
+
+def _message(standard: LabStandard, value, unit, violated: bool) -> str:
+    label = standard.label or standard.parameter
+    unit_txt = f" {unit}" if unit else ""
+    if violated:
+        return (
+            f"{label} melebihi batas ({value}{unit_txt}, limit {_fmt(standard.limit)}) (+{standard.severity})"
+        )
+    return f"{label} sesuai batas ({value}{unit_txt}) (+0)"
+
+
+def _compile(standard: LabStandard) -> Callable:
+    limit = standard.limit
+    severity = standard.severity
+    violates = _VIOLATION_CHECKS.get(standard.comparator, lambda _limit: (lambda value: False))(limit)
+
+    def evaluate(value, unit=None) -> Tuple[bool, int, str]:
+        # nilai kosong dianggap melanggar demi keamanan
+        violated = value is None or violates(value)
+        return violated, severity if violated else 0, _message(standard, value, unit, violated)
+
+    return evaluate
+
+
+class CompiledStandards:
+    def __init__(self, version: int, standards):
+        self.version = version
+        self.specs: Dict[str, LabStandard] = {s.parameter: s for s in standards}
+        self.evaluators: Dict[str, Callable] = {p: _compile(s) for p, s in self.specs.items()}
+        # set parameter yang punya standar (untuk fallback "unmapped FAIL")
+        self.keys: FrozenSet[str] = frozenset(self.specs)
+
+    def evaluate(self, test) -> Tuple[bool, int, Optional[str]]:
+        """Return (violated, delta_score, message); (False, 0, None) kalau parameter tanpa standar."""
+        evaluator = self.evaluators.get(test.parameter)
+        if evaluator is None:
+            return False, 0, None
+        return evaluator(test.value, getattr(test, "unit", None))
+
+    def message(self, parameter: str, value, unit, violated: bool) -> str:
+        """Pesan evaluate() untuk hasil yang pelanggarannya sudah dihitung di luar (rescoring vektor)."""
+        return _message(self.specs[parameter], value, unit, violated)
+
+
+_lock = threading.Lock()
+_cache = {"table": None, "checked_at": 0.0}
+
+
+def _current_version() -> int:
+    return LabStandardVersion.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+
+
+def get_lab_standards(max_age: Optional[float] = None) -> CompiledStandards:
+    """
+    Tabel standar terkompilasi untuk proses ini.
+    max_age: umur maksimum (detik) sejak versi terakhir dicek; 0 = selalu cek versi (1 query).
+    """
+    if max_age is None:
+        max_age = getattr(settings, "LAB_STANDARDS_RECHECK_SECONDS", 30)
+
+    table = _cache["table"]
+    now = time.monotonic()
+    if table is not None and now - _cache["checked_at"] < max_age:
+        return table
+
+    version = _current_version()
+    if table is None or table.version != version:
+        with _lock:
+            table = CompiledStandards(version, LabStandard.objects.filter(is_active=True))
+            _cache["table"] = table
+    _cache["checked_at"] = now
+    return table
+
+
+def invalidate_lab_standards():
+    """Naikkan versi (semua proses akan kompilasi ulang) dan buang cache proses ini."""
+    updated = LabStandardVersion.objects.filter(pk=1).update(version=F("version") + 1)
+    if not updated:
+        LabStandardVersion.objects.create(pk=1, version=1)
+    _cache["table"] = None
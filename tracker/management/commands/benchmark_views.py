@@ -0,0 +1,231 @@
+"""
+Benchmark view baca berat (lot_detail, farm_detail) di bawah beban konkuren:
+WSGI (gunicorn, view sinkron, seperti `web` di Procfile) vs ASGI (gunicorn +
+UvicornWorker, view async, seperti `web-asgi`).
+
+Server dijalankan bergantian sebagai subprocess terhadap database yang
+dikonfigurasi (DATABASE_URL), dengan jumlah worker yang sama. Setiap server
+menerima jumlah request yang sama dari `--concurrency` klien paralel atas
+URL lot & farm acak, lalu dilaporkan latensi (p50 / p95 / p99 / max, ms),
+throughput & jumlah error.
+
+Dataset diambil dari database yang ada, jadi isi dulu, mis.:
+    python manage.py populate_dummy_data
+
+Usage:
+    python manage.py benchmark_views
+    python manage.py benchmark_views --requests 2000 --concurrency 32 --workers 4
+    python manage.py benchmark_views --servers asgi --output bench-views.json
+"""
+
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from tracker.models import Farm, Lot
+
+SERVERS = {
+    "wsgi": {
+        "app": "udangtracker_project.wsgi:application",
+        "args": [],
+        "env": {"TRACKER_ASYNC_VIEWS": "0"},
+    },
+    "asgi": {
+        "app": "udangtracker_project.asgi:application",
+        "args": ["-k", "uvicorn.workers.UvicornWorker"],
+        "env": {"TRACKER_ASYNC_VIEWS": "1"},
+    },
+}
+STARTUP_TIMEOUT = 30
+REQUEST_TIMEOUT = 30
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Bandingkan latensi lot_detail & farm_detail: WSGI (sinkron) vs ASGI (async) di bawah beban konkuren'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servers',
+            nargs='+',
+            choices=list(SERVERS),
+            default=list(SERVERS),
+            help='Server yang diukur',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Jumlah request per server',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=16,
+            help='Jumlah klien paralel',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Jumlah worker gunicorn per server',
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Port server benchmark',
+        )
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=50,
+            help='Jumlah lot & farm acak yang URL-nya dipakai',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='File JSON hasil (default: benchmark-views-<waktu>.json)',
+        )
+
+    def handle(self, *args, **options):
+        paths = self._paths(options['sample'], options['seed'])
+        if not paths:
+            raise CommandError('Belum ada lot / farm. Isi dulu: python manage.py populate_dummy_data')
+
+        rng = random.Random(options['seed'])
+        schedule = [rng.choice(paths) for _ in range(options['requests'])]
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "requests": options['requests'],
+                "concurrency": options['concurrency'],
+                "workers": options['workers'],
+                "distinct_urls": len(paths),
+            },
+            "results": [],
+        }
+
+        for name in options['servers']:
+            self.stdout.write(f'\n=== {name.upper()} ===')
+            result = self._run_server(name, schedule, options)
+            report["results"].append(result)
+            self.stdout.write(
+                f'  p50 {result["p50_ms"]:>8.2f} ms · p95 {result["p95_ms"]:>8.2f} ms · '
+                f'p99 {result["p99_ms"]:>8.2f} ms · {result["requests_per_second"]:>7.1f} req/s · '
+                f'{result["errors"]} error'
+            )
+
+        output = options['output'] or f'benchmark-views-{timezone.now():%Y%m%d-%H%M%S}.json'
+        with open(output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'✓ Hasil disimpan ke {output}'))
+
+    def _paths(self, sample, seed):
+        rng = random.Random(seed)
+        lot_ids = list(Lot.objects.order_by("pk").values_list("lot_id", flat=True)[: sample * 10])
+        farm_ids = list(Farm.objects.order_by("pk").values_list("pk", flat=True)[: sample * 10])
+        lots = rng.sample(lot_ids, min(sample, len(lot_ids)))
+        farms = rng.sample(farm_ids, min(sample, len(farm_ids)))
+        return (
+            [reverse("tracker:lot_detail", args=[lot_id]) for lot_id in lots]
+            + [reverse("tracker:farm_detail", args=[pk]) for pk in farms]
+        )
+
+    def _run_server(self, name, schedule, options):
+        server = SERVERS[name]
+        base_url = f'http://127.0.0.1:{options["port"]}'
+        env = {**os.environ, **server["env"]}
+        process = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn", server["app"],
+                *server["args"],
+                "--workers", str(options['workers']),
+                "--bind", f'127.0.0.1:{options["port"]}',
+                "--log-level", "warning",
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        try:
+            self._wait_until_ready(process, base_url + schedule[0])
+            # pemanasan: import, koneksi DB & cache tiap worker
+            for path in schedule[: options['workers'] * 5]:
+                self._fetch(base_url + path)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                samples = list(pool.map(lambda path: self._fetch(base_url + path), schedule))
+            elapsed = time.perf_counter() - started
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+        latencies = [ms for ms, ok in samples if ok]
+        return {
+            "server": name,
+            "p50_ms": round(_percentile(latencies, 50), 3),
+            "p95_ms": round(_percentile(latencies, 95), 3),
+            "p99_ms": round(_percentile(latencies, 99), 3),
+            "max_ms": round(max(latencies, default=0.0), 3),
+            "mean_ms": round(statistics.fmean(latencies) if latencies else 0.0, 3),
+            "requests_per_second": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+            "wall_seconds": round(elapsed, 3),
+            "errors": len(samples) - len(latencies),
+        }
+
+    def _wait_until_ready(self, process, url):
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'Server berhenti saat start (exit {process.returncode})')
+            try:
+                urllib.request.urlopen(url, timeout=1).read()
+                return
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.2)
+        raise CommandError(f'Server tidak siap dalam {STARTUP_TIMEOUT} detik')
+
+    def _fetch(self, url):
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=REQUEST_TIMEOUT) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, ConnectionError, OSError):
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
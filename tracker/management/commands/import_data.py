@@ -0,0 +1,116 @@
+"""
+Impor massal lot, movement & hasil lab dari file CSV / JSONL
+(lihat tracker/importer.py untuk kolom per jenis data).
+
+File dibaca streaming dan ditulis per potongan dengan bulk_create; baris
+invalid dilewati dan dilaporkan (nomor baris + alasan; --errors menulis
+semuanya ke file saat itu juga, layar hanya ringkasan). Setelah semua file
+dimuat, FarmStats / NodeStats terdampak dibangun ulang dan lot terdampak
+di-score ulang sekali.
+
+Usage:
+    python manage.py import_data lots.csv --kind lots
+    python manage.py import_data movements.csv lab.csv --kind movements
+    python manage.py import_data campuran.jsonl            # kolom "kind" per baris
+    python manage.py import_data lots.csv --kind lots --errors errors.jsonl --no-rescore
+"""
+
+import json
+import time
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.importer import DEFAULT_BATCH_SIZE, FORMATS, KINDS, DataImporter, detect_format
+
+# baris error yang dicetak ke stderr; selengkapnya lewat --errors
+SHOWN_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = 'Impor massal lot / movement / hasil lab dari file CSV atau JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files',
+            nargs='+',
+            help='File CSV / JSONL yang diimpor (berurutan)',
+        )
+        parser.add_argument(
+            '--kind',
+            choices=KINDS,
+            default=None,
+            help='Jenis data default (baris JSONL boleh punya kolom "kind" sendiri)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default=None,
+            help='Format file (default: dari ekstensi, .jsonl/.ndjson = jsonl, lainnya csv)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Jumlah baris per bulk insert / transaksi',
+        )
+        parser.add_argument(
+            '--errors',
+            default=None,
+            help='Tulis detail SEMUA baris yang gagal ke file JSONL ini',
+        )
+        parser.add_argument(
+            '--no-rescore',
+            action='store_true',
+            help='Jangan hitung ulang risiko sekarang; lot terdampak masuk antrean process_dirty_lots',
+        )
+
+    def handle(self, *args, **options):
+        with ExitStack() as stack:
+            on_error = None
+            if options['errors']:
+                try:
+                    errors_fh = stack.enter_context(open(options['errors'], 'w'))
+                except OSError as exc:
+                    raise CommandError(f'Tidak bisa menulis {options["errors"]}: {exc}')
+
+                # semua baris yang gagal ditulis saat itu juga, bukan hanya yang disimpan di result
+                def on_error(error):
+                    errors_fh.write(json.dumps(error) + '\n')
+
+            self._import(options, on_error)
+
+    def _import(self, options, on_error):
+        importer = DataImporter(
+            kind=options['kind'],
+            batch_size=options['batch_size'],
+            rescore=not options['no_rescore'],
+            log=self.stdout.write,
+            on_error=on_error,
+        )
+        started = time.monotonic()
+
+        for path in options['files']:
+            fmt = options['format'] or detect_format(path)
+            self.stdout.write(f'Mengimpor {path} ({fmt})...')
+            try:
+                with open(path, encoding='utf-8-sig', newline='') as fh:
+                    importer.load(fh, fmt)
+            except OSError as exc:
+                raise CommandError(f'Tidak bisa membaca {path}: {exc}')
+
+        result = importer.finish()
+        elapsed = time.monotonic() - started
+
+        for error in result.errors[:SHOWN_ERRORS]:
+            self.stderr.write(f'  baris {error["line"]} ({error["kind"] or "-"}): {error["error"]}')
+        if result.error_count > SHOWN_ERRORS:
+            self.stderr.write(f'  ... dan {result.error_count - SHOWN_ERRORS} error lainnya')
+
+        if options['errors'] and result.error_count:
+            self.stdout.write(f'Detail {result.error_count} error ditulis ke {options["errors"]}')
+
+        style = self.style.WARNING if result.error_count else self.style.SUCCESS
+        self.stdout.write(style(
+            f'✓ {result.summary()} · {result.rows / max(elapsed, 1e-6):,.0f} baris/detik'
+        ))
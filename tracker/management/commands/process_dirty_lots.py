@@ -0,0 +1,60 @@
+"""
+Worker untuk antrean hitung ulang risiko (DirtyLot).
+
+Usage:
+    python manage.py process_dirty_lots            # proses sekali lalu selesai
+    python manage.py process_dirty_lots --loop     # jalan terus (lihat Procfile)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from tracker.recompute import process_dirty_lots
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang risiko lot yang ada di antrean DirtyLot (batch, debounced)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Jalan terus, cek antrean setiap --interval detik',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Jeda antar pengecekan antrean dalam mode --loop (detik)',
+        )
+        parser.add_argument(
+            '--settle',
+            type=int,
+            default=None,
+            help='Lot baru diproses kalau tidak berubah selama N detik '
+                 '(default: settings.RISK_RECOMPUTE_SETTLE_SECONDS)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Maksimum lot per putaran',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed, changed = process_dirty_lots(
+                settle_seconds=options['settle'],
+                limit=options['limit'],
+            )
+            if processed:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ {processed} lot dihitung ulang ({changed} berubah)'
+                ))
+
+            if not options['loop']:
+                break
+            # antrean masih penuh -> langsung lanjut tanpa jeda
+            if not (options['limit'] and processed >= options['limit']):
+                time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+"""
+Bangun ulang tabel FarmStats dari data Lot / Incident / PondLog.
+Jalankan kalau ringkasan farm dicurigai tidak sinkron (drift).
+
+Usage: python manage.py rebuild_farm_stats [--farm ID ...]
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tracker.farm_stats import rebuild_farm_stats
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang FarmStats (jumlah lot, lot bermasalah, insiden, PondLog terakhir) dari nol'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--farm',
+            type=int,
+            action='append',
+            dest='farms',
+            help='Hanya farm dengan ID ini (boleh diulang)',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = rebuild_farm_stats(options['farms'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {written} baris FarmStats dibangun ulang'))
@@ -0,0 +1,29 @@
+"""
+Bangun ulang tabel NodeStats dari data LotMovement / Lot / Incident.
+Jalankan kalau ringkasan node dicurigai tidak sinkron (drift).
+
+Usage: python manage.py rebuild_node_stats [--node ID ...]
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tracker.node_stats import rebuild_node_stats
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang NodeStats (jumlah lot, lot bermasalah, insiden aktif per node) dari nol'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--node',
+            type=int,
+            action='append',
+            dest='nodes',
+            help='Hanya node dengan ID ini (boleh diulang)',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = rebuild_node_stats(options['nodes'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {written} baris NodeStats dibangun ulang'))
@@ -0,0 +1,82 @@
+"""
+Hitung ulang risiko lot yang pindah band umur (LOT_AGE_BANDS) sejak run terakhir.
+
+Faktor umur lot berubah seiring waktu tanpa ada data yang ditulis, jadi
+antrean DirtyLot tidak pernah menandainya. Job ini dijalankan harian via cron
+dan hanya mengambil lot yang harvest_date-nya melewati batas 2/5/10 hari
+sejak run terakhir (query rentang pada index harvest_date).
+
+Usage:
+    python manage.py rescore_aged_lots
+    python manage.py rescore_aged_lots --since 2025-01-01   # isi ulang rentang tertentu
+    python manage.py rescore_aged_lots --dry-run
+
+Contoh crontab (tiap hari jam 00:05):
+    5 0 * * * cd /app && python manage.py rescore_aged_lots
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tracker.models import ScheduledJobState
+from tracker.recompute import aged_lot_ids, recompute_lots
+
+JOB_NAME = "rescore_aged_lots"
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang risiko lot yang melewati batas band umur sejak run terakhir (untuk cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            default=None,
+            help='Tanggal run terakhir (YYYY-MM-DD); default dari ScheduledJobState, '
+                 'atau kemarin kalau job belum pernah jalan',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Hanya laporkan berapa lot yang akan dihitung ulang, tanpa menulis',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        since = self._since(options['since'], today)
+
+        if since >= today:
+            self.stdout.write(self.style.SUCCESS(f'Sudah jalan hari ini ({since}), tidak ada yang diproses.'))
+            return
+
+        lot_ids = aged_lot_ids(since, today)
+        self.stdout.write(f'{len(lot_ids)} lot melewati batas umur antara {since} dan {today}.')
+
+        if options['dry_run']:
+            return
+
+        changed = recompute_lots(lot_ids)
+        # state baru disimpan setelah semua lot selesai -> run yang gagal diulang penuh
+        ScheduledJobState.objects.update_or_create(name=JOB_NAME, defaults={"last_run_date": today})
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {len(lot_ids)} lot dihitung ulang, {changed} berubah'
+        ))
+
+    def _since(self, value, today):
+        if value:
+            try:
+                return date.fromisoformat(value)
+            except ValueError:
+                raise CommandError(f'Format --since tidak valid: {value} (pakai YYYY-MM-DD)')
+
+        state = ScheduledJobState.objects.filter(name=JOB_NAME).first()
+        if state is not None:
+            return state.last_run_date
+
+        self.stdout.write(self.style.WARNING(
+            'Belum ada run sebelumnya: hanya memproses perpindahan band hari ini. '
+            'Jalankan `manage.py rescore_lots` sekali untuk menyamakan semua lot.'
+        ))
+        return today - timedelta(days=1)
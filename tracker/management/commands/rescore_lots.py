@@ -0,0 +1,226 @@
+"""
+Hitung ulang risiko SEMUA lot (mis. setelah ambang risiko diubah).
+
+Lot diproses per potongan id; tiap potongan dihitung sebagai array NumPy
+(tracker/risk_vector.py), bisa disebar ke beberapa proses. Lot yang berubah
+ditulis balik dengan satu UPDATE ... WHERE pk IN per kombinasi (score, level,
+status) plus bulk_update untuk risk_breakdown. --dry-run tidak menulis apa pun.
+
+Reputasi farm (FarmStats) ikut berubah begitu status lot ditulis, jadi satu
+putaran bisa bergantung urutan: lot di potongan awal dinilai dengan reputasi
+lama. --passes N mengulang putaran sampai tidak ada lot yang berubah.
+
+Usage:
+    python manage.py rescore_lots
+    python manage.py rescore_lots --workers 4 --chunk-size 20000
+    python manage.py rescore_lots --dry-run
+    python manage.py rescore_lots --passes 5   # ulangi sampai stabil (maks 5 putaran)
+    python manage.py rescore_lots --checkpoint rescore.json   # bisa dilanjutkan kalau terhenti
+"""
+
+import json
+import os
+import time
+from collections import defaultdict
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.utils import timezone
+
+from tracker import node_stats
+from tracker.dashboard import invalidate_dashboard
+from tracker.farm_stats import lots_status_changed
+from tracker.models import Lot
+from tracker.public_page import invalidate_public_pages
+from tracker.risk_history import record_risk_snapshots
+from tracker.risk_vector import score_id_range
+
+# jumlah lot per UPDATE ... WHERE pk IN / per batch bulk_update
+UPDATE_CHUNK = 1000
+
+
+def _score_chunk(bounds, dry_run=False):
+    lo, hi = bounds
+    return lo, hi, score_id_range(lo, hi, dry_run=dry_run)
+
+
+def _score_chunk_dry(bounds):
+    return _score_chunk(bounds, dry_run=True)
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang risk_score/level/status semua lot secara vektor (NumPy), opsional paralel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Jumlah lot per potongan',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Jumlah proses untuk menghitung potongan secara paralel',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Hanya hitung & laporkan berapa lot yang akan berubah, tanpa menulis',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=None,
+            help='File JSON untuk menyimpan progres; kalau sudah ada, proses dilanjutkan dari situ',
+        )
+        parser.add_argument(
+            '--passes',
+            type=int,
+            default=1,
+            help='Ulangi sampai tidak ada lot yang berubah, maksimal N putaran (abaikan untuk --dry-run)',
+        )
+
+    def handle(self, *args, **options):
+        passes = 1 if options['dry_run'] else max(1, options['passes'])
+        for n in range(1, passes + 1):
+            if passes > 1:
+                self.stdout.write(f'Putaran {n}/{passes}')
+            changed = self._rescore(options)
+            if not changed:
+                return
+        if passes > 1:
+            self.stdout.write(self.style.WARNING(
+                f'Masih ada lot yang berubah setelah {passes} putaran; jalankan ulang untuk menstabilkan.'
+            ))
+
+    def _rescore(self, options):
+        """Satu putaran atas semua lot. Return: jumlah lot yang berubah."""
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        checkpoint = options['checkpoint']
+
+        state = {"last_id": 0, "scanned": 0, "changed": 0, "status_changed": 0}
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as fh:
+                state.update(json.load(fh))
+            self.stdout.write(self.style.WARNING(
+                f'Melanjutkan dari checkpoint: lot id > {state["last_id"]}'
+            ))
+
+        total = Lot.objects.filter(pk__gt=state["last_id"]).count()
+        if not total:
+            self.stdout.write(self.style.SUCCESS('Tidak ada lot untuk diproses.'))
+            return 0
+        self.stdout.write(f'Memproses {total} lot (chunk {chunk_size}, {options["workers"]} proses)...')
+
+        # batas potongan dihitung di proses utama sebelum pool dibuat
+        chunks = list(self._chunk_bounds(state["last_id"], chunk_size))
+        started = time.monotonic()
+        done = 0
+
+        for lo, hi, result in self._run(chunks, options['workers'], dry_run):
+            changed = result["changed"]
+            status_changes = [
+                (pk, farm_id, old_status, status)
+                for pk, farm_id, old_status, _old_score, _old_level, _score, _level, status, _bits, _factors in changed
+                if old_status != status
+            ]
+            if not dry_run:
+                self._write(changed, status_changes)
+
+            done += result["scanned"]
+            state["last_id"] = hi
+            state["scanned"] += result["scanned"]
+            state["changed"] += len(changed)
+            state["status_changed"] += len(status_changes)
+            if checkpoint and not dry_run:
+                self._save_checkpoint(checkpoint, state)
+
+            rate = done / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f'  {done}/{total} lot ({done * 100 // total}%) · '
+                f'{len(changed)} berubah · {rate:,.0f} lot/detik'
+            )
+
+        if checkpoint and not dry_run and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        verb = 'akan berubah' if dry_run else 'berubah'
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {state["scanned"]} lot diperiksa: {state["changed"]} {verb} '
+            f'({state["status_changed"]} ganti status)'
+        ))
+        return state["changed"]
+
+    def _chunk_bounds(self, last_id, chunk_size):
+        """(lo, hi] per potongan, diambil bertahap dengan keyset pada pk."""
+        lo = last_id
+        while True:
+            ids = list(
+                Lot.objects.filter(pk__gt=lo)
+                .order_by("pk")
+                .values_list("pk", flat=True)[chunk_size - 1:chunk_size]
+            )
+            if ids:
+                yield lo, ids[0]
+                lo = ids[0]
+                continue
+            last = Lot.objects.filter(pk__gt=lo).order_by("-pk").values_list("pk", flat=True).first()
+            if last is not None:
+                yield lo, last
+            return
+
+    def _run(self, chunks, workers, dry_run):
+        score = _score_chunk_dry if dry_run else _score_chunk
+        if workers <= 1:
+            for bounds in chunks:
+                yield score(bounds)
+            return
+
+        # koneksi DB tidak boleh ikut ter-fork ke proses anak
+        connections.close_all()
+        with get_context("fork").Pool(workers, initializer=connections.close_all) as pool:
+            # imap menjaga urutan hasil -> checkpoint selalu maju berurutan
+            yield from pool.imap(score, chunks)
+
+    def _write(self, changed, status_changes):
+        if not changed:
+            return
+        now = timezone.now()
+        # skor hanya 0-100 x beberapa band -> lot berubah dikelompokkan per nilai baru
+        groups = defaultdict(list)
+        for pk, _farm_id, _old_status, _old_score, _old_level, score, level, status, _bits, _factors in changed:
+            groups[(score, level, status)].append(pk)
+        with transaction.atomic():
+            for (score, level, status), pks in groups.items():
+                for start in range(0, len(pks), UPDATE_CHUNK):
+                    Lot.objects.filter(pk__in=pks[start:start + UPDATE_CHUNK]).update(
+                        risk_score=score, risk_level=level, status=status, updated_at=now
+                    )
+            # breakdown berbeda per lot
+            Lot.objects.bulk_update(
+                [Lot(pk=row[0], risk_breakdown=row[9]) for row in changed],
+                ["risk_breakdown"],
+                batch_size=UPDATE_CHUNK,
+            )
+            lots_status_changed(
+                (farm_id, old_status, status) for _pk, farm_id, old_status, status in status_changes
+            )
+            node_stats.lots_status_changed(
+                (pk, old_status, status) for pk, _farm_id, old_status, status in status_changes
+            )
+            record_risk_snapshots(
+                (pk, score, level, bits)
+                for pk, _farm_id, _old_status, old_score, old_level, score, level, _status, bits, _factors in changed
+                if (old_score, old_level) != (score, level)
+            )
+            invalidate_dashboard()
+            invalidate_public_pages(pk for pk, *_rest in changed)
+
+    def _save_checkpoint(self, path, state):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(state, fh)
+        os.replace(tmp_path, path)
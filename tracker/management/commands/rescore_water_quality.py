@@ -0,0 +1,65 @@
+"""
+Hitung ulang risiko lot yang flag kualitas air telemetrinya berubah sejak run terakhir.
+
+Faktor kualitas air membaca jendela rollup telemetri 24 jam yang bergeser tiap
+jam. Ingest telemetri hanya menandai lot saat ada data baru, jadi pembacaan
+buruk yang keluar dari jendela (atau sensor yang berhenti mengirim) tidak
+pernah memicu rescore. Job ini dijalankan tiap jam via cron dan membandingkan
+flag per farm pada jendela run terakhir dengan jendela sekarang.
+
+Usage:
+    python manage.py rescore_water_quality
+    python manage.py rescore_water_quality --dry-run
+
+Contoh crontab (tiap jam menit ke-10):
+    10 * * * * cd /app && python manage.py rescore_water_quality
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tracker.models import ScheduledJobState
+from tracker.recompute import recompute_lots, water_window_lot_ids
+
+JOB_NAME = "rescore_water_quality"
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang risiko lot yang flag kualitas air 24 jamnya berubah sejak run terakhir (untuk cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Hanya laporkan berapa lot yang akan dihitung ulang, tanpa menulis',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        state = ScheduledJobState.objects.filter(name=JOB_NAME).first()
+        if state is not None and state.last_run_at is not None:
+            since = state.last_run_at
+        else:
+            self.stdout.write(self.style.WARNING(
+                'Belum ada run sebelumnya: hanya membandingkan dengan jendela 1 jam lalu. '
+                'Jalankan `manage.py rescore_lots` sekali untuk menyamakan semua lot.'
+            ))
+            since = now - timedelta(hours=1)
+
+        lot_ids = water_window_lot_ids(since, now)
+        self.stdout.write(f'{len(lot_ids)} lot dengan flag kualitas air berubah sejak {since:%Y-%m-%d %H:%M}.')
+
+        if options['dry_run']:
+            return
+
+        changed = recompute_lots(lot_ids)
+        # state baru disimpan setelah semua lot selesai -> run yang gagal diulang penuh
+        ScheduledJobState.objects.update_or_create(
+            name=JOB_NAME, defaults={"last_run_date": now.date(), "last_run_at": now}
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {len(lot_ids)} lot dihitung ulang, {changed} berubah'
+        ))
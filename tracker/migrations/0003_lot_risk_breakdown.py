@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0002_lot_harvest_date_lot_public_token_lot_risk_level_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lot',
+            name='risk_breakdown',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_lot_risk_breakdown'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marked_at', models.DateTimeField(db_index=True)),
+                ('lot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dirty_mark', to='tracker.lot')),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_dirtylot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmStats',
+            fields=[
+                ('farm', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='tracker.farm')),
+                ('lot_count', models.IntegerField(default=0)),
+                ('problematic_lot_count', models.IntegerField(default=0)),
+                ('incident_count', models.IntegerField(default=0)),
+                ('open_incident_count', models.IntegerField(default=0)),
+                ('last_pond_date', models.DateField(blank=True, null=True)),
+                ('last_ph', models.FloatField(blank=True, null=True)),
+                ('last_temperature_c', models.FloatField(blank=True, null=True)),
+                ('last_salinity_ppt', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-problematic_lot_count'], name='farmstats_problematic_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:48
+
+from django.db import migrations, models
+
+# Standar mutu dan keamanan udang beku (ringkas dari tabel persyaratan),
+# sebelumnya hard-coded sebagai risk_engine.STANDARD_LIMITS
+INITIAL_STANDARDS = [
+    # Cemaran mikroba
+    ("ALT", "Angka Lempeng Total", 1_000_000, "<=", 25),
+    ("E.coli", "E. coli", 1, "<=", 40),
+    ("Salmonella", "Salmonella", 0, "==", 60),
+    ("Vibrio parahaemolyticus", "Vibrio parahaemolyticus", 10, "<=", 40),
+    # Cemaran logam
+    ("Merkuri (Hg)", "", 0.5, "<=", 30),
+    ("Timbal (Pb)", "", 0.2, "<=", 30),
+    ("Kadmium (Cd)", "", 0.1, "<=", 30),
+    # Residu antibiotik
+    ("Kloramfenikol", "", 0, "==", 60),
+    ("Metabolit Nitrofurans", "", 0, "==", 60),
+    ("Tetrasiklin", "", 100, "<=", 30),
+]
+
+
+def seed_standards(apps, schema_editor):
+    LabStandard = apps.get_model("tracker", "LabStandard")
+    LabStandardVersion = apps.get_model("tracker", "LabStandardVersion")
+    LabStandard.objects.bulk_create([
+        LabStandard(parameter=parameter, label=label, limit=limit, comparator=cmp, severity=severity)
+        for parameter, label, limit, cmp, severity in INITIAL_STANDARDS
+    ])
+    LabStandardVersion.objects.create(pk=1, version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_farmstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabStandard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parameter', models.CharField(max_length=100, unique=True)),
+                ('label', models.CharField(blank=True, max_length=100)),
+                ('limit', models.FloatField()),
+                ('comparator', models.CharField(choices=[('<=', 'Maksimal (<=)'), ('<', 'Kurang dari (<)'), ('==', 'Harus sama (==)')], default='<=', max_length=2)),
+                ('severity', models.IntegerField(default=30)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['parameter'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LabStandardVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_standards, migrations.RunPython.noop),
+    ]
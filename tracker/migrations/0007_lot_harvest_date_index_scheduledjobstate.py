@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_labstandard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledJobState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_run_date', models.DateField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='lot',
+            name='harvest_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_lot_harvest_date_index_scheduledjobstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeStats',
+            fields=[
+                ('node', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='tracker.node')),
+                ('lot_count', models.IntegerField(default=0)),
+                ('problematic_count', models.IntegerField(default=0)),
+                ('open_incident_count', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
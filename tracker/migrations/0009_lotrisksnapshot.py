@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_nodestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LotRiskSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('score', models.PositiveSmallIntegerField()),
+                ('level', models.PositiveSmallIntegerField()),
+                ('factors', models.PositiveIntegerField(default=0)),
+                ('lot', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='risk_snapshots', to='tracker.lot')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lot', 'taken_at'], name='lotrisksnapshot_lot_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Pencarian lot_id__icontains di PostgreSQL menjadi UPPER("lot_id"::text) LIKE UPPER(...);
+# index trigram pada ekspresi yang sama membuatnya tidak perlu scan seluruh tabel.
+# SQLite tidak punya index untuk LIKE '%..%', jadi dilewati.
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS lot_lot_id_trgm_idx ON tracker_lot '
+        'USING gin (UPPER("lot_id"::text) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS lot_lot_id_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_lotrisksnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lot',
+            index=models.Index(fields=['-created_at', '-id'], name='lot_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lot',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='lot_status_created_id_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
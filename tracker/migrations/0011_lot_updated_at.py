@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_lot_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
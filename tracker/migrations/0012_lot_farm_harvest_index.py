@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0011_lot_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lot',
+            index=models.Index(fields=['farm', '-harvest_date', '-id'], name='lot_farm_harvest_id_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_lot_farm_harvest_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['-date', '-id'], name='incident_date_id_idx'),
+        ),
+    ]
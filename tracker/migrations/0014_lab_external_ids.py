@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0013_incident_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labtest',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=150, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='sampling',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0014_lab_external_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PondTelemetryChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pond', models.CharField(blank=True, default='', max_length=50)),
+                ('date', models.DateField()),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telemetry_chunks', to='tracker.farm')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('farm', 'pond', 'date'), name='telemetry_chunk_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PondTelemetryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pond', models.CharField(blank=True, default='', max_length=50)),
+                ('period', models.CharField(choices=[('H', 'Per jam'), ('D', 'Per hari')], max_length=1)),
+                ('start', models.DateTimeField()),
+                ('ph_count', models.IntegerField(default=0)),
+                ('ph_min', models.FloatField(blank=True, null=True)),
+                ('ph_max', models.FloatField(blank=True, null=True)),
+                ('ph_mean', models.FloatField(blank=True, null=True)),
+                ('ph_out', models.IntegerField(default=0)),
+                ('temperature_c_count', models.IntegerField(default=0)),
+                ('temperature_c_min', models.FloatField(blank=True, null=True)),
+                ('temperature_c_max', models.FloatField(blank=True, null=True)),
+                ('temperature_c_mean', models.FloatField(blank=True, null=True)),
+                ('salinity_ppt_count', models.IntegerField(default=0)),
+                ('salinity_ppt_min', models.FloatField(blank=True, null=True)),
+                ('salinity_ppt_max', models.FloatField(blank=True, null=True)),
+                ('salinity_ppt_mean', models.FloatField(blank=True, null=True)),
+                ('salinity_ppt_out', models.IntegerField(default=0)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telemetry_rollups', to='tracker.farm')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['farm', 'period', 'start'], name='telemetry_rollup_window_idx')],
+                'constraints': [models.UniqueConstraint(fields=('farm', 'pond', 'period', 'start'), name='telemetry_rollup_unique')],
+            },
+        ),
+    ]
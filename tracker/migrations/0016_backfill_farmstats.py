@@ -0,0 +1,90 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Q, Subquery
+
+# salinan Lot.PROBLEMATIC_STATUSES saat migrasi ini dibuat
+PROBLEMATIC_STATUSES = ["HOLD", "INVESTIGATE"]
+CHUNK_SIZE = 500
+
+
+def backfill_farm_stats(apps, schema_editor):
+    # dashboard membaca FarmStats langsung (tanpa rebuild lazy get_farm_stats),
+    # jadi database lama perlu diisi sekali. Agregat sama dengan
+    # farm_stats.rebuild_farm_stats, tapi memakai model historis.
+    Farm = apps.get_model("tracker", "Farm")
+    FarmStats = apps.get_model("tracker", "FarmStats")
+    Incident = apps.get_model("tracker", "Incident")
+    Lot = apps.get_model("tracker", "Lot")
+    PondLog = apps.get_model("tracker", "PondLog")
+
+    latest = PondLog.objects.filter(farm_id=OuterRef("pk")).order_by("-date", "-id")
+    farm_ids = list(Farm.objects.values_list("pk", flat=True))
+    for start in range(0, len(farm_ids), CHUNK_SIZE):
+        chunk = farm_ids[start:start + CHUNK_SIZE]
+        lot_counts = {
+            row["farm_id"]: row
+            for row in Lot.objects.filter(farm_id__in=chunk)
+            .values("farm_id")
+            .annotate(
+                total=Count("id"),
+                problematic=Count("id", filter=Q(status__in=PROBLEMATIC_STATUSES)),
+            )
+        }
+        incident_counts = {
+            row["lot__farm_id"]: row
+            for row in Incident.objects.filter(lot__farm_id__in=chunk)
+            .values("lot__farm_id")
+            .annotate(
+                total=Count("id"),
+                open=Count("id", filter=~Q(status__iexact="closed")),
+            )
+        }
+        farms = Farm.objects.filter(pk__in=chunk).annotate(
+            pond_date=Subquery(latest.values("date")[:1]),
+            pond_ph=Subquery(latest.values("ph")[:1]),
+            pond_temperature=Subquery(latest.values("temperature_c")[:1]),
+            pond_salinity=Subquery(latest.values("salinity_ppt")[:1]),
+        )
+
+        rows = []
+        for farm in farms:
+            lots = lot_counts.get(farm.pk, {"total": 0, "problematic": 0})
+            incidents = incident_counts.get(farm.pk, {"total": 0, "open": 0})
+            rows.append(
+                FarmStats(
+                    farm_id=farm.pk,
+                    lot_count=lots["total"],
+                    problematic_lot_count=lots["problematic"],
+                    incident_count=incidents["total"],
+                    open_incident_count=incidents["open"],
+                    last_pond_date=farm.pond_date,
+                    last_ph=farm.pond_ph,
+                    last_temperature_c=farm.pond_temperature,
+                    last_salinity_ppt=farm.pond_salinity,
+                )
+            )
+        FarmStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["farm"],
+            update_fields=[
+                "lot_count",
+                "problematic_lot_count",
+                "incident_count",
+                "open_incident_count",
+                "last_pond_date",
+                "last_ph",
+                "last_temperature_c",
+                "last_salinity_ppt",
+            ],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0015_pond_telemetry'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_farm_stats, migrations.RunPython.noop),
+    ]
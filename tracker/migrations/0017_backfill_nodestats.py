@@ -0,0 +1,65 @@
+from django.db import migrations
+from django.db.models import Count, Q
+
+# salinan Lot.PROBLEMATIC_STATUSES saat migrasi ini dibuat
+PROBLEMATIC_STATUSES = ["HOLD", "INVESTIGATE"]
+CHUNK_SIZE = 500
+
+
+def backfill_node_stats(apps, schema_editor):
+    # 0008 hanya membuat tabel; isi NodeStats untuk data yang sudah ada.
+    # Agregat sama dengan node_stats.rebuild_node_stats, tapi memakai model historis.
+    LotMovement = apps.get_model("tracker", "LotMovement")
+    Node = apps.get_model("tracker", "Node")
+    NodeStats = apps.get_model("tracker", "NodeStats")
+
+    node_ids = list(Node.objects.values_list("pk", flat=True))
+    for start in range(0, len(node_ids), CHUNK_SIZE):
+        chunk = node_ids[start:start + CHUNK_SIZE]
+        counts = {
+            row["node_id"]: row
+            for row in LotMovement.objects.filter(node_id__in=chunk)
+            .values("node_id")
+            .annotate(
+                lots=Count("lot", distinct=True),
+                problematic=Count(
+                    "lot",
+                    filter=Q(lot__status__in=PROBLEMATIC_STATUSES),
+                    distinct=True,
+                ),
+                open_incidents=Count(
+                    "lot__incidents",
+                    filter=~Q(lot__incidents__status__iexact="closed"),
+                    distinct=True,
+                ),
+            )
+        }
+
+        rows = []
+        for node_id in chunk:
+            row = counts.get(node_id, {"lots": 0, "problematic": 0, "open_incidents": 0})
+            rows.append(
+                NodeStats(
+                    node_id=node_id,
+                    lot_count=row["lots"],
+                    problematic_count=row["problematic"],
+                    open_incident_count=row["open_incidents"],
+                )
+            )
+        NodeStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["node"],
+            update_fields=["lot_count", "problematic_count", "open_incident_count"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0016_backfill_farmstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_node_stats, migrations.RunPython.noop),
+    ]
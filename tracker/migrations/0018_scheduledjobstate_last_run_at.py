@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0017_backfill_nodestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledjobstate',
+            name='last_run_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
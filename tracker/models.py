@@ -47,6 +47,59 @@ class Farm(models.Model):
         return self.name
 
 
+class FarmStats(models.Model):
+    """
+    Ringkasan reputasi per farm, dipelihara incremental oleh tracker/farm_stats.py
+    (signal Lot / Incident / PondLog + bulk rescoring).
+    Bangun ulang dari nol: python manage.py rebuild_farm_stats
+    """
+    farm = models.OneToOneField(
+        Farm,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="stats",
+    )
+    lot_count = models.IntegerField(default=0)
+    problematic_lot_count = models.IntegerField(default=0)  # HOLD / INVESTIGATE
+    incident_count = models.IntegerField(default=0)
+    open_incident_count = models.IntegerField(default=0)  # status selain CLOSED
+
+    # PondLog terakhir (tanggal terbaru)
+    last_pond_date = models.DateField(null=True, blank=True)
+    last_ph = models.FloatField(null=True, blank=True)
+    last_temperature_c = models.FloatField(null=True, blank=True)
+    last_salinity_ppt = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-problematic_lot_count"], name="farmstats_problematic_idx"),
+        ]
+
+    def __str__(self):
+        return f"Stats {self.farm_id}: {self.problematic_lot_count}/{self.lot_count}"
+
+
+class NodeStats(models.Model):
+    """
+    Ringkasan per node untuk estimasi kontaminasi: lot (distinct) yang pernah
+    lewat node ini, yang bermasalah, dan insiden aktif pada lot-lot tersebut.
+    Dipelihara incremental oleh tracker/node_stats.py.
+    Bangun ulang dari nol: python manage.py rebuild_node_stats
+    """
+    node = models.OneToOneField(
+        Node,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="stats",
+    )
+    lot_count = models.IntegerField(default=0)
+    problematic_count = models.IntegerField(default=0)  # HOLD / INVESTIGATE
+    open_incident_count = models.IntegerField(default=0)  # status selain CLOSED
+
+    def __str__(self):
+        return f"Stats node {self.node_id}: {self.problematic_count}/{self.lot_count}"
+
+
 # =========================
 # Lot & Pergerakan Lot
 # =========================
@@ -58,6 +111,8 @@ class Lot(models.Model):
         ("HOLD", "Ditahan"),
         ("INVESTIGATE", "Investigasi"),
     ]
+    # status yang dihitung sebagai "lot bermasalah"
+    PROBLEMATIC_STATUSES = ["HOLD", "INVESTIGATE"]
 
     # level risiko (buat dashboard & badge warna)
     RISK_LEVEL_CHOICES = [
@@ -77,7 +132,8 @@ class Lot(models.Model):
         on_delete=models.SET_NULL,
         related_name="lots",
     )
-    harvest_date = models.DateField(null=True, blank=True)
+    # terindeks: job rescore_aged_lots memilih lot berdasarkan umur panen
+    harvest_date = models.DateField(null=True, blank=True, db_index=True)
     volume_kg = models.FloatField(null=True, blank=True)
 
     status = models.CharField(
@@ -94,6 +150,8 @@ class Lot(models.Model):
         choices=RISK_LEVEL_CHOICES,
         default="LOW",
     )
+    # breakdown per faktor saat terakhir di-score (lihat risk_engine.RISK_FACTORS)
+    risk_breakdown = models.JSONField(default=list, blank=True)
 
     # buat QR / public view
     public_token = models.CharField(
@@ -104,6 +162,18 @@ class Lot(models.Model):
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # versi lot untuk halaman publik (ETag / Last-Modified). Jalur bulk_update
+    # & perubahan pergerakan lot ikut memperbaruinya (lihat tracker/public_page.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # keyset pagination daftar lot (terbaru dulu), dengan & tanpa filter status
+            models.Index(fields=["-created_at", "-id"], name="lot_created_id_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="lot_status_created_id_idx"),
+            # riwayat lot per tambak di farm_detail (keyset per tanggal panen)
+            models.Index(fields=["farm", "-harvest_date", "-id"], name="lot_farm_harvest_id_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.public_token:
@@ -114,6 +184,63 @@ class Lot(models.Model):
         return self.lot_id
 
 
+class DirtyLot(models.Model):
+    """
+    Antrean lot yang perlu di-score ulang (lihat tracker/recompute.py).
+    Satu baris per lot: tulis berulang hanya memperbarui marked_at,
+    jadi banyak perubahan beruntun tetap jadi satu kali rescore.
+    """
+    lot = models.OneToOneField(
+        Lot,
+        on_delete=models.CASCADE,
+        related_name="dirty_mark",
+    )
+    marked_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.lot_id} @ {self.marked_at}"
+
+
+class LotRiskSnapshot(models.Model):
+    """
+    Riwayat skor risiko (append-only), satu baris per perubahan skor/level.
+    Dibuat ringkas karena jumlahnya bisa jutaan: level & faktor disimpan
+    sebagai angka kecil (lihat tracker/risk_history.py).
+    """
+    # index tunggal pada lot tidak perlu, sudah tercakup index (lot, taken_at)
+    lot = models.ForeignKey(
+        Lot,
+        on_delete=models.CASCADE,
+        related_name="risk_snapshots",
+        db_index=False,
+    )
+    taken_at = models.DateTimeField()
+    score = models.PositiveSmallIntegerField()
+    level = models.PositiveSmallIntegerField()  # risk_history.LEVEL_CODES
+    factors = models.PositiveIntegerField(default=0)  # bitmask risk_history.FACTOR_BITS
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["lot", "taken_at"], name="lotrisksnapshot_lot_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.lot_id} @ {self.taken_at}: {self.score}"
+
+
+class ScheduledJobState(models.Model):
+    """
+    Catatan kapan job terjadwal (cron) terakhir selesai, mis. rescore_aged_lots.
+    last_run_at dipakai job per jam (rescore_water_quality).
+    """
+    name = models.CharField(max_length=100, unique=True)
+    last_run_date = models.DateField()
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_run_date}"
+
+
 class LotMovement(models.Model):
     """
     Chain-of-custody: lot berpindah dari satu Node ke Node lain.
@@ -160,6 +287,76 @@ class PondLog(models.Model):
         return f"Log {self.farm.name} - {self.date}"
 
 
+# =========================
+# Telemetri Sensor Tambak
+# =========================
+
+class PondTelemetryChunk(models.Model):
+    """
+    Pembacaan sensor satu kolam selama satu hari (zona waktu proyek) dalam satu
+    blob: array float32 [metrik][menit] = 3 x 1440, NaN = tidak ada data.
+    Urutan metrik & slot dikelola tracker/telemetry.py.
+    """
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name="telemetry_chunks")
+    pond = models.CharField(max_length=50, blank=True, default="")
+    date = models.DateField()
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["farm", "pond", "date"], name="telemetry_chunk_unique"),
+        ]
+
+    def __str__(self):
+        return f"Telemetri {self.farm_id}/{self.pond or '-'} {self.date}"
+
+
+class PondTelemetryRollup(models.Model):
+    """
+    Ringkasan telemetri per jam / per hari (dihitung ulang dari chunk saat ingest).
+    *_out = jumlah menit di luar rentang aman risk engine pada saat ingest.
+    """
+    PERIOD_CHOICES = [
+        ("H", "Per jam"),
+        ("D", "Per hari"),
+    ]
+
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name="telemetry_rollups")
+    pond = models.CharField(max_length=50, blank=True, default="")
+    period = models.CharField(max_length=1, choices=PERIOD_CHOICES)
+    start = models.DateTimeField()
+
+    ph_count = models.IntegerField(default=0)
+    ph_min = models.FloatField(null=True, blank=True)
+    ph_max = models.FloatField(null=True, blank=True)
+    ph_mean = models.FloatField(null=True, blank=True)
+    ph_out = models.IntegerField(default=0)
+
+    temperature_c_count = models.IntegerField(default=0)
+    temperature_c_min = models.FloatField(null=True, blank=True)
+    temperature_c_max = models.FloatField(null=True, blank=True)
+    temperature_c_mean = models.FloatField(null=True, blank=True)
+
+    salinity_ppt_count = models.IntegerField(default=0)
+    salinity_ppt_min = models.FloatField(null=True, blank=True)
+    salinity_ppt_max = models.FloatField(null=True, blank=True)
+    salinity_ppt_mean = models.FloatField(null=True, blank=True)
+    salinity_ppt_out = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["farm", "pond", "period", "start"], name="telemetry_rollup_unique"),
+        ]
+        indexes = [
+            # jendela 24 jam per farm untuk faktor kualitas air
+            models.Index(fields=["farm", "period", "start"], name="telemetry_rollup_window_idx"),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.get_period_display()} {self.farm_id}/{self.pond or '-'} {self.start}"
+
+
 # =========================
 # Sampling & Hasil Uji Lab
 # =========================
@@ -173,6 +370,8 @@ class Sampling(models.Model):
     date = models.DateField()
     location = models.CharField(max_length=200, blank=True)
     requested_by = models.CharField(max_length=100, blank=True)
+    # kunci idempotensi dari sistem lab (mis. nomor sertifikat); lihat tracker/lab_ingest.py
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     status = models.CharField(
         max_length=20,
         choices=[
@@ -209,6 +408,8 @@ class LabTest(models.Model):
         choices=RESULT_CHOICES,
         default="PASS",
     )
+    # kunci idempotensi dari sistem lab; kiriman ulang memperbarui baris yang sama
+    external_id = models.CharField(max_length=150, unique=True, null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -216,6 +417,44 @@ class LabTest(models.Model):
         return f"{self.parameter} ({self.result}) for {self.sampling.lot.lot_id}"
 
 
+class LabStandard(models.Model):
+    """
+    Batas standar mutu & keamanan per parameter uji (key = LabTest.parameter).
+    Dikompilasi jadi tabel evaluator di tracker/lab_standards.py.
+    """
+    COMPARATOR_CHOICES = [
+        ("<=", "Maksimal (<=)"),
+        ("<", "Kurang dari (<)"),
+        ("==", "Harus sama (==)"),
+    ]
+
+    parameter = models.CharField(max_length=100, unique=True)
+    label = models.CharField(max_length=100, blank=True)
+    limit = models.FloatField()
+    comparator = models.CharField(max_length=2, choices=COMPARATOR_CHOICES, default="<=")
+    severity = models.IntegerField(default=30)  # tambahan skor kalau dilanggar
+    is_active = models.BooleanField(default=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["parameter"]
+
+    def __str__(self):
+        return f"{self.parameter} {self.comparator} {self.limit}"
+
+
+class LabStandardVersion(models.Model):
+    """
+    Counter versi tabel LabStandard (satu baris, pk=1).
+    Naik setiap ada standar yang berubah -> cache per proses ikut dibuang.
+    """
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"v{self.version}"
+
+
 # =========================
 # Dokumen & Sertifikasi
 # =========================
@@ -285,6 +524,12 @@ class Incident(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination incident_list (terbaru dulu)
+            models.Index(fields=["-date", "-id"], name="incident_date_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.get_incident_type_display()} - {self.lot.lot_id}"
 
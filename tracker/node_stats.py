@@ -0,0 +1,271 @@
+"""
+Pemeliharaan tabel NodeStats (ringkasan kontaminasi per node).
+
+Satu lot dihitung sekali per node, walaupun lewat node itu berkali-kali:
+- LotMovement pertama untuk pasangan (lot, node) menambahkan lot tersebut
+  (lot_count, problematic_count, insiden aktifnya) ke node; LotMovement
+  terakhir yang dihapus mengurangkannya lagi.
+- Perubahan status lot / insiden diterapkan sebagai delta ke semua node
+  yang pernah dilewati lot itu.
+- Node yang belum punya baris stats dibangun dari agregat saat pertama kali
+  dibaca (get_node_stats); rebuild_node_stats() menghitung semuanya dari nol.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.db.models import Count, F, Q
+
+from .models import Incident, LotMovement, Lot, Node, NodeStats
+
+PROBLEMATIC_STATUSES = Lot.PROBLEMATIC_STATUSES
+
+_STAT_FIELDS = ["lot_count", "problematic_count", "open_incident_count"]
+
+# potongan node_id / lot_id per query agar parameter IN tetap kecil
+_CHUNK_SIZE = 500
+
+
+def _is_problematic(status: Optional[str]) -> bool:
+    return status in PROBLEMATIC_STATUSES
+
+
+def _is_open(status: Optional[str]) -> bool:
+    return (status or "").lower() != "closed"
+
+
+def rebuild_node_stats(node_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Hitung ulang NodeStats dari agregat (semua node kalau node_ids=None).
+    Return: jumlah baris yang ditulis.
+    """
+    if node_ids is None:
+        node_ids = list(Node.objects.values_list("pk", flat=True))
+    else:
+        node_ids = list(set(node_ids))
+
+    written = 0
+    for start in range(0, len(node_ids), _CHUNK_SIZE):
+        chunk = node_ids[start:start + _CHUNK_SIZE]
+
+        counts = {
+            row["node_id"]: row
+            for row in LotMovement.objects.filter(node_id__in=chunk)
+            .values("node_id")
+            .annotate(
+                lots=Count("lot", distinct=True),
+                problematic=Count(
+                    "lot",
+                    filter=Q(lot__status__in=PROBLEMATIC_STATUSES),
+                    distinct=True,
+                ),
+                open_incidents=Count(
+                    "lot__incidents",
+                    filter=~Q(lot__incidents__status__iexact="closed"),
+                    distinct=True,
+                ),
+            )
+        }
+
+        rows = []
+        for node_id in Node.objects.filter(pk__in=chunk).values_list("pk", flat=True):
+            row = counts.get(node_id, {"lots": 0, "problematic": 0, "open_incidents": 0})
+            rows.append(
+                NodeStats(
+                    node_id=node_id,
+                    lot_count=row["lots"],
+                    problematic_count=row["problematic"],
+                    open_incident_count=row["open_incidents"],
+                )
+            )
+
+        NodeStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["node"],
+            update_fields=_STAT_FIELDS,
+        )
+        written += len(rows)
+    return written
+
+
+def get_node_stats(node_ids: Iterable[int]) -> Dict[int, NodeStats]:
+    """Ambil NodeStats untuk node-node ini (1 query); baris yang belum ada dibangun dulu."""
+    node_ids = {pk for pk in node_ids if pk}
+    if not node_ids:
+        return {}
+
+    stats = {s.node_id: s for s in NodeStats.objects.filter(node_id__in=node_ids)}
+    missing = node_ids - stats.keys()
+    if missing:
+        rebuild_node_stats(missing)
+        stats.update({s.node_id: s for s in NodeStats.objects.filter(node_id__in=missing)})
+    return stats
+
+
+def _apply_deltas(deltas: Dict[int, Dict[str, int]]):
+    # node tanpa baris stats dilewati: get_node_stats() membangunnya dari data
+    # terbaru (yang sudah termasuk perubahan ini) saat pertama kali dibaca
+    for node_id, fields in deltas.items():
+        fields = {field: n for field, n in fields.items() if n}
+        if node_id and fields:
+            NodeStats.objects.filter(node_id=node_id).update(
+                **{field: F(field) + n for field, n in fields.items()}
+            )
+
+
+def _lot_contribution(lot_id: int) -> Dict[str, int]:
+    """Kontribusi satu lot ke setiap node yang dilewatinya."""
+    status = Lot.objects.filter(pk=lot_id).values_list("status", flat=True).first()
+    open_incidents = (
+        Incident.objects.filter(lot_id=lot_id).exclude(status__iexact="closed").count()
+    )
+    return {
+        "lot_count": 1,
+        "problematic_count": int(_is_problematic(status)),
+        "open_incident_count": open_incidents,
+    }
+
+
+def _visited(lot_id: int, node_id: int, exclude_pk: Optional[int] = None) -> bool:
+    movements = LotMovement.objects.filter(lot_id=lot_id, node_id=node_id)
+    if exclude_pk is not None:
+        movements = movements.exclude(pk=exclude_pk)
+    return movements.exists()
+
+
+def _lot_node_ids(lot_ids: Iterable[int]) -> Dict[int, set]:
+    lot_ids = list(set(lot_ids))
+    nodes: Dict[int, set] = defaultdict(set)
+    for start in range(0, len(lot_ids), _CHUNK_SIZE):
+        pairs = (
+            LotMovement.objects.filter(lot_id__in=lot_ids[start:start + _CHUNK_SIZE])
+            .values_list("lot_id", "node_id")
+            .distinct()
+        )
+        for lot_id, node_id in pairs:
+            nodes[lot_id].add(node_id)
+    return nodes
+
+
+# === LotMovement ===
+
+def movement_saved(movement: LotMovement, old: Optional[Tuple[int, int]]):
+    """
+    old: (lot_id, node_id) sebelum save, None kalau movement baru.
+    """
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    new_pair = (movement.lot_id, movement.node_id)
+
+    if old is not None and old != new_pair and not _visited(*old):
+        for field, n in _lot_contribution(old[0]).items():
+            deltas[old[1]][field] -= n
+    if (old is None or old != new_pair) and not _visited(*new_pair, exclude_pk=movement.pk):
+        for field, n in _lot_contribution(movement.lot_id).items():
+            deltas[movement.node_id][field] += n
+
+    _apply_deltas(deltas)
+
+
+def movement_deleted(movement: LotMovement, seen: Optional[set] = None):
+    """
+    seen: pasangan (lot, node) yang sudah dikurangkan dalam operasi delete yang
+    sama. Delete bertingkat menghapus semua movement dulu baru mengirim
+    post_delete, jadi tanpa ini pasangan dengan >1 movement terhitung dobel.
+    """
+    pair = (movement.lot_id, movement.node_id)
+    if seen is not None:
+        if pair in seen:
+            return
+        seen.add(pair)
+    if _visited(*pair):
+        return
+    _apply_deltas({
+        movement.node_id: {field: -n for field, n in _lot_contribution(movement.lot_id).items()}
+    })
+
+
+def unvisited_pairs(pairs: Iterable[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+    """Pasangan (lot, node) yang belum punya movement; panggil sebelum bulk_create."""
+    pairs = set(pairs)
+    visited = _lot_node_ids(lot_id for lot_id, _node_id in pairs)
+    return {(lot_id, node_id) for lot_id, node_id in pairs if node_id not in visited.get(lot_id, ())}
+
+
+def movements_created(new_pairs: Iterable[Tuple[int, int]]):
+    """
+    Versi batch movement_saved untuk movement baru dari bulk_create (tanpa signal).
+    new_pairs: hasil unvisited_pairs() sebelum insert.
+    """
+    new_pairs = set(new_pairs)
+    lot_ids = list({lot_id for lot_id, _node_id in new_pairs})
+    if not lot_ids:
+        return
+
+    problematic, open_incidents = set(), defaultdict(int)
+    for start in range(0, len(lot_ids), _CHUNK_SIZE):
+        chunk = lot_ids[start:start + _CHUNK_SIZE]
+        problematic.update(
+            Lot.objects.filter(pk__in=chunk, status__in=PROBLEMATIC_STATUSES).values_list("pk", flat=True)
+        )
+        for row in (
+            Incident.objects.filter(lot_id__in=chunk)
+            .exclude(status__iexact="closed")
+            .values("lot_id")
+            .annotate(n=Count("pk"))
+        ):
+            open_incidents[row["lot_id"]] = row["n"]
+
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for lot_id, node_id in new_pairs:
+        deltas[node_id]["lot_count"] += 1
+        deltas[node_id]["problematic_count"] += int(lot_id in problematic)
+        deltas[node_id]["open_incident_count"] += open_incidents[lot_id]
+    _apply_deltas(deltas)
+
+
+# === Lot ===
+
+def lots_status_changed(changes: Iterable[Tuple[int, str, str]]):
+    """changes = [(lot_id, old_status, new_status), ...] (signal Lot & jalur bulk_update)."""
+    status_deltas = {
+        lot_id: _is_problematic(new_status) - _is_problematic(old_status)
+        for lot_id, old_status, new_status in changes
+    }
+    status_deltas = {lot_id: n for lot_id, n in status_deltas.items() if n}
+    if not status_deltas:
+        return
+
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for lot_id, node_ids in _lot_node_ids(status_deltas).items():
+        for node_id in node_ids:
+            deltas[node_id]["problematic_count"] += status_deltas[lot_id]
+    _apply_deltas(deltas)
+
+
+# === Incident ===
+
+def incident_saved(lot_id: int, status: str, old: Optional[Tuple[int, str]]):
+    """
+    old: (lot_id, status) sebelum save, None kalau insiden baru.
+    """
+    open_deltas: Dict[int, int] = defaultdict(int)
+    if old is not None:
+        open_deltas[old[0]] -= _is_open(old[1])
+    open_deltas[lot_id] += _is_open(status)
+    open_deltas = {pk: n for pk, n in open_deltas.items() if n}
+    if not open_deltas:
+        return
+
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for pk, node_ids in _lot_node_ids(open_deltas).items():
+        for node_id in node_ids:
+            deltas[node_id]["open_incident_count"] += open_deltas[pk]
+    _apply_deltas(deltas)
+
+
+def incident_deleted(lot_id: int, status: str):
+    if not _is_open(status):
+        return
+    node_ids = _lot_node_ids([lot_id]).get(lot_id, set())
+    _apply_deltas({node_id: {"open_incident_count": -1} for node_id in node_ids})
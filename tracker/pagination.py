@@ -0,0 +1,134 @@
+"""
+Keyset (cursor) pagination untuk daftar besar.
+
+Halaman diambil dengan WHERE (kolom urut) < / > nilai baris terakhir, bukan
+OFFSET, jadi biaya per halaman tetap sama di halaman 1 maupun 10.000 selama
+ada index yang cocok dengan urutan (mis. Lot: (-created_at, -id)).
+Kolom urut terakhir harus unik (biasanya "id") agar urutan stabil.
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+@dataclass
+class KeysetPage:
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def _serialize(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(obj, ordering: Sequence[str]) -> str:
+    values = [_serialize(getattr(obj, name.lstrip("-"))) for name in ordering]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str], model, ordering: Sequence[str]) -> Optional[list]:
+    """Nilai kolom urut dari cursor; None kalau cursor kosong / rusak (-> halaman pertama)."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [
+            model._meta.get_field(name.lstrip("-")).to_python(value)
+            for name, value in zip(ordering, values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _seek(ordering: Sequence[str], values: list, forward: bool) -> Q:
+    """
+    (a, b) setelah cursor untuk ORDER BY a DESC, b DESC:
+        a < va  OR  (a = va AND b < vb)
+    """
+    condition = Q()
+    for i, name in enumerate(ordering):
+        column = name.lstrip("-")
+        descending = name.startswith("-")
+        op = "lt" if descending == forward else "gt"
+        term = Q(**{f"{column}__{op}": values[i]})
+        for prev_name, prev_value in zip(ordering[:i], values[:i]):
+            term &= Q(**{prev_name.lstrip("-"): prev_value})
+        condition |= term
+    return condition
+
+
+def _reverse(ordering: Sequence[str]) -> List[str]:
+    return [name[1:] if name.startswith("-") else f"-{name}" for name in ordering]
+
+
+def keyset_paginate(
+    queryset: QuerySet,
+    ordering: Sequence[str] = ("-created_at", "-id"),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> KeysetPage:
+    """
+    Satu halaman dari queryset (1 query).
+    after: cursor halaman berikutnya; before: cursor halaman sebelumnya.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    model = queryset.model
+    after_values = decode_cursor(after, model, ordering)
+    before_values = None if after_values else decode_cursor(before, model, ordering)
+
+    if before_values is not None:
+        # mundur: ambil dengan urutan terbalik lalu balik lagi
+        rows = list(
+            queryset.filter(_seek(ordering, before_values, forward=False))
+            .order_by(*_reverse(ordering))[:page_size + 1]
+        )
+        has_more = len(rows) > page_size
+        items = list(reversed(rows[:page_size]))
+        return KeysetPage(
+            items=items,
+            next_cursor=encode_cursor(items[-1], ordering) if items else None,
+            prev_cursor=encode_cursor(items[0], ordering) if items and has_more else None,
+        )
+
+    if after_values is not None:
+        queryset = queryset.filter(_seek(ordering, after_values, forward=True))
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+    items = rows[:page_size]
+    return KeysetPage(
+        items=items,
+        next_cursor=encode_cursor(items[-1], ordering) if len(rows) > page_size else None,
+        # datang dari halaman lain -> selalu ada halaman sebelumnya
+        prev_cursor=encode_cursor(items[0], ordering) if items and after_values is not None else None,
+    )
+
+
+def page_size_from(request, default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        return max(1, min(int(request.GET.get("limit", default)), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,99 @@
+"""
+Halaman publik lot (hasil scan QR) yang di-cache.
+
+Trafik halaman ini datang bergelombang dan hanya membaca, jadi:
+- token -> pk lot disimpan di cache tanpa kedaluwarsa (token tidak pernah berubah);
+- halaman yang sudah dirender disimpan per lot selama PUBLIC_LOT_CACHE_SECONDS,
+  bersama ETag (hash isi) & Last-Modified (Lot.updated_at);
+- cache dibuang setelah transaksi yang mengubah lot / pergerakannya commit.
+Scan berulang dari klien yang sudah punya halaman dijawab 304 tanpa query DB
+maupun render template.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Lot, LotMovement
+
+TOKEN_KEY = "tracker:public_lot:token:{}"
+PAGE_KEY = "tracker:public_lot:page:{}"
+TEMPLATE = "tracker/public_lot.html"
+
+
+def _cache_seconds() -> int:
+    return getattr(settings, "PUBLIC_LOT_CACHE_SECONDS", 300)
+
+
+def _path_nodes(lot: Lot):
+    """Urutan node unik yang dilalui lot (kunjungan berturut-turut digabung)."""
+    path = []
+    movements = (
+        LotMovement.objects.filter(lot=lot)
+        .order_by("timestamp", "id")
+        .values_list("node_id", "node__name", "node__type", "timestamp")
+    )
+    for node_id, name, node_type, timestamp in movements:
+        if path and path[-1]["id"] == node_id:
+            continue
+        path.append({"id": node_id, "name": name, "type": node_type, "timestamp": timestamp})
+    return path
+
+
+def build_public_page(lot_pk: int) -> Optional[Dict[str, Any]]:
+    lot = Lot.objects.select_related("farm").filter(pk=lot_pk).first()
+    if lot is None:
+        return None
+
+    html = render_to_string(TEMPLATE, {"lot": lot, "path_nodes": _path_nodes(lot)})
+    return {
+        "html": html,
+        "etag": '"%s"' % hashlib.sha256(html.encode()).hexdigest()[:32],
+        "last_modified": lot.updated_at.timestamp(),
+    }
+
+
+def get_public_page(token: str) -> Optional[Dict[str, Any]]:
+    """{"html", "etag", "last_modified"} untuk token; None kalau lot tidak ada."""
+    token_key = TOKEN_KEY.format(token)
+    lot_pk = cache.get(token_key)
+    if lot_pk is None:
+        lot_pk = Lot.objects.filter(public_token=token).values_list("pk", flat=True).first()
+        if lot_pk is None:
+            return None
+        cache.set(token_key, lot_pk, None)
+
+    page_key = PAGE_KEY.format(lot_pk)
+    page = cache.get(page_key)
+    if page is None:
+        page = build_public_page(lot_pk)
+        if page is None:
+            # lot sudah dihapus
+            cache.delete(token_key)
+            return None
+        cache.set(page_key, page, _cache_seconds())
+    return page
+
+
+def invalidate_public_pages(lot_ids: Iterable[int]):
+    """Buang halaman publik lot-lot ini setelah transaksi commit."""
+    keys = [PAGE_KEY.format(pk) for pk in set(lot_ids) if pk is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def touch_lots(lot_ids: Iterable[int]):
+    """
+    Naikkan versi (updated_at) lot yang isi halaman publiknya berubah tanpa
+    lot.save(), mis. pergerakan lot ditambah / dihapus.
+    """
+    lot_ids = {pk for pk in lot_ids if pk is not None}
+    if not lot_ids:
+        return
+    Lot.objects.filter(pk__in=lot_ids).update(updated_at=timezone.now())
+    invalidate_public_pages(lot_ids)
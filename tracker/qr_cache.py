@@ -0,0 +1,147 @@
+"""
+Cache gambar QR code lot.
+
+QR untuk satu public URL tidak pernah berubah, jadi hasil render disimpan
+dengan kunci isi (sha256 dari format + ukuran + URL):
+  1. LRU di memori per proses (QR_CACHE_MEMORY_ITEMS entri)
+  2. file di QR_CACHE_DIR (dipakai bersama antar proses / setelah restart)
+Kunci yang sama dipakai sebagai ETag, jadi browser & CDN cukup revalidasi
+dengan If-None-Match tanpa render ulang.
+
+SVG dirender tanpa PIL (SvgPathImage) dan jauh lebih murah dari PNG.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+
+FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+DEFAULT_FORMAT = "png"
+
+# ukuran = box_size qrcode (pixel per modul untuk PNG)
+DEFAULT_SIZE = 10
+MIN_SIZE = 2
+MAX_SIZE = 20
+
+
+@dataclass(frozen=True)
+class QRImage:
+    content: bytes
+    content_type: str
+    etag: str
+
+
+def cache_key(public_url: str, size: int, fmt: str) -> str:
+    return hashlib.sha256(f"{fmt}:{size}:{public_url}".encode()).hexdigest()
+
+
+def normalize_size(value) -> int:
+    try:
+        return max(MIN_SIZE, min(int(value), MAX_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_SIZE
+
+
+def normalize_format(value: Optional[str]) -> str:
+    value = (value or "").lower()
+    return value if value in FORMATS else DEFAULT_FORMAT
+
+
+def render_qr(public_url: str, size: int = DEFAULT_SIZE, fmt: str = DEFAULT_FORMAT) -> bytes:
+    qr = qrcode.QRCode(box_size=size, border=4)
+    qr.add_data(public_url)
+    qr.make(fit=True)
+
+    buffer = io.BytesIO()
+    if fmt == "svg":
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qr.make_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class QRCache:
+    def __init__(self, max_items: int, directory: Optional[Path]):
+        self.max_items = max_items
+        self.directory = Path(directory) if directory else None
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, fmt: str) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        return self.directory / key[:2] / f"{key}.{fmt}"
+
+    def _remember(self, key: str, content: bytes):
+        with self._lock:
+            self._items[key] = content
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def _read_disk(self, path: Optional[Path]) -> Optional[bytes]:
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def _write_disk(self, path: Optional[Path], content: bytes):
+        """Tulis atomik (file sementara + rename) supaya proses lain tidak membaca file setengah jadi."""
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(content)
+            os.replace(tmp_name, path)
+        except OSError:
+            # disk penuh / read-only: tetap jalan dengan cache memori saja
+            pass
+
+    def get(self, public_url: str, size: int = DEFAULT_SIZE, fmt: str = DEFAULT_FORMAT) -> QRImage:
+        key = cache_key(public_url, size, fmt)
+        etag = f'"{key}"'
+
+        with self._lock:
+            content = self._items.get(key)
+            if content is not None:
+                self._items.move_to_end(key)
+        if content is None:
+            path = self._path(key, fmt)
+            content = self._read_disk(path)
+            if content is None:
+                content = render_qr(public_url, size, fmt)
+                self._write_disk(path, content)
+            self._remember(key, content)
+
+        return QRImage(content=content, content_type=FORMATS[fmt], etag=etag)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+qr_cache = QRCache(
+    max_items=getattr(settings, "QR_CACHE_MEMORY_ITEMS", 256),
+    directory=getattr(settings, "QR_CACHE_DIR", None),
+)
+
+
+def get_lot_qr(public_url: str, size: int = DEFAULT_SIZE, fmt: str = DEFAULT_FORMAT) -> QRImage:
+    return qr_cache.get(public_url, normalize_size(size), normalize_format(fmt))
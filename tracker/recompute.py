@@ -0,0 +1,241 @@
+"""
+Hitung ulang risiko secara incremental.
+
+Alur:
+  1. Tulis ke model input (PondLog, LabTest, Incident, ...) -> signal memanggil
+     mark_instance_dirty().
+  2. RISK_DEPENDENCIES memetakan objek itu ke lot-lot yang terdampak.
+  3. Lot yang ditandai selama satu transaksi dikumpulkan dalam satu set per
+     koneksi; satu on_commit menguras set itu sekali setelah commit, berapa
+     pun banyaknya baris input yang berubah.
+  4. Default (RISK_RECOMPUTE_MODE="deferred"): set itu masuk antrean DirtyLot
+     (upsert, satu baris per lot) -> request admin/API tetap cepat. Worker
+     `manage.py process_dirty_lots` mengambil lot yang sudah "tenang" (tidak
+     ditandai ulang selama RISK_RECOMPUTE_SETTLE_SECONDS) dan menghitung ulang
+     semuanya dalam satu batch.
+  5. Mode "immediate" (deployment tanpa worker): set itu dihitung ulang dalam
+     satu batch langsung setelah commit, masih di dalam request.
+
+Umur lot berubah tanpa ada tulisan ke DB, jadi ditangani terpisah oleh
+cron `manage.py rescore_aged_lots` (lihat aged_lot_ids()). Begitu juga jendela
+telemetri 24 jam yang bergeser tiap jam: cron `manage.py rescore_water_quality`
+(lihat water_window_lot_ids()).
+"""
+
+import weakref
+from datetime import date, datetime, timedelta
+from functools import reduce
+from operator import or_
+from typing import Callable, Dict, Iterable, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import telemetry
+from .models import (
+    DirtyLot,
+    Incident,
+    IncidentRelatedLot,
+    LabStandard,
+    LabTest,
+    Lot,
+    LotMovement,
+    PondLog,
+    PondTelemetryRollup,
+    Sampling,
+)
+from .risk_engine import BATCH_SIZE, LOT_AGE_BANDS, update_lots_risk, water_quality_flags
+
+
+# =========================
+# Peta dependensi input -> lot
+# =========================
+# Setiap entri mengembalikan queryset lot_id yang skornya bisa berubah
+# kalau objek tersebut dibuat / diubah / dihapus.
+
+RISK_DEPENDENCIES: Dict[type, Callable] = {
+    # kualitas air -> semua lot dari farm yang sama
+    PondLog: lambda obj: Lot.objects.filter(farm_id=obj.farm_id),
+    # hasil lab -> lot dari sampling-nya
+    LabTest: lambda obj: Lot.objects.filter(samplings__id=obj.sampling_id),
+    Sampling: lambda obj: Lot.objects.filter(pk=obj.lot_id),
+    # standar lab berubah -> semua lot yang punya uji parameter tersebut
+    LabStandard: lambda obj: Lot.objects.filter(samplings__tests__parameter=obj.parameter),
+    # insiden -> lot-nya, lot lain di farm yang sama (faktor "insiden di farm"),
+    # dan lot yang dikaitkan ke insiden ini
+    Incident: lambda obj: Lot.objects.filter(
+        Q(pk=obj.lot_id)
+        | Q(farm__lots__pk=obj.lot_id)
+        | Q(related_incidents__incident_id=obj.pk)
+    ),
+    IncidentRelatedLot: lambda obj: Lot.objects.filter(pk=obj.lot_id),
+    LotMovement: lambda obj: Lot.objects.filter(pk=obj.lot_id),
+}
+
+
+# koneksi -> (set lot_id yang menunggu commit, callback on_commit yang akan mengurasnya)
+_pending: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _recompute_mode() -> str:
+    return getattr(settings, "RISK_RECOMPUTE_MODE", "deferred")
+
+
+def affected_lot_ids(instance) -> set:
+    """Lot-lot yang terdampak perubahan instance (kosong kalau model tidak dipetakan)."""
+    resolver = RISK_DEPENDENCIES.get(type(instance))
+    if resolver is None:
+        return set()
+    return set(resolver(instance).values_list("pk", flat=True).distinct())
+
+
+def mark_instance_dirty(instance):
+    mark_lots_dirty(affected_lot_ids(instance))
+
+
+def mark_lots_dirty(lot_ids: Iterable[int]):
+    """
+    Tandai lot untuk di-score ulang setelah transaksi saat ini commit.
+    Semua tanda dalam satu transaksi digabung: satu antrean DirtyLot (mode
+    "deferred", default) atau satu batch hitung ulang (mode "immediate").
+    """
+    lot_ids = set(lot_ids)
+    if not lot_ids:
+        return
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        # autocommit: tidak ada transaksi untuk ditunggu
+        _flush(lot_ids)
+        return
+
+    entry = _pending.get(connection)
+    # callback yang dibuang karena rollback (transaksi / savepoint) -> mulai set baru
+    if entry is None or not any(item[1] is entry[1] for item in connection.run_on_commit):
+        entry = _register(connection)
+    entry[0].update(lot_ids)
+
+
+def _register(connection):
+    pending: set = set()
+
+    def drain():
+        _pending.pop(connection, None)
+        _flush(pending)
+
+    _pending[connection] = (pending, drain)
+    transaction.on_commit(drain)
+    return pending, drain
+
+
+def _flush(lot_ids: set):
+    if _recompute_mode() == "immediate":
+        recompute_lots(sorted(lot_ids))
+    else:
+        _enqueue(lot_ids)
+
+
+def _enqueue(lot_ids: set):
+    # lot bisa saja sudah terhapus (cascade) sebelum commit
+    lot_ids = list(lot_ids)
+    now = timezone.now()
+    for start in range(0, len(lot_ids), BATCH_SIZE):
+        existing = Lot.objects.filter(pk__in=lot_ids[start:start + BATCH_SIZE]).values_list(
+            "pk", flat=True
+        )
+        DirtyLot.objects.bulk_create(
+            [DirtyLot(lot_id=pk, marked_at=now) for pk in existing],
+            update_conflicts=True,
+            unique_fields=["lot"],
+            update_fields=["marked_at"],
+        )
+
+
+def aged_lot_ids(since: date, until: date) -> List[int]:
+    """
+    Lot yang umurnya melewati batas band LOT_AGE_BANDS setelah `since` s/d `until`.
+
+    Lot dengan umur <= max_days pindah band pada hari ke-(max_days + 1), yaitu
+    tanggal harvest_date + max_days + 1. Jadi per batas cukup satu rentang
+    harvest_date (pakai index), bukan scan semua lot.
+    """
+    if until <= since:
+        return []
+
+    ranges = []
+    for max_days, _delta, _message in LOT_AGE_BANDS:
+        if max_days is None:
+            continue
+        shift = timedelta(days=max_days + 1)
+        ranges.append(Q(harvest_date__gt=since - shift, harvest_date__lte=until - shift))
+
+    return list(Lot.objects.filter(reduce(or_, ranges)).order_by("pk").values_list("pk", flat=True))
+
+
+def water_window_lot_ids(since: datetime, until: datetime) -> List[int]:
+    """
+    Lot di farm yang flag kualitas air telemetrinya (risk_engine.water_quality_flags)
+    berbeda antara jendela 24 jam pada `since` dan pada `until`, mis. pembacaan
+    buruk yang sudah keluar dari jendela atau sensor yang berhenti mengirim.
+    Hanya farm yang punya rollup di salah satu jendela yang diperiksa.
+    """
+    if until <= since:
+        return []
+
+    start, _ = telemetry.window_bounds(since)
+    _, end = telemetry.window_bounds(until)
+    farm_ids = list(
+        PondTelemetryRollup.objects.filter(period="H", start__gte=start, start__lt=end)
+        .values_list("farm_id", flat=True)
+        .distinct()
+    )
+    before = telemetry.water_quality_summary(farm_ids, now=since)
+    after = telemetry.water_quality_summary(farm_ids, now=until)
+    changed = [
+        fid for fid in farm_ids
+        if water_quality_flags(before.get(fid)) != water_quality_flags(after.get(fid))
+    ]
+    if not changed:
+        return []
+    return list(Lot.objects.filter(farm_id__in=changed).order_by("pk").values_list("pk", flat=True))
+
+
+def recompute_lots(lot_ids: Iterable[int]) -> int:
+    """Hitung ulang risiko lot-lot ini dalam batch. Return jumlah lot yang berubah."""
+    lot_ids = list(lot_ids)
+    changed = 0
+    for start in range(0, len(lot_ids), BATCH_SIZE):
+        chunk = lot_ids[start:start + BATCH_SIZE]
+        changed += len(update_lots_risk(Lot.objects.filter(pk__in=chunk)))
+    return changed
+
+
+def process_dirty_lots(settle_seconds: int = None, limit: int = None):
+    """
+    Ambil lot dari antrean yang tidak ditandai ulang selama settle_seconds (debounce),
+    hitung ulang sekaligus, lalu hapus dari antrean.
+    Return: (jumlah lot diproses, jumlah lot yang berubah).
+    """
+    if settle_seconds is None:
+        settle_seconds = getattr(settings, "RISK_RECOMPUTE_SETTLE_SECONDS", 5)
+
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    ready = DirtyLot.objects.filter(marked_at__lte=cutoff).order_by("marked_at")
+    if limit:
+        ready = ready[:limit]
+    lot_ids = list(ready.values_list("lot_id", flat=True))
+    if not lot_ids:
+        return 0, 0
+
+    changed = recompute_lots(lot_ids)
+
+    # lot yang ditandai ulang selama proses tetap di antrean untuk putaran berikutnya
+    for start in range(0, len(lot_ids), BATCH_SIZE):
+        DirtyLot.objects.filter(
+            lot_id__in=lot_ids[start:start + BATCH_SIZE],
+            marked_at__lte=cutoff,
+        ).delete()
+
+    return len(lot_ids), changed
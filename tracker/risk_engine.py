@@ -1,355 +1,519 @@
 from datetime import timedelta
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from django.db.models import Q, Count
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
-from .models import LabTest, PondLog, Incident, Lot, LotMovement, Node
-
-# Standar mutu dan keamanan udang beku (ringkas dari tabel persyaratan)
-# Keys mengikuti nama parameter di LabTest.parameter
-STANDARD_LIMITS = {
-    # Cemaran mikroba
-    "ALT": {"limit": 1_000_000, "cmp": "<=", "severity": 25, "label": "Angka Lempeng Total"},
-    "E.coli": {"limit": 1, "cmp": "<=", "severity": 40, "label": "E. coli"},
-    "Salmonella": {"limit": 0, "cmp": "==", "severity": 60, "label": "Salmonella"},
-    "Vibrio parahaemolyticus": {"limit": 10, "cmp": "<=", "severity": 40, "label": "Vibrio parahaemolyticus"},
-    # Cemaran logam
-    "Merkuri (Hg)": {"limit": 0.5, "cmp": "<=", "severity": 30},
-    "Timbal (Pb)": {"limit": 0.2, "cmp": "<=", "severity": 30},
-    "Kadmium (Cd)": {"limit": 0.1, "cmp": "<=", "severity": 30},
-    # Residu antibiotik
-    "Kloramfenikol": {"limit": 0, "cmp": "==", "severity": 60},
-    "Metabolit Nitrofurans": {"limit": 0, "cmp": "==", "severity": 60},
-    "Tetrasiklin": {"limit": 100, "cmp": "<=", "severity": 30},
-}
+from . import node_stats, telemetry
+from .dashboard import invalidate_dashboard
+from .farm_stats import get_farm_stats, lots_status_changed
+from .lab_standards import get_lab_standards
+from .public_page import invalidate_public_pages
+from .risk_history import factor_bitmask, record_risk_snapshots
+from .models import LabTest, Incident, Lot, LotMovement, Node
 
+PROBLEMATIC_STATUSES = Lot.PROBLEMATIC_STATUSES
+
+# jumlah lot per potongan untuk scoring batch (menjaga parameter IN tetap kecil)
+BATCH_SIZE = 500
 
 def evaluate_lab_test(test: LabTest):
     """
-    Cek satu hasil lab terhadap batas standar.
+    Cek satu hasil lab terhadap batas standar (tabel LabStandard terkompilasi).
     Return: (violated: bool, delta_score: int, message: str)
     """
-    spec = STANDARD_LIMITS.get(test.parameter)
-    if not spec:
-        return False, 0, None
-
-    value = test.value
-    limit = spec["limit"]
-    cmp_op = spec["cmp"]
-    severity = spec["severity"]
-    label = spec.get("label", test.parameter)
-
-    # treat missing value as violation for safety when comparator expects a value
-    if value is None:
-        violated = True
-    elif cmp_op == "<=":
-        violated = value > limit
-    elif cmp_op == "<":
-        violated = value >= limit
-    elif cmp_op == "==":
-        violated = value != limit
-    else:
-        violated = False
-
-    unit = f" {test.unit}" if getattr(test, "unit", None) else ""
-    if violated:
-        message = f"{label} melebihi batas ({value}{unit}, limit {limit}) (+{severity})"
-    else:
-        message = f"{label} sesuai batas ({value}{unit}) (+0)"
-
-    return violated, severity if violated else 0, message
+    return get_lab_standards().evaluate(test)
+
+
+# =========================
+# Ambang & bobot faktor risiko
+# =========================
+# Dipakai pipeline per-lot (RISK_FACTORS) dan rescoring vektor
+# (tracker/risk_vector.py), jadi ubah ambang cukup di sini.
+
+# (score minimal, risk_level, status), dicek berurutan; sisanya LOW / OK
+RISK_BANDS = [
+    (70, "HIGH", "INVESTIGATE"),
+    (40, "MEDIUM", "HOLD"),
+]
+DEFAULT_BAND = ("LOW", "OK")
+
+# (rasio lot bermasalah minimal, delta, pesan)
+FARM_REPUTATION_BANDS = [
+    (0.5, 30, "Farm punya {problematic}/{total} lot bermasalah"),
+    (0.2, 20, "Farm punya beberapa riwayat lot bermasalah"),
+    (0.1, 10, "Farm pernah punya lot bermasalah"),
+]
+
+# (umur maksimal dalam hari, delta, pesan); None = lebih lama dari band sebelumnya
+LOT_AGE_BANDS = [
+    (2, 5, "Umur lot sangat fresh ({days} hari)"),
+    (5, 10, "Umur lot {days} hari"),
+    (10, 20, "Umur lot {days} hari, mulai berisiko"),
+    (None, 30, "Umur lot {days} hari, cukup lama"),
+]
+NO_HARVEST_DATE_DELTA = 10
+
+# (volume harus > nilai ini, delta, pesan); None = semua volume yang terisi
+VOLUME_BANDS = [
+    (5000, 15, "Volume sangat besar ({volume} kg)"),
+    (1000, 10, "Volume cukup besar ({volume} kg)"),
+    (None, 5, "Volume kecil-sedang ({volume} kg)"),
+]
+
+NO_LAB_TEST_DELTA = 20
+UNMAPPED_FAIL_DELTA = 20  # per parameter tanpa standar yang FAIL
+CRITICAL_SEVERITY = 60  # severity >= ini = pelanggaran kritis
+CRITICAL_MIN_SCORE = 90
+
+OPEN_INCIDENT_DELTA = 30
+FARM_INCIDENT_DELTA = 10
+
+PH_SAFE_RANGE = (7, 8.5)
+SALINITY_SAFE_RANGE = (10, 30)
+WATER_QUALITY_DELTA = 10
+# porsi menit di luar rentang aman (telemetri 24 jam) yang sudah dianggap buruk
+WATER_QUALITY_OUT_SHARE = 0.1
+
+
+def _risk_band(score: int):
+    """Mapping score -> (risk_level, status)."""
+    for min_score, risk_level, status in RISK_BANDS:
+        if score >= min_score:
+            return risk_level, status
+    return DEFAULT_BAND
+
+
+def _farm_inputs(stats, water=None) -> Dict[str, Any]:
+    """
+    Input faktor level farm dari baris FarmStats (reputasi, insiden, PondLog terakhir)
+    dan ringkasan telemetri 24 jam (telemetry.water_quality_summary, None kalau tidak ada).
+    """
+    if stats is None:
+        return {
+            "farm_total": 0, "farm_problematic": 0, "farm_has_incident": False,
+            "last_log": None, "water": water,
+        }
+    return {
+        "farm_total": stats.lot_count,
+        "farm_problematic": stats.problematic_lot_count,
+        "farm_has_incident": stats.incident_count > 0,
+        "last_log": (
+            (stats.last_ph, stats.last_salinity_ppt)
+            if stats.last_pond_date is not None
+            else None
+        ),
+        "water": water,
+    }
 
 
-def calculate_lot_risk(lot: Lot):
+def _collect_lot_inputs(lot: Lot) -> Dict[str, Any]:
     """
-    Hitung risk_score (0-100), risk_level (LOW/MEDIUM/HIGH),
-    dan status (OK/HOLD/INVESTIGATE) secara otomatis.
-    Faktor yang dipakai:
-      - Reputasi farm (riwayat lot bermasalah & insiden)
-      - Umur lot (sejak tanggal panen)
-      - Volume lot (dampak kalau bermasalah)
-      - Hasil lab terhadap batas standar
-      - Insiden aktif
-      - Kualitas air tambak (pH & salinitas terakhir)
+    Ambil semua input faktor risiko untuk SATU lot (query per lot).
+    Dipakai oleh calculate_lot_risk, termasuk untuk lot yang belum disimpan.
     """
+    stats = get_farm_stats([lot.farm_id]).get(lot.farm_id) if lot.farm_id else None
+    water = telemetry.water_quality_summary([lot.farm_id]).get(lot.farm_id) if lot.farm_id else None
+    inputs: Dict[str, Any] = {
+        **_farm_inputs(stats, water),
+        "standards": get_lab_standards(),
+        "lab_tests": [],
+        "has_open_incident": False,
+    }
 
-    score = 0
-    critical_violation = False
-
-    # === 0. Reputasi farm (riwayat lot bermasalah) ===
-    if lot.farm:
-        qs_farm_lots = Lot.objects.filter(farm=lot.farm)
-        total_farm_lots = qs_farm_lots.count()
-        problematic_lots = qs_farm_lots.filter(status__in=["HOLD", "INVESTIGATE"]).count()
-
-        if total_farm_lots > 0:
-            ratio = problematic_lots / total_farm_lots
-            if ratio >= 0.5:
-                score += 30
-            elif ratio >= 0.2:
-                score += 20
-            elif ratio >= 0.1:
-                score += 10
-
-    # === 1. Umur lot (sejak harvest_date) ===
-    if lot.harvest_date:
-        today = timezone.now().date()
-        days = (today - lot.harvest_date).days
-
-        if days <= 2:
-            score += 5  # masih sangat fresh
-        elif days <= 5:
-            score += 10
-        elif days <= 10:
-            score += 20
-        else:
-            score += 30  # sudah cukup lama -> risiko kualitas naik
-    else:
-        # tidak ada tanggal panen -> tambahkan sedikit risiko ketidakpastian
-        score += 10
-
-    # === 2. Volume lot (kg) ===
-    if getattr(lot, "volume_kg", None):
-        if lot.volume_kg > 5000:
-            score += 15  # volume besar, dampak ekonominya besar
-        elif lot.volume_kg > 1000:
-            score += 10
-        else:
-            score += 5
-
-    # === 3. Hasil lab ===
-    labtests = LabTest.objects.filter(sampling__lot=lot)
-
-    if not labtests.exists():
-        score += 20  # belum ada hasil lab -> agak berisiko
-    else:
-        # evaluasi berdasarkan batas standar
-        for test in labtests:
-            violated, delta, _ = evaluate_lab_test(test)
-            if violated:
-                score += delta
-                if delta >= 60:  # pelanggaran kritis (mikroba berbahaya / antibiotik terlarang)
-                    critical_violation = True
-
-        # fallback: uji yang belum dipetakan tetap lihat kolom result
-        unmapped_fail = (
-            labtests.exclude(parameter__in=STANDARD_LIMITS.keys())
-            .filter(result__iexact="FAIL")
-            .count()
+    if lot.pk:
+        inputs["lab_tests"] = list(LabTest.objects.filter(sampling__lot=lot))
+        inputs["has_open_incident"] = (
+            Incident.objects.filter(lot=lot).exclude(status__iexact="closed").exists()
         )
-        score += unmapped_fail * 20
 
-    # === 4. Insiden keamanan pangan ===
-    if Incident.objects.filter(lot=lot).exclude(status__iexact="closed").exists():
-        score += 30
+    return inputs
+
+
+def _collect_lots_inputs(lots: List[Lot], standards) -> Dict[int, Dict[str, Any]]:
+    """
+    Versi batch dari _collect_lot_inputs: semua faktor untuk banyak lot
+    diambil dengan jumlah query yang tetap (tidak tergantung jumlah lot).
+    """
+    lot_ids = [lot.pk for lot in lots]
+
+    # reputasi farm, insiden farm & PondLog terakhir dari FarmStats (1 query)
+    farm_stats = get_farm_stats(lot.farm_id for lot in lots)
+    # porsi waktu di luar rentang aman 24 jam dari rollup telemetri (1 query)
+    water = telemetry.water_quality_summary(lot.farm_id for lot in lots)
+
+    # semua hasil lab untuk lot-lot ini (1 query)
+    lab_tests: Dict[int, List[LabTest]] = {}
+    for test in LabTest.objects.filter(sampling__lot_id__in=lot_ids).annotate(
+        lot_pk=F("sampling__lot_id")
+    ):
+        lab_tests.setdefault(test.lot_pk, []).append(test)
+
+    # insiden aktif per lot (1 query)
+    open_incident_lots = set(
+        Incident.objects.filter(lot_id__in=lot_ids)
+        .exclude(status__iexact="closed")
+        .values_list("lot_id", flat=True)
+    )
+
+    result = {}
+    for lot in lots:
+        result[lot.pk] = {
+            **_farm_inputs(farm_stats.get(lot.farm_id), water.get(lot.farm_id)),
+            "standards": standards,
+            "lab_tests": lab_tests.get(lot.pk, []),
+            "has_open_incident": lot.pk in open_incident_lots,
+        }
+    return result
+
+
+# =========================
+# Registry faktor risiko
+# =========================
+# Setiap faktor menerima (lot, inputs) dan mengembalikan daftar entri
+# {"factor", "delta", "message"} -- skor & alasan dihitung sekali di sini.
+
+RISK_FACTORS: List[Tuple[str, Callable]] = []
+
+
+def risk_factor(key: str):
+    """Decorator untuk mendaftarkan faktor ke pipeline risiko (urutan = urutan daftar)."""
+
+    def register(func):
+        RISK_FACTORS.append((key, func))
+        return func
+
+    return register
 
-    if lot.farm and Incident.objects.filter(lot__farm=lot.farm).exists():
-        score += 10
 
-    # === 5. Kualitas air terakhir di tambak ===
-    if lot.farm:
-        last_log = (
-            PondLog.objects.filter(farm=lot.farm)
-            .order_by("-date")
-            .first()
+def _entry(factor: str, delta: int, message: str, critical: bool = False) -> Dict[str, Any]:
+    entry = {"factor": factor, "delta": delta, "message": message}
+    if critical:
+        entry["critical"] = True
+    return entry
+
+
+# === 0. Reputasi farm (riwayat lot bermasalah) ===
+@risk_factor("farm_reputation")
+def _factor_farm_reputation(lot: Lot, inputs: Dict[str, Any]):
+    total = inputs["farm_total"]
+    problematic = inputs["farm_problematic"]
+    if not lot.farm_id or total <= 0:
+        return []
+
+    ratio = problematic / total
+    for min_ratio, delta, message in FARM_REPUTATION_BANDS:
+        if ratio >= min_ratio:
+            message = message.format(problematic=problematic, total=total)
+            return [_entry("farm_reputation", delta, f"{message} (+{delta})")]
+    return []
+
+
+# === 1. Umur lot (sejak harvest_date) ===
+@risk_factor("lot_age")
+def _factor_lot_age(lot: Lot, inputs: Dict[str, Any]):
+    if not lot.harvest_date:
+        # tidak ada tanggal panen -> tambahkan sedikit risiko ketidakpastian
+        delta = NO_HARVEST_DATE_DELTA
+        return [_entry("lot_age", delta, f"Tanggal panen tidak tercatat (+{delta})")]
+
+    # makin lama sejak panen -> risiko kualitas naik
+    days = (timezone.now().date() - lot.harvest_date).days
+    for max_days, delta, message in LOT_AGE_BANDS:
+        if max_days is None or days <= max_days:
+            return [_entry("lot_age", delta, f"{message.format(days=days)} (+{delta})")]
+    return []
+
+
+# === 2. Volume lot (kg) ===
+@risk_factor("volume")
+def _factor_volume(lot: Lot, inputs: Dict[str, Any]):
+    volume = getattr(lot, "volume_kg", None)
+    if not volume:
+        return []
+    # volume besar, dampak ekonominya besar
+    for min_volume, delta, message in VOLUME_BANDS:
+        if min_volume is None or volume > min_volume:
+            return [_entry("volume", delta, f"{message.format(volume=volume)} (+{delta})")]
+    return []
+
+
+# === 3. Hasil lab ===
+@risk_factor("lab")
+def _factor_lab(lot: Lot, inputs: Dict[str, Any]):
+    labtests = inputs["lab_tests"]
+    if not labtests:
+        # belum ada hasil lab -> agak berisiko
+        delta = NO_LAB_TEST_DELTA
+        return [_entry("lab", delta, f"Belum ada hasil lab untuk lot ini (+{delta})")]
+
+    standards = inputs["standards"]
+    entries = []
+    unmapped_fail = 0
+    for test in labtests:
+        violated, delta, message = standards.evaluate(test)
+        entries.append(
+            _entry(
+                "lab",
+                delta,
+                message or f"Hasil {test.parameter}: {test.result or '-'}",
+                # pelanggaran kritis (mikroba berbahaya / antibiotik terlarang)
+                critical=violated and delta >= CRITICAL_SEVERITY,
+            )
         )
-        if last_log:
-            if last_log.ph is not None and (last_log.ph < 7 or last_log.ph > 8.5):
-                score += 10
-            if (
-                last_log.salinity_ppt is not None
-                and (last_log.salinity_ppt < 10 or last_log.salinity_ppt > 30)
-            ):
-                score += 10
-
-    # clamp 0-100
-    if critical_violation:
-        score = max(score, 90)
+        # fallback: uji yang belum dipetakan tetap lihat kolom result
+        if test.parameter not in standards.keys and (test.result or "").upper() == "FAIL":
+            unmapped_fail += 1
 
-    score = max(0, min(score, 100))
+    if unmapped_fail:
+        delta = unmapped_fail * UNMAPPED_FAIL_DELTA
+        entries.append(
+            _entry("lab", delta, f"{unmapped_fail} parameter uji (tanpa standar) dinyatakan FAIL (+{delta})")
+        )
+    return entries
 
-    if score >= 70:
-        risk_level = "HIGH"
-        status = "INVESTIGATE"
-    elif score >= 40:
-        risk_level = "MEDIUM"
-        status = "HOLD"
-    else:
-        risk_level = "LOW"
-        status = "OK"
 
-    return score, risk_level, status
+# === 4. Insiden keamanan pangan ===
+@risk_factor("incident")
+def _factor_incident(lot: Lot, inputs: Dict[str, Any]):
+    entries = []
+    if inputs["has_open_incident"]:
+        delta = OPEN_INCIDENT_DELTA
+        entries.append(_entry("incident", delta, f"Ada insiden aktif yang terkait langsung dengan lot (+{delta})"))
+    if lot.farm_id and inputs["farm_has_incident"]:
+        delta = FARM_INCIDENT_DELTA
+        entries.append(_entry("incident", delta, f"Ada insiden lain di farm yang sama (+{delta})"))
+    return entries
 
 
-def explain_lot_risk(lot: Lot):
+# === 5. Kualitas air tambak ===
+def water_quality_flags(water: Optional[Dict[str, Any]]) -> Tuple[Optional[bool], Optional[bool]]:
     """
-    Versi explainable dari calculate_lot_risk:
-    mengembalikan score, level, status, dan daftar alasan.
+    (pH buruk, salinitas buruk) dari ringkasan telemetri 24 jam; None untuk metrik
+    tanpa sampel (faktor lalu memakai PondLog terakhir).
     """
+    flags = []
+    for metric in telemetry.RANGED_METRICS:
+        share = water.get(f"{metric}_share") if water else None
+        flags.append(None if share is None else share > WATER_QUALITY_OUT_SHARE)
+    return tuple(flags)
 
-    reasons = []
-    score = 0
-    critical_violation = False
-
-    # === 0. Reputasi farm ===
-    if lot.farm:
-        qs_farm_lots = Lot.objects.filter(farm=lot.farm)
-        total_farm_lots = qs_farm_lots.count()
-        problematic_lots = qs_farm_lots.filter(status__in=["HOLD", "INVESTIGATE"]).count()
-
-        if total_farm_lots > 0:
-            ratio = problematic_lots / total_farm_lots
-            if ratio >= 0.5:
-                delta = 30
-                reasons.append(f"Farm punya {problematic_lots}/{total_farm_lots} lot bermasalah (+{delta})")
-                score += delta
-            elif ratio >= 0.2:
-                delta = 20
-                reasons.append(f"Farm punya beberapa riwayat lot bermasalah (+{delta})")
-                score += delta
-            elif ratio >= 0.1:
-                delta = 10
-                reasons.append(f"Farm pernah punya lot bermasalah (+{delta})")
-                score += delta
-
-    # === 1. Umur lot ===
-    if lot.harvest_date:
-        today = timezone.now().date()
-        days = (today - lot.harvest_date).days
-
-        if days <= 2:
-            delta = 5
-            reasons.append(f"Umur lot sangat fresh ({days} hari) (+{delta})")
-            score += delta
-        elif days <= 5:
-            delta = 10
-            reasons.append(f"Umur lot {days} hari (+{delta})")
-            score += delta
-        elif days <= 10:
-            delta = 20
-            reasons.append(f"Umur lot {days} hari, mulai berisiko (+{delta})")
-            score += delta
-        else:
-            delta = 30
-            reasons.append(f"Umur lot {days} hari, cukup lama (+{delta})")
-            score += delta
-    else:
-        delta = 10
-        reasons.append(f"Tanggal panen tidak tercatat (+{delta})")
-        score += delta
-
-    # === 2. Volume ===
-    if getattr(lot, "volume_kg", None):
-        if lot.volume_kg > 5000:
-            delta = 15
-            reasons.append(f"Volume sangat besar ({lot.volume_kg} kg) (+{delta})")
-            score += delta
-        elif lot.volume_kg > 1000:
-            delta = 10
-            reasons.append(f"Volume cukup besar ({lot.volume_kg} kg) (+{delta})")
-            score += delta
-        else:
-            delta = 5
-            reasons.append(f"Volume kecil-sedang ({lot.volume_kg} kg) (+{delta})")
-            score += delta
-
-    # === 3. Hasil lab ===
-    labtests = LabTest.objects.filter(sampling__lot=lot)
-    if not labtests.exists():
-        delta = 20
-        reasons.append(f"Belum ada hasil lab untuk lot ini (+{delta})")
-        score += delta
-    else:
-        for test in labtests:
-            violated, delta, message = evaluate_lab_test(test)
-            reasons.append(message or f"Hasil {test.parameter}: {test.result or '-'}")
-            if violated:
-                score += delta
-                if delta >= 60:
-                    critical_violation = True
-
-        unmapped_fail = (
-            labtests.exclude(parameter__in=STANDARD_LIMITS.keys())
-            .filter(result__iexact="FAIL")
-            .count()
+
+@risk_factor("water_quality")
+def _factor_water_quality(lot: Lot, inputs: Dict[str, Any]):
+    if not lot.farm_id:
+        return []
+
+    water = inputs.get("water")
+    ph_bad, salinity_bad = water_quality_flags(water)
+    ph, salinity = inputs["last_log"] or (None, None)
+    delta = WATER_QUALITY_DELTA
+    entries = []
+    if ph_bad is not None:
+        if ph_bad:
+            share = round(water["ph_share"] * 100)
+            entries.append(_entry(
+                "water_quality", delta, f"pH air di luar rentang aman {share}% waktu dalam 24 jam terakhir (+{delta})"
+            ))
+    elif ph is not None and not (PH_SAFE_RANGE[0] <= ph <= PH_SAFE_RANGE[1]):
+        entries.append(_entry("water_quality", delta, f"pH air terakhir di luar rentang aman ({ph}) (+{delta})"))
+    if salinity_bad is not None:
+        if salinity_bad:
+            share = round(water["salinity_ppt_share"] * 100)
+            entries.append(_entry(
+                "water_quality", delta,
+                f"Salinitas air di luar rentang aman {share}% waktu dalam 24 jam terakhir (+{delta})",
+            ))
+    elif salinity is not None and not (SALINITY_SAFE_RANGE[0] <= salinity <= SALINITY_SAFE_RANGE[1]):
+        entries.append(
+            _entry("water_quality", delta, f"Salinitas air terakhir di luar rentang aman ({salinity} ppt) (+{delta})")
         )
-        if unmapped_fail:
-            delta = unmapped_fail * 20
-            reasons.append(f"{unmapped_fail} parameter uji (tanpa standar) dinyatakan FAIL (+{delta})")
-            score += delta
-
-    # === 4. Insiden ===
-    if Incident.objects.filter(lot=lot).exclude(status__iexact="closed").exists():
-        delta = 30
-        reasons.append(f"Ada insiden aktif yang terkait langsung dengan lot (+{delta})")
-        score += delta
-
-    if lot.farm and Incident.objects.filter(lot__farm=lot.farm).exists():
-        delta = 10
-        reasons.append(f"Ada insiden lain di farm yang sama (+{delta})")
-        score += delta
-
-    # === 5. Kualitas air ===
-    if lot.farm:
-        last_log = (
-            PondLog.objects.filter(farm=lot.farm)
-            .order_by("-date")
-            .first()
+    return entries
+
+
+def _run_risk_factors(lot: Lot, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Jalankan semua faktor terdaftar sekali, lalu clamp skor & mapping level/status.
+    Tidak menjalankan query apa pun.
+    """
+    factors: List[Dict[str, Any]] = []
+    for _key, func in RISK_FACTORS:
+        factors.extend(func(lot, inputs))
+
+    score = sum(item["delta"] for item in factors)
+
+    if any(item.get("critical") for item in factors):
+        factors.append(
+            _entry("critical", 0, "Pelanggaran kritis terhadap standar (mikroba/antibiotik), otomatis INVESTIGATE")
         )
-        if last_log:
-            if last_log.ph is not None and (last_log.ph < 7 or last_log.ph > 8.5):
-                delta = 10
-                reasons.append(f"pH air terakhir di luar rentang aman ({last_log.ph}) (+{delta})")
-                score += delta
-            if (
-                last_log.salinity_ppt is not None
-                and (last_log.salinity_ppt < 10 or last_log.salinity_ppt > 30)
-            ):
-                delta = 10
-                reasons.append(f"Salinitas air terakhir di luar rentang aman ({last_log.salinity_ppt} ppt) (+{delta})")
-                score += delta
-
-    # clamp + mapping level & status (sama seperti calculate_lot_risk)
-    if critical_violation:
-        reasons.append("Pelanggaran kritis terhadap standar (mikroba/antibiotik), otomatis INVESTIGATE")
-        score = max(score, 90)
+        score = max(score, CRITICAL_MIN_SCORE)
 
     score = max(0, min(score, 100))
-
-    if score >= 70:
-        risk_level = "HIGH"
-        status = "INVESTIGATE"
-    elif score >= 40:
-        risk_level = "MEDIUM"
-        status = "HOLD"
-    else:
-        risk_level = "LOW"
-        status = "OK"
+    risk_level, status = _risk_band(score)
 
     return {
         "score": score,
         "risk_level": risk_level,
         "status": status,
-        "reasons": reasons,
+        "reasons": [item["message"] for item in factors],
+        "factors": factors,
+    }
+
+
+def calculate_lot_risk(lot: Lot):
+    """
+    Hitung risk_score (0-100), risk_level (LOW/MEDIUM/HIGH),
+    dan status (OK/HOLD/INVESTIGATE) secara otomatis.
+    Faktor yang dipakai (lihat RISK_FACTORS):
+      - Reputasi farm (riwayat lot bermasalah & insiden)
+      - Umur lot (sejak tanggal panen)
+      - Volume lot (dampak kalau bermasalah)
+      - Hasil lab terhadap batas standar
+      - Insiden aktif
+      - Kualitas air tambak (pH & salinitas terakhir)
+    """
+    info = explain_lot_risk(lot)
+    return info["score"], info["risk_level"], info["status"]
+
+
+def explain_lot_risk(lot: Lot):
+    """
+    Versi explainable dari calculate_lot_risk:
+    mengembalikan score, level, status, daftar alasan (reasons)
+    dan breakdown terstruktur per faktor (factors).
+    """
+    return _run_risk_factors(lot, _collect_lot_inputs(lot))
+
+
+def explain_lots_risk(lots) -> Dict[int, Dict[str, Any]]:
+    """
+    Versi batch dari explain_lot_risk untuk queryset / list lot.
+    Semua faktor diambil per potongan BATCH_SIZE lot dengan jumlah query
+    agregat yang tetap, lalu dihitung di Python.
+    Return: {lot.pk: explanation}
+    """
+    lots = list(lots)
+    # versi standar lab selalu dicek di awal batch (1 query)
+    standards = get_lab_standards(max_age=0)
+    results: Dict[int, Dict[str, Any]] = {}
+    for start in range(0, len(lots), BATCH_SIZE):
+        chunk = lots[start:start + BATCH_SIZE]
+        inputs_map = _collect_lots_inputs(chunk, standards)
+        for lot in chunk:
+            results[lot.pk] = _run_risk_factors(lot, inputs_map[lot.pk])
+    return results
+
+
+def calculate_lots_risk(lots) -> Dict[int, Tuple[int, str, str]]:
+    """
+    Versi batch dari calculate_lot_risk.
+    Return: {lot.pk: (score, risk_level, status)}
+    """
+    return {
+        pk: (info["score"], info["risk_level"], info["status"])
+        for pk, info in explain_lots_risk(lots).items()
     }
 
 
-def estimate_node_contamination_probabilities(lot: Lot) -> List[Dict[str, Any]]:
+def apply_lot_risk(lot: Lot, info: Dict[str, Any]) -> bool:
+    """
+    Tulis hasil explain ke field lot (tanpa save).
+    Return True kalau ada field yang berubah.
+    """
+    new_values = (info["score"], info["risk_level"], info["status"], info["factors"])
+    old_values = (lot.risk_score, lot.risk_level, lot.status, lot.risk_breakdown)
+    if new_values == old_values:
+        return False
+
+    lot.risk_score, lot.risk_level, lot.status, lot.risk_breakdown = new_values
+    return True
+
+
+def assign_lot_risk(lot: Lot):
+    """Hitung risiko satu lot dan isi field-nya (dipakai sebelum lot.save())."""
+    apply_lot_risk(lot, explain_lot_risk(lot))
+
+
+def update_lots_risk(lots) -> List[Lot]:
+    """
+    Hitung ulang risiko banyak lot sekaligus lalu simpan dengan satu
+    bulk_update (hanya lot yang nilainya berubah).
+    Return: daftar lot yang berubah.
+    """
+    lots = list(lots)
+    results = explain_lots_risk(lots)
+
+    old_status = {lot.pk: lot.status for lot in lots}
+    old_risk = {lot.pk: (lot.risk_score, lot.risk_level) for lot in lots}
+    changed = [lot for lot in lots if apply_lot_risk(lot, results[lot.pk])]
+    if changed:
+        now = timezone.now()
+        for lot in changed:
+            lot.updated_at = now
+        with transaction.atomic():
+            Lot.objects.bulk_update(
+                changed,
+                ["risk_score", "risk_level", "status", "risk_breakdown", "updated_at"],
+                batch_size=BATCH_SIZE,
+            )
+            # bulk_update tidak memicu signal -> perbarui FarmStats, NodeStats & riwayat di sini
+            status_changed = [lot for lot in changed if lot.status != old_status[lot.pk]]
+            lots_status_changed(
+                (lot.farm_id, old_status[lot.pk], lot.status) for lot in status_changed
+            )
+            node_stats.lots_status_changed(
+                (lot.pk, old_status[lot.pk], lot.status) for lot in status_changed
+            )
+            record_risk_snapshots(
+                (lot.pk, lot.risk_score, lot.risk_level, factor_bitmask(lot.risk_breakdown))
+                for lot in changed
+                if (lot.risk_score, lot.risk_level) != old_risk[lot.pk]
+            )
+            invalidate_dashboard()
+            invalidate_public_pages(lot.pk for lot in changed)
+    return changed
+
+
+def stored_lot_risk(lot: Lot):
+    """
+    Penjelasan risiko yang tersimpan saat lot terakhir di-score
+    (format sama dengan explain_lot_risk). None kalau belum pernah di-score.
+    """
+    if not lot.risk_breakdown:
+        return None
+    return {
+        "score": lot.risk_score,
+        "risk_level": lot.risk_level,
+        "status": lot.status,
+        "reasons": [item["message"] for item in lot.risk_breakdown],
+        "factors": lot.risk_breakdown,
+    }
+
+
+def estimate_node_contamination_probabilities(
+    lot: Lot,
+    movements: Optional[Iterable[LotMovement]] = None,
+) -> List[Dict[str, Any]]:
     """
     Estimasi peluang kontaminasi per node pada journey lot.
 
     Metodologi sederhana:
     - Hitung total lot dan lot bermasalah (HOLD/INVESTIGATE) yang pernah melewati node tersebut.
     - Tambahkan sinyal insiden aktif yang terkait lot di node itu.
+      (keduanya dibaca dari NodeStats, lihat tracker/node_stats.py)
     - Normalisasi menjadi persentase sehingga bisa divisualisasikan di UI.
+
+    movements: movement lot yang sudah dimuat (urut waktu, node ikut di-select)
+    supaya pemanggil yang juga butuh movement tidak query dua kali.
     """
 
-    movements = (
-        LotMovement.objects.filter(lot=lot)
-        .select_related("node")
-        .order_by("timestamp")
-    )
+    if movements is None:
+        movements = (
+            LotMovement.objects.filter(lot=lot)
+            .select_related("node")
+            .order_by("timestamp")
+        )
 
     ordered_nodes: List[Node] = []
     seen: set[int] = set()
@@ -362,28 +526,16 @@ def estimate_node_contamination_probabilities(lot: Lot) -> List[Dict[str, Any]]:
     if not ordered_nodes:
         return []
 
-    node_ids = [n.id for n in ordered_nodes]
-
-    # agregasi lintas seluruh lot yang pernah lewat node-node terkait
-    stats = (
-        LotMovement.objects.filter(node_id__in=node_ids)
-        .values("node_id")
-        .annotate(
-            lot_count=Count("lot", distinct=True),
-            problematic_count=Count(
-                "lot",
-                filter=Q(lot__status__in=["HOLD", "INVESTIGATE"]),
-                distinct=True,
-            ),
-            incident_count=Count(
-                "lot__incidents",
-                filter=~Q(lot__incidents__status="CLOSED"),
-                distinct=True,
-            ),
-        )
-    )
-
-    stats_map = {item["node_id"]: item for item in stats}
+    # ringkasan per node dari NodeStats (1 query pada primary key)
+    stats = node_stats.get_node_stats(n.id for n in ordered_nodes)
+    stats_map = {
+        node_id: {
+            "lot_count": s.lot_count,
+            "problematic_count": s.problematic_count,
+            "incident_count": s.open_incident_count,
+        }
+        for node_id, s in stats.items()
+    }
 
     weights = []
     for node in ordered_nodes:
@@ -0,0 +1,130 @@
+"""
+Riwayat skor risiko per lot (LotRiskSnapshot).
+
+- Jalur scoring menulis snapshot secara batch (satu bulk_create per batch),
+  hanya untuk lot yang skor / level-nya berubah.
+- Level & faktor disimpan sebagai angka kecil agar tabel tetap ringkas:
+  level -> LEVEL_CODES, faktor yang berkontribusi -> bitmask FACTOR_BITS.
+- lot_risk_series() mengambil deret banyak lot dalam satu query, opsional
+  di-downsample untuk grafik.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.utils import timezone
+
+from .models import LotRiskSnapshot
+
+LEVEL_CODES = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+LEVEL_NAMES = {code: name for name, code in LEVEL_CODES.items()}
+
+# bit per faktor risiko (key di risk_engine.RISK_FACTORS + "critical").
+# Nilai bit tidak boleh diubah -> snapshot lama tetap bisa dibaca; faktor baru pakai bit berikutnya.
+FACTOR_BITS = {
+    "farm_reputation": 1 << 0,
+    "lot_age": 1 << 1,
+    "volume": 1 << 2,
+    "lab": 1 << 3,
+    "incident": 1 << 4,
+    "water_quality": 1 << 5,
+    "critical": 1 << 6,
+}
+
+_BATCH_SIZE = 1000
+
+
+def factor_bitmask(factors: Iterable[Dict[str, Any]]) -> int:
+    """Bitmask faktor yang menyumbang skor (format entri risk_breakdown)."""
+    mask = 0
+    for item in factors:
+        if item.get("delta") or item.get("factor") == "critical":
+            mask |= FACTOR_BITS.get(item.get("factor"), 0)
+    return mask
+
+
+def decode_factors(mask: int) -> List[str]:
+    return [name for name, bit in FACTOR_BITS.items() if mask & bit]
+
+
+def record_risk_snapshots(
+    rows: Iterable[Tuple[int, int, str, int]],
+    taken_at: Optional[datetime] = None,
+) -> int:
+    """
+    rows = [(lot_id, score, risk_level, factor_bitmask), ...]; semua baris
+    batch ini memakai timestamp yang sama. Return: jumlah snapshot ditulis.
+    """
+    taken_at = taken_at or timezone.now()
+    snapshots = [
+        LotRiskSnapshot(
+            lot_id=lot_id,
+            taken_at=taken_at,
+            score=score,
+            level=LEVEL_CODES.get(level, 0),
+            factors=factors,
+        )
+        for lot_id, score, level, factors in rows
+    ]
+    LotRiskSnapshot.objects.bulk_create(snapshots, batch_size=_BATCH_SIZE)
+    return len(snapshots)
+
+
+def _downsample(points: List[Dict[str, Any]], max_points: int) -> List[Dict[str, Any]]:
+    """
+    Bagi rentang waktu menjadi max_points ember sama lebar dan ambil snapshot
+    dengan skor tertinggi per ember (puncak risiko tidak hilang dari grafik).
+    """
+    if len(points) <= max_points:
+        return points
+
+    first = points[0]["taken_at"]
+    span = (points[-1]["taken_at"] - first).total_seconds() or 1
+    buckets: Dict[int, Dict[str, Any]] = {}
+    for point in points:
+        offset = (point["taken_at"] - first).total_seconds()
+        index = min(int(offset / span * max_points), max_points - 1)
+        best = buckets.get(index)
+        if best is None or point["score"] >= best["score"]:
+            buckets[index] = point
+    return [buckets[index] for index in sorted(buckets)]
+
+
+def lot_risk_series(
+    lot_ids: Iterable[int],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: Optional[int] = None,
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Deret skor risiko untuk banyak lot (1 query, urut waktu).
+    Return: {lot_id: [{"taken_at", "score", "risk_level", "factors"}, ...]}
+    """
+    lot_ids = list(set(lot_ids))
+    series: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    if not lot_ids:
+        return {}
+
+    snapshots = LotRiskSnapshot.objects.filter(lot_id__in=lot_ids)
+    if start is not None:
+        snapshots = snapshots.filter(taken_at__gte=start)
+    if end is not None:
+        snapshots = snapshots.filter(taken_at__lte=end)
+
+    rows = snapshots.order_by("lot_id", "taken_at", "id").values_list(
+        "lot_id", "taken_at", "score", "level", "factors"
+    )
+    for lot_id, taken_at, score, level, factors in rows.iterator(chunk_size=_BATCH_SIZE):
+        series[lot_id].append(
+            {
+                "taken_at": taken_at,
+                "score": score,
+                "risk_level": LEVEL_NAMES.get(level, "LOW"),
+                "factors": decode_factors(factors),
+            }
+        )
+
+    if max_points:
+        return {lot_id: _downsample(points, max_points) for lot_id, points in series.items()}
+    return dict(series)
@@ -0,0 +1,385 @@
+"""
+Rescoring vektor (NumPy) untuk banyak lot sekaligus.
+
+Menghitung skor, level, status & risk_breakdown yang sama dengan
+explain_lot_risk, tapi per potongan id lot sebagai operasi array. Ambang,
+bobot & pesan diambil dari konstanta di risk_engine, jadi hasilnya tetap
+sinkron dengan pipeline per-lot. Dipakai oleh `manage.py rescore_lots`.
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import numpy as np
+from django.utils import timezone
+
+from . import risk_engine, telemetry
+from .farm_stats import get_farm_stats
+from .lab_standards import get_lab_standards
+from .models import Incident, LabTest, Lot
+from .risk_history import FACTOR_BITS
+
+# kode comparator standar lab
+_CMP_CODES = {"<=": 0, "<": 1, "==": 2}
+
+
+def _standards_arrays(standards):
+    """Tabel LabStandard terkompilasi -> (index per parameter, limit[], kode cmp[], severity[])."""
+    specs = list(standards.specs.items())
+    index = {name: i for i, (name, _) in enumerate(specs)}
+    limits = np.array([spec.limit for _, spec in specs], dtype=float)
+    cmps = np.array([_CMP_CODES.get(spec.comparator, -1) for _, spec in specs], dtype=int)
+    severities = np.array([spec.severity for _, spec in specs], dtype=int)
+    return index, limits, cmps, severities
+
+
+def _select_bands(bands, default=0):
+    """np.select untuk tabel band [(kondisi, delta), ...] yang dicek berurutan."""
+    return np.select([cond for cond, _ in bands], [delta for _, delta in bands], default)
+
+
+def _band_delta(index, bands):
+    """Index band (-1 = tidak kena band) -> delta dari tabel band risk_engine."""
+    deltas = np.array([band[1] for band in bands] + [0], dtype=int)
+    return deltas[index]
+
+
+def score_arrays(
+    has_farm,
+    farm_total,
+    farm_problematic,
+    farm_has_incident,
+    has_log,
+    last_ph,
+    last_salinity,
+    ph_share,
+    salinity_share,
+    age_days,
+    volume,
+    lab_count,
+    lab_delta,
+    lab_critical,
+    has_open_incident,
+):
+    """
+    Versi array dari pipeline RISK_FACTORS. Semua argumen array sepanjang jumlah lot;
+    age_days / volume / last_ph / last_salinity memakai NaN untuk nilai kosong;
+    ph_share / salinity_share (porsi waktu di luar rentang aman dari telemetri 24 jam)
+    NaN kalau tidak ada telemetri -- metrik itu lalu memakai PondLog terakhir.
+    Return: (score[], kode band[], bitmask faktor[], parts) dengan kode band = index RISK_BANDS,
+    atau -1 untuk DEFAULT_BAND; bitmask sama dengan risk_history.factor_bitmask.
+    parts = array per faktor untuk menyusun risk_breakdown (lihat _breakdown):
+    index band reputasi / umur / volume (-1 = tidak kena band) dan flag insiden & kualitas air.
+    """
+    n = len(has_farm)
+    score = np.zeros(n, dtype=int)
+    factor_bits = np.zeros(n, dtype=int)
+
+    def add(factor, delta):
+        nonlocal score, factor_bits
+        score = score + delta
+        factor_bits |= np.where(delta != 0, FACTOR_BITS[factor], 0)
+
+    # === 0. Reputasi farm ===
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(farm_total > 0, farm_problematic / np.maximum(farm_total, 1), 0.0)
+    farm_ok = has_farm & (farm_total > 0)
+    reputation_band = np.where(
+        farm_ok,
+        _select_bands([(ratio >= r, i) for i, (r, _, _) in enumerate(risk_engine.FARM_REPUTATION_BANDS)], -1),
+        -1,
+    )
+    add("farm_reputation", _band_delta(reputation_band, risk_engine.FARM_REPUTATION_BANDS))
+
+    # === 1. Umur lot ===
+    no_date = np.isnan(age_days)
+    age_band = np.where(no_date, -1, _select_bands([
+        (np.ones(n, dtype=bool) if max_days is None else age_days <= max_days, i)
+        for i, (max_days, _, _) in enumerate(risk_engine.LOT_AGE_BANDS)
+    ], -1))
+    add("lot_age", np.where(
+        no_date, risk_engine.NO_HARVEST_DATE_DELTA, _band_delta(age_band, risk_engine.LOT_AGE_BANDS)
+    ))
+
+    # === 2. Volume ===
+    has_volume = ~np.isnan(volume) & (volume != 0)
+    volume_band = np.where(has_volume, _select_bands([
+        (np.ones(n, dtype=bool) if min_vol is None else volume > min_vol, i)
+        for i, (min_vol, _, _) in enumerate(risk_engine.VOLUME_BANDS)
+    ], -1), -1)
+    add("volume", _band_delta(volume_band, risk_engine.VOLUME_BANDS))
+
+    # === 3. Hasil lab ===
+    add("lab", np.where(lab_count == 0, risk_engine.NO_LAB_TEST_DELTA, lab_delta))
+
+    # === 4. Insiden ===
+    farm_incident = has_farm & farm_has_incident
+    add("incident", np.where(has_open_incident, risk_engine.OPEN_INCIDENT_DELTA, 0))
+    add("incident", np.where(farm_incident, risk_engine.FARM_INCIDENT_DELTA, 0))
+
+    # === 5. Kualitas air ===
+    ph_min, ph_max = risk_engine.PH_SAFE_RANGE
+    sal_min, sal_max = risk_engine.SALINITY_SAFE_RANGE
+    out_share = risk_engine.WATER_QUALITY_OUT_SHARE
+    with np.errstate(invalid="ignore"):
+        log_ph = has_log & ~np.isnan(last_ph) & ((last_ph < ph_min) | (last_ph > ph_max))
+        log_sal = has_log & ~np.isnan(last_salinity) & ((last_salinity < sal_min) | (last_salinity > sal_max))
+        bad_ph = np.where(np.isnan(ph_share), log_ph, ph_share > out_share)
+        bad_sal = np.where(np.isnan(salinity_share), log_sal, salinity_share > out_share)
+    bad_ph = has_farm & bad_ph.astype(bool)
+    bad_sal = has_farm & bad_sal.astype(bool)
+    add("water_quality", np.where(bad_ph, risk_engine.WATER_QUALITY_DELTA, 0))
+    add("water_quality", np.where(bad_sal, risk_engine.WATER_QUALITY_DELTA, 0))
+
+    # clamp + pelanggaran kritis
+    score = np.where(lab_critical, np.maximum(score, risk_engine.CRITICAL_MIN_SCORE), score)
+    factor_bits |= np.where(lab_critical, FACTOR_BITS["critical"], 0)
+    score = np.clip(score, 0, 100)
+
+    band = _select_bands(
+        [(score >= min_score, i) for i, (min_score, _, _) in enumerate(risk_engine.RISK_BANDS)],
+        -1,
+    )
+    parts = {
+        "farm_reputation": reputation_band,
+        "lot_age": age_band,
+        "volume": volume_band,
+        "open_incident": has_open_incident,
+        "farm_incident": farm_incident,
+        "bad_ph": bad_ph,
+        "bad_salinity": bad_sal,
+    }
+    return score, band, factor_bits, parts
+
+
+def _lab_arrays(lot_ids: np.ndarray, lo: int, hi: int):
+    """
+    Agregat hasil lab per lot: (jumlah uji, total delta, ada pelanggaran kritis, detail)
+    dengan detail = {posisi lot: [(parameter, value, unit, result, punya standar, melanggar, severity), ...]}
+    untuk menyusun entri lab di risk_breakdown.
+    """
+    n = len(lot_ids)
+    rows = list(
+        LabTest.objects.filter(sampling__lot_id__gt=lo, sampling__lot_id__lte=hi)
+        .order_by("pk")
+        .values_list("sampling__lot_id", "parameter", "value", "result", "unit")
+    )
+    lab_count = np.zeros(n, dtype=int)
+    lab_delta = np.zeros(n, dtype=int)
+    lab_critical = np.zeros(n, dtype=bool)
+    detail: Dict[int, List] = defaultdict(list)
+    if not rows:
+        return lab_count, lab_delta, lab_critical, detail
+
+    index, limits, cmps, severities = _standards_arrays(get_lab_standards(max_age=0))
+    if not len(limits):
+        # tanpa standar aktif: semua parameter diperlakukan "tanpa standar"
+        limits, cmps, severities = np.zeros(1), np.full(1, -1), np.zeros(1, dtype=int)
+    pos = np.searchsorted(lot_ids, np.array([r[0] for r in rows], dtype=np.int64))
+    std_idx = np.array([index.get(r[1], -1) for r in rows], dtype=int)
+    values = np.array([np.nan if r[2] is None else r[2] for r in rows], dtype=float)
+    is_fail = np.array([(r[3] or "").upper() == "FAIL" for r in rows], dtype=bool)
+
+    mapped = std_idx >= 0
+    safe_idx = np.where(mapped, std_idx, 0)
+    limit = limits[safe_idx]
+    cmp_code = cmps[safe_idx]
+    missing = np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        violated = mapped & (
+            missing
+            | ((cmp_code == 0) & (values > limit))
+            | ((cmp_code == 1) & (values >= limit))
+            | ((cmp_code == 2) & (values != limit))
+        )
+    severity = np.where(violated, severities[safe_idx], 0)
+    # fallback: parameter tanpa standar tetap lihat kolom result
+    unmapped_fail = ~mapped & is_fail
+
+    np.add.at(lab_count, pos, 1)
+    np.add.at(lab_delta, pos, severity + unmapped_fail * risk_engine.UNMAPPED_FAIL_DELTA)
+    np.logical_or.at(lab_critical, pos, violated & (severity >= risk_engine.CRITICAL_SEVERITY))
+    for i, (_lot_id, parameter, value, result, unit) in enumerate(rows):
+        detail[int(pos[i])].append(
+            (parameter, value, unit, result, bool(mapped[i]), bool(violated[i]), int(severity[i]))
+        )
+    return lab_count, lab_delta, lab_critical, detail
+
+
+def _breakdown(i: int, row, stats, water, parts, lab_tests, standards) -> List[Dict[str, Any]]:
+    """
+    risk_breakdown lot ke-i dari array per faktor (format & urutan sama dengan
+    risk_engine.RISK_FACTORS). row = baris values_list lot, stats = FarmStats,
+    water = ringkasan telemetri farm, lab_tests = detail _lab_arrays lot ini.
+    """
+    entry = risk_engine._entry
+    factors: List[Dict[str, Any]] = []
+
+    # === 0. Reputasi farm ===
+    band = parts["farm_reputation"][i]
+    if band >= 0:
+        _, delta, message = risk_engine.FARM_REPUTATION_BANDS[band]
+        message = message.format(problematic=stats.problematic_lot_count, total=stats.lot_count)
+        factors.append(entry("farm_reputation", delta, f"{message} (+{delta})"))
+
+    # === 1. Umur lot ===
+    harvest_date = row[2]
+    if harvest_date is None:
+        delta = risk_engine.NO_HARVEST_DATE_DELTA
+        factors.append(entry("lot_age", delta, f"Tanggal panen tidak tercatat (+{delta})"))
+    else:
+        _, delta, message = risk_engine.LOT_AGE_BANDS[parts["lot_age"][i]]
+        days = (timezone.now().date() - harvest_date).days
+        factors.append(entry("lot_age", delta, f"{message.format(days=days)} (+{delta})"))
+
+    # === 2. Volume ===
+    band = parts["volume"][i]
+    if band >= 0:
+        _, delta, message = risk_engine.VOLUME_BANDS[band]
+        factors.append(entry("volume", delta, f"{message.format(volume=row[3])} (+{delta})"))
+
+    # === 3. Hasil lab ===
+    if not lab_tests:
+        delta = risk_engine.NO_LAB_TEST_DELTA
+        factors.append(entry("lab", delta, f"Belum ada hasil lab untuk lot ini (+{delta})"))
+    unmapped_fail = 0
+    for parameter, value, unit, result, mapped, violated, severity in lab_tests:
+        if mapped:
+            message = standards.message(parameter, value, unit, violated)
+        else:
+            message = f"Hasil {parameter}: {result or '-'}"
+            unmapped_fail += (result or "").upper() == "FAIL"
+        factors.append(entry(
+            "lab", severity, message, critical=violated and severity >= risk_engine.CRITICAL_SEVERITY
+        ))
+    if unmapped_fail:
+        delta = unmapped_fail * risk_engine.UNMAPPED_FAIL_DELTA
+        factors.append(
+            entry("lab", delta, f"{unmapped_fail} parameter uji (tanpa standar) dinyatakan FAIL (+{delta})")
+        )
+
+    # === 4. Insiden ===
+    if parts["open_incident"][i]:
+        delta = risk_engine.OPEN_INCIDENT_DELTA
+        factors.append(entry("incident", delta, f"Ada insiden aktif yang terkait langsung dengan lot (+{delta})"))
+    if parts["farm_incident"][i]:
+        delta = risk_engine.FARM_INCIDENT_DELTA
+        factors.append(entry("incident", delta, f"Ada insiden lain di farm yang sama (+{delta})"))
+
+    # === 5. Kualitas air ===
+    delta = risk_engine.WATER_QUALITY_DELTA
+    ph_share = water.get("ph_share") if water else None
+    if parts["bad_ph"][i]:
+        if ph_share is not None:
+            share = round(ph_share * 100)
+            factors.append(entry(
+                "water_quality", delta, f"pH air di luar rentang aman {share}% waktu dalam 24 jam terakhir (+{delta})"
+            ))
+        else:
+            factors.append(entry(
+                "water_quality", delta, f"pH air terakhir di luar rentang aman ({stats.last_ph}) (+{delta})"
+            ))
+    salinity_share = water.get("salinity_ppt_share") if water else None
+    if parts["bad_salinity"][i]:
+        if salinity_share is not None:
+            share = round(salinity_share * 100)
+            factors.append(entry(
+                "water_quality", delta,
+                f"Salinitas air di luar rentang aman {share}% waktu dalam 24 jam terakhir (+{delta})",
+            ))
+        else:
+            factors.append(entry(
+                "water_quality", delta,
+                f"Salinitas air terakhir di luar rentang aman ({stats.last_salinity_ppt} ppt) (+{delta})",
+            ))
+
+    if any(item.get("critical") for item in factors):
+        factors.append(entry(
+            "critical", 0, "Pelanggaran kritis terhadap standar (mikroba/antibiotik), otomatis INVESTIGATE"
+        ))
+    return factors
+
+
+def score_id_range(lo: int, hi: int, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Hitung ulang semua lot dengan lo < pk <= hi (tanpa menulis lot ke DB).
+    Return dict: scanned,
+    changed = [(pk, farm_id, old_status, old_score, old_level, score, level, status, factor_bits, breakdown), ...]
+
+    Skor, bitmask & breakdown semuanya dari array score_arrays; breakdown hanya
+    disusun untuk lot yang berubah (plus lot yang belum punya breakdown).
+    dry_run=True: lot tanpa breakdown tidak ikut dan FarmStats yang belum ada
+    tidak ditulis.
+    """
+    rows = list(
+        Lot.objects.filter(pk__gt=lo, pk__lte=hi)
+        .order_by("pk")
+        .values_list("pk", "farm_id", "harvest_date", "volume_kg", "risk_score", "risk_level", "status")
+    )
+    if not rows:
+        return {"scanned": 0, "changed": []}
+
+    lot_ids = np.array([r[0] for r in rows], dtype=np.int64)
+    farm_ids = [r[1] for r in rows]
+    today = timezone.now().date()
+
+    stats = get_farm_stats(farm_ids, save=not dry_run)
+    farm_rows = [stats.get(fid) for fid in farm_ids]
+    has_farm = np.array([fid is not None for fid in farm_ids], dtype=bool)
+    farm_total = np.array([s.lot_count if s else 0 for s in farm_rows], dtype=int)
+    farm_problematic = np.array([s.problematic_lot_count if s else 0 for s in farm_rows], dtype=int)
+    farm_has_incident = np.array([bool(s and s.incident_count > 0) for s in farm_rows], dtype=bool)
+    has_log = np.array([bool(s and s.last_pond_date is not None) for s in farm_rows], dtype=bool)
+    last_ph = np.array(
+        [s.last_ph if s and s.last_ph is not None else np.nan for s in farm_rows], dtype=float
+    )
+    last_salinity = np.array(
+        [s.last_salinity_ppt if s and s.last_salinity_ppt is not None else np.nan for s in farm_rows],
+        dtype=float,
+    )
+    water = telemetry.water_quality_summary(farm_ids)
+    water_rows = [water.get(fid) for fid in farm_ids]
+    ph_share, salinity_share = (
+        np.array(
+            [w[f"{metric}_share"] if w and w[f"{metric}_share"] is not None else np.nan for w in water_rows],
+            dtype=float,
+        )
+        for metric in telemetry.RANGED_METRICS
+    )
+
+    age_days = np.array([np.nan if r[2] is None else (today - r[2]).days for r in rows], dtype=float)
+    volume = np.array([np.nan if r[3] is None else r[3] for r in rows], dtype=float)
+
+    lab_count, lab_delta, lab_critical, lab_tests = _lab_arrays(lot_ids, lo, hi)
+
+    open_lots = np.array(
+        list(
+            Incident.objects.filter(lot_id__gt=lo, lot_id__lte=hi)
+            .exclude(status__iexact="closed")
+            .values_list("lot_id", flat=True)
+            .distinct()
+        ),
+        dtype=np.int64,
+    )
+    has_open_incident = np.isin(lot_ids, open_lots)
+
+    score, band, factor_bits, parts = score_arrays(
+        has_farm, farm_total, farm_problematic, farm_has_incident, has_log, last_ph, last_salinity,
+        ph_share, salinity_share, age_days, volume, lab_count, lab_delta, lab_critical, has_open_incident,
+    )
+
+    # lot lama yang breakdown-nya pernah dikosongkan ikut diisi sekali
+    unexplained = set() if dry_run else set(
+        Lot.objects.filter(pk__gt=lo, pk__lte=hi, risk_breakdown=[]).values_list("pk", flat=True)
+    )
+    standards = get_lab_standards(max_age=0)
+    bands: List = [(level, status) for _, level, status in risk_engine.RISK_BANDS]
+    changed = []
+    for i, r in enumerate(rows):
+        level, status = bands[band[i]] if band[i] >= 0 else risk_engine.DEFAULT_BAND
+        new_score = int(score[i])
+        if (r[4], r[5], r[6]) == (new_score, level, status) and r[0] not in unexplained:
+            continue
+        factors = _breakdown(i, r, farm_rows[i], water_rows[i], parts, lab_tests.get(i, []), standards)
+        changed.append((r[0], r[1], r[6], r[4], r[5], new_score, level, status, int(factor_bits[i]), factors))
+    return {"scanned": len(rows), "changed": changed}
@@ -0,0 +1,196 @@
+"""
+Ingest batch scan label lot di checkpoint (POST /scans/).
+
+Scanner genggam di titik penerimaan mengirim banyak scan sekaligus:
+    {"scans": [
+        {"public_token": "...", "node": 7, "timestamp": "2026-10-01T08:15:00+07:00",
+         "quantity_kg": 250, "location": "Gudang 2"},
+        {"lot_id": "LOT-2024-0001", "node": 7, "timestamp": "..."}
+    ]}
+
+- Lot dikenali dari public_token (isi QR) atau lot_id; node dari pk.
+- Scan yang sama (lot, node) dalam jendela SCAN_DEDUPE_SECONDS dari scan lain
+  di batch atau dari movement yang sudah ada dianggap duplikat dan dilewati,
+  jadi kiriman ulang aman.
+- Scan yang tidak valid ditolak per baris (dilaporkan), sisanya tetap ditulis.
+- Movement ditulis dengan satu bulk_create dalam satu transaksi. bulk_create
+  tidak memicu signal, jadi NodeStats, versi halaman publik & antrean rescore
+  lot diperbarui sekali per batch.
+"""
+
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import node_stats
+from .models import Lot, LotMovement, Node
+from .public_page import touch_lots
+from .recompute import mark_lots_dirty
+
+# potongan parameter IN
+_CHUNK = 500
+
+Scan = Tuple[int, int, datetime, Optional[float], str]
+
+
+class ScanError(ValueError):
+    pass
+
+
+def max_scans() -> int:
+    return getattr(settings, "SCAN_MAX_EVENTS", 10000)
+
+
+def dedupe_window() -> timedelta:
+    return timedelta(seconds=getattr(settings, "SCAN_DEDUPE_SECONDS", 600))
+
+
+def _lookup(field: str, values: set) -> Dict[str, int]:
+    values = list(values)
+    found: Dict[str, int] = {}
+    for start in range(0, len(values), _CHUNK):
+        found.update(
+            Lot.objects.filter(**{f"{field}__in": values[start:start + _CHUNK]}).values_list(field, "pk")
+        )
+    return found
+
+
+def _parse_one(item: Any, now: datetime) -> Dict[str, Any]:
+    if not isinstance(item, dict):
+        raise ScanError("harus berupa objek")
+
+    token = str(item.get("public_token") or "").strip()
+    lot_id = str(item.get("lot_id") or "").strip()
+    if not token and not lot_id:
+        raise ScanError("public_token atau lot_id wajib diisi")
+    try:
+        node_id = int(item.get("node"))
+    except (TypeError, ValueError):
+        raise ScanError("node harus berupa id node")
+
+    raw_ts = item.get("timestamp")
+    moment = now
+    if raw_ts:
+        try:
+            moment = parse_datetime(str(raw_ts))
+        except ValueError:
+            moment = None
+        if moment is None:
+            raise ScanError("timestamp harus ISO 8601")
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+
+    quantity = item.get("quantity_kg")
+    if quantity is not None and (isinstance(quantity, bool) or not isinstance(quantity, (int, float))):
+        raise ScanError("quantity_kg harus angka")
+
+    return {
+        "token": token,
+        "lot_id": lot_id,
+        "node_id": node_id,
+        "timestamp": moment,
+        "quantity_kg": None if quantity is None else float(quantity),
+        "location": str(item.get("location") or "").strip()[:200],
+    }
+
+
+def parse_scans(raw: Any) -> Tuple[List[Tuple[int, Scan]], List[Dict[str, Any]]]:
+    """
+    -> ([(index, (lot_pk, node_pk, timestamp, quantity_kg, location))], rejected)
+    rejected = [{"index", "error"}]. ScanError kalau bentuk kiriman salah.
+    """
+    if not isinstance(raw, list):
+        raise ScanError("scans harus berupa list")
+    if len(raw) > max_scans():
+        raise ScanError(f"maksimal {max_scans()} scan per kiriman")
+
+    now = timezone.now()
+    parsed, rejected = [], []
+    for i, item in enumerate(raw):
+        try:
+            parsed.append((i, _parse_one(item, now)))
+        except ScanError as exc:
+            rejected.append({"index": i, "error": str(exc)})
+
+    by_token = _lookup("public_token", {p["token"] for _, p in parsed if p["token"]})
+    by_lot_id = _lookup("lot_id", {p["lot_id"] for _, p in parsed if p["lot_id"] and not p["token"]})
+    node_ids = set(Node.objects.filter(pk__in={p["node_id"] for _, p in parsed}).values_list("pk", flat=True))
+
+    scans = []
+    for i, p in parsed:
+        lot_pk = by_token.get(p["token"]) if p["token"] else by_lot_id.get(p["lot_id"])
+        if lot_pk is None:
+            rejected.append({"index": i, "error": f"Lot '{p['token'] or p['lot_id']}' tidak ditemukan"})
+        elif p["node_id"] not in node_ids:
+            rejected.append({"index": i, "error": f"Node {p['node_id']} tidak ditemukan"})
+        else:
+            scans.append((i, (lot_pk, p["node_id"], p["timestamp"], p["quantity_kg"], p["location"])))
+    rejected.sort(key=lambda r: r["index"])
+    return scans, rejected
+
+
+def _existing_times(pairs: set, since: datetime, until: datetime) -> Dict[Tuple[int, int], List[datetime]]:
+    """Timestamp movement yang sudah ada per (lot, node) di sekitar rentang batch."""
+    lot_ids = sorted({lot_id for lot_id, _ in pairs})
+    node_ids = {node_id for _, node_id in pairs}
+    times: Dict[Tuple[int, int], List[datetime]] = {pair: [] for pair in pairs}
+    for start in range(0, len(lot_ids), _CHUNK):
+        rows = LotMovement.objects.filter(
+            lot_id__in=lot_ids[start:start + _CHUNK],
+            node_id__in=node_ids,
+            timestamp__range=(since, until),
+        ).values_list("lot_id", "node_id", "timestamp")
+        for lot_id, node_id, moment in rows:
+            if (lot_id, node_id) in times:
+                times[(lot_id, node_id)].append(moment)
+    for values in times.values():
+        values.sort()
+    return times
+
+
+def _is_duplicate(times: List[datetime], moment: datetime, window: timedelta) -> bool:
+    pos = bisect_left(times, moment)
+    return any(abs(times[j] - moment) <= window for j in (pos - 1, pos) if 0 <= j < len(times))
+
+
+def ingest_scans(scans: List[Tuple[int, Scan]]) -> Dict[str, int]:
+    """Tulis scan hasil parse_scans (tanpa duplikat) & perbarui turunannya sekali per batch."""
+    if not scans:
+        return {"created": 0, "duplicates": 0}
+
+    window = dedupe_window()
+    ordered = sorted(scans, key=lambda s: (s[1][2], s[0]))
+    pairs = {(lot_pk, node_pk) for _, (lot_pk, node_pk, *_rest) in ordered}
+    lot_ids = sorted({lot_pk for lot_pk, _ in pairs})
+
+    with transaction.atomic():
+        # kiriman paralel untuk lot yang sama menunggu di sini, jadi dedupe tetap benar
+        for start in range(0, len(lot_ids), _CHUNK):
+            list(Lot.objects.select_for_update().filter(pk__in=lot_ids[start:start + _CHUNK]).values_list("pk"))
+
+        times = _existing_times(pairs, ordered[0][1][2] - window, ordered[-1][1][2] + window)
+        movements = []
+        for _, (lot_pk, node_pk, moment, quantity, location) in ordered:
+            seen = times[(lot_pk, node_pk)]
+            if _is_duplicate(seen, moment, window):
+                continue
+            insort(seen, moment)
+            movements.append(LotMovement(
+                lot_id=lot_pk, node_id=node_pk, timestamp=moment, quantity_kg=quantity, location=location,
+            ))
+
+        new_pairs = node_stats.unvisited_pairs((mv.lot_id, mv.node_id) for mv in movements)
+        LotMovement.objects.bulk_create(movements, batch_size=_CHUNK)
+        node_stats.movements_created(new_pairs)
+
+        moved = sorted({mv.lot_id for mv in movements})
+        for start in range(0, len(moved), _CHUNK):
+            touch_lots(moved[start:start + _CHUNK])
+        mark_lots_dirty(moved)
+
+    return {"created": len(movements), "duplicates": len(scans) - len(movements)}
@@ -0,0 +1,208 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import farm_stats, node_stats
+from .dashboard import invalidate_dashboard
+from .lab_standards import invalidate_lab_standards
+from .models import Incident, LabStandard, Lot, LotMovement, PondLog
+from .public_page import invalidate_public_pages, touch_lots
+from .recompute import RISK_DEPENDENCIES, mark_instance_dirty
+from .risk_history import factor_bitmask, record_risk_snapshots
+
+
+# ============ ANTREAN HITUNG ULANG RISIKO ============
+
+def _mark_dirty(sender, instance, **kwargs):
+    # data mentah bisa masuk lewat fixture (loaddata) -> tidak perlu rescore
+    if kwargs.get("raw"):
+        return
+    mark_instance_dirty(instance)
+
+
+for _model in RISK_DEPENDENCIES:
+    post_save.connect(_mark_dirty, sender=_model, dispatch_uid=f"risk_dirty_save_{_model.__name__}")
+    post_delete.connect(_mark_dirty, sender=_model, dispatch_uid=f"risk_dirty_delete_{_model.__name__}")
+
+
+# ============ STANDAR LAB ============
+
+@receiver([post_save, post_delete], sender=LabStandard, dispatch_uid="lab_standards_version")
+def _lab_standard_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_lab_standards()
+
+
+# ============ FARM STATS ============
+
+def _lot_farm_id(lot_id):
+    return Lot.objects.filter(pk=lot_id).values_list("farm_id", flat=True).first()
+
+
+@receiver(pre_save, sender=Lot, dispatch_uid="farm_stats_lot_pre_save")
+def _lot_pre_save(sender, instance, raw=False, **kwargs):
+    instance._farm_stats_old = None
+    instance._risk_old = None
+    if instance.pk and not raw:
+        old = (
+            Lot.objects.filter(pk=instance.pk)
+            .values_list("farm_id", "status", "risk_score", "risk_level")
+            .first()
+        )
+        if old is not None:
+            instance._farm_stats_old = old[:2]
+            instance._risk_old = old[2:]
+
+
+@receiver(post_save, sender=Lot, dispatch_uid="farm_stats_lot_post_save")
+def _lot_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, "_farm_stats_old", None)
+    if old is not None and old == (instance.farm_id, instance.status):
+        return
+    farm_stats.lot_saved(instance, old)
+
+
+@receiver(post_delete, sender=Lot, dispatch_uid="farm_stats_lot_post_delete")
+def _lot_post_delete(sender, instance, **kwargs):
+    farm_stats.lot_deleted(instance)
+
+
+@receiver(pre_save, sender=Incident, dispatch_uid="farm_stats_incident_pre_save")
+def _incident_pre_save(sender, instance, raw=False, **kwargs):
+    instance._farm_stats_old = None
+    instance._node_stats_old = None
+    if instance.pk and not raw:
+        old = (
+            Incident.objects.filter(pk=instance.pk)
+            .values_list("lot_id", "lot__farm_id", "status")
+            .first()
+        )
+        if old is not None:
+            lot_id, farm_id, status = old
+            instance._farm_stats_old = (farm_id, status)
+            instance._node_stats_old = (lot_id, status)
+
+
+@receiver(post_save, sender=Incident, dispatch_uid="farm_stats_incident_post_save")
+def _incident_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, "_farm_stats_old", None)
+    farm_id = _lot_farm_id(instance.lot_id)
+    if old is not None and old == (farm_id, instance.status):
+        return
+    farm_stats.incident_saved(farm_id, instance.status, old)
+
+
+@receiver(post_delete, sender=Incident, dispatch_uid="farm_stats_incident_post_delete")
+def _incident_post_delete(sender, instance, **kwargs):
+    farm_stats.incident_deleted(_lot_farm_id(instance.lot_id), instance.status)
+
+
+@receiver([post_save, post_delete], sender=PondLog, dispatch_uid="farm_stats_pond_log")
+def _pond_log_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        farm_stats.refresh_last_pond_reading(instance.farm_id)
+
+
+# ============ RIWAYAT RISIKO ============
+
+@receiver(post_save, sender=Lot, dispatch_uid="risk_history_lot_post_save")
+def _risk_history_lot_post_save(sender, instance, created, raw=False, **kwargs):
+    # jalur save satu lot (admin / form); jalur batch menulis snapshot sendiri
+    if raw:
+        return
+    if created:
+        # lot yang belum pernah di-score tidak perlu snapshot awal
+        if not instance.risk_breakdown:
+            return
+    elif getattr(instance, "_risk_old", None) in (None, (instance.risk_score, instance.risk_level)):
+        return
+    record_risk_snapshots([
+        (instance.pk, instance.risk_score, instance.risk_level, factor_bitmask(instance.risk_breakdown))
+    ])
+
+
+# ============ NODE STATS ============
+
+@receiver(post_save, sender=Lot, dispatch_uid="node_stats_lot_post_save")
+def _node_stats_lot_post_save(sender, instance, created, raw=False, **kwargs):
+    # lot baru belum punya movement; lot dihapus -> ditangani lewat cascade LotMovement
+    old = getattr(instance, "_farm_stats_old", None)
+    if raw or created or old is None or old[1] == instance.status:
+        return
+    node_stats.lots_status_changed([(instance.pk, old[1], instance.status)])
+
+
+@receiver(pre_save, sender=LotMovement, dispatch_uid="node_stats_movement_pre_save")
+def _movement_pre_save(sender, instance, raw=False, **kwargs):
+    instance._node_stats_old = None
+    if instance.pk and not raw:
+        instance._node_stats_old = (
+            LotMovement.objects.filter(pk=instance.pk).values_list("lot_id", "node_id").first()
+        )
+
+
+@receiver(post_save, sender=LotMovement, dispatch_uid="node_stats_movement_post_save")
+def _movement_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, "_node_stats_old", None)
+    node_stats.movement_saved(instance, old)
+
+
+@receiver(post_delete, sender=LotMovement, dispatch_uid="node_stats_movement_post_delete")
+def _movement_post_delete(sender, instance, origin=None, **kwargs):
+    # satu set per operasi delete (origin = objek / queryset yang dihapus)
+    seen = None
+    if origin is not None:
+        seen = origin.__dict__.setdefault("_node_stats_removed", set())
+    node_stats.movement_deleted(instance, seen)
+
+
+@receiver(post_save, sender=Incident, dispatch_uid="node_stats_incident_post_save")
+def _node_stats_incident_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, "_node_stats_old", None)
+    if old is not None and old == (instance.lot_id, instance.status):
+        return
+    node_stats.incident_saved(instance.lot_id, instance.status, old)
+
+
+@receiver(post_delete, sender=Incident, dispatch_uid="node_stats_incident_post_delete")
+def _node_stats_incident_post_delete(sender, instance, **kwargs):
+    node_stats.incident_deleted(instance.lot_id, instance.status)
+
+
+# ============ DASHBOARD ============
+
+@receiver([post_save, post_delete], sender=Lot, dispatch_uid="dashboard_lot_changed")
+@receiver([post_save, post_delete], sender=Incident, dispatch_uid="dashboard_incident_changed")
+def _dashboard_changed(sender, instance, **kwargs):
+    invalidate_dashboard()
+
+
+# ============ HALAMAN PUBLIK LOT ============
+
+@receiver([post_save, post_delete], sender=Lot, dispatch_uid="public_page_lot_changed")
+def _public_page_lot_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_public_pages([instance.pk])
+
+
+@receiver(post_save, sender=LotMovement, dispatch_uid="public_page_movement_saved")
+def _public_page_movement_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, "_node_stats_old", None)
+    touch_lots([instance.lot_id, old[0] if old else None])
+
+
+@receiver(post_delete, sender=LotMovement, dispatch_uid="public_page_movement_deleted")
+def _public_page_movement_deleted(sender, instance, origin=None, **kwargs):
+    # lot ikut dihapus (cascade) -> halamannya dibuang oleh receiver Lot
+    if isinstance(origin, Lot) or getattr(origin, "model", None) is Lot:
+        return
+    touch_lots([instance.lot_id])
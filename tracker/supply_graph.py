@@ -0,0 +1,116 @@
+"""
+Analisis node tersangka pada rantai pasok.
+
+Movement lot bermasalah (HOLD / INVESTIGATE) dalam jendela waktu dimuat
+sekali ke struktur di memori:
+  node_lots : node_id -> set lot_id bermasalah yang lewat node itu
+  lot_paths : lot_id  -> daftar node_id berurutan waktu
+lalu tiap node diberi peringkat berdasarkan porsi throughput bermasalah
+(lot bermasalah / semua lot yang lewat node dalam jendela yang sama).
+
+Jumlah query tetap (2), berapa pun jumlah node & lot.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Lot, LotMovement
+
+PROBLEMATIC_STATUSES = Lot.PROBLEMATIC_STATUSES
+
+# (porsi lot bermasalah minimal, label risiko), dicek berurutan; sisanya "Rendah"
+SUSPECT_RISK_BANDS = [
+    (0.5, "Tinggi"),
+    (0.2, "Sedang"),
+]
+DEFAULT_SUSPECT_RISK = "Rendah"
+
+
+def default_window_days() -> Optional[int]:
+    return getattr(settings, "SUSPECT_WINDOW_DAYS", 90) or None
+
+
+def _suspect_risk(share: float) -> str:
+    for min_share, label in SUSPECT_RISK_BANDS:
+        if share >= min_share:
+            return label
+    return DEFAULT_SUSPECT_RISK
+
+
+@dataclass
+class SupplyGraph:
+    since: Optional[datetime] = None
+    nodes: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    node_lots: Dict[int, Set[int]] = field(default_factory=lambda: defaultdict(set))
+    node_movements: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    lot_paths: Dict[int, List[int]] = field(default_factory=lambda: defaultdict(list))
+    lot_codes: Dict[int, str] = field(default_factory=dict)
+    node_throughput: Dict[int, int] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, days: Optional[int] = None) -> "SupplyGraph":
+        """Bangun graf untuk movement `days` hari terakhir (None = semua waktu)."""
+        since = timezone.now() - timedelta(days=days) if days else None
+        graph = cls(since=since)
+
+        movements = LotMovement.objects.filter(lot__status__in=PROBLEMATIC_STATUSES)
+        if since is not None:
+            movements = movements.filter(timestamp__gte=since)
+        rows = movements.order_by("lot_id", "timestamp", "id").values_list(
+            "lot_id", "lot__lot_id", "node_id", "node__name", "node__type"
+        )
+        for lot_pk, lot_code, node_id, node_name, node_type in rows.iterator(chunk_size=2000):
+            graph.nodes.setdefault(node_id, {"id": node_id, "name": node_name, "type": node_type})
+            graph.node_lots[node_id].add(lot_pk)
+            graph.node_movements[node_id] += 1
+            graph.lot_codes[lot_pk] = lot_code
+            path = graph.lot_paths[lot_pk]
+            # kunjungan berturut-turut ke node yang sama dihitung satu langkah
+            if not path or path[-1] != node_id:
+                path.append(node_id)
+
+        graph._load_throughput()
+        return graph
+
+    def _load_throughput(self):
+        """Semua lot (bermasalah atau tidak) yang lewat node-node ini dalam jendela yang sama."""
+        if not self.nodes:
+            return
+        movements = LotMovement.objects.filter(node_id__in=list(self.nodes))
+        if self.since is not None:
+            movements = movements.filter(timestamp__gte=self.since)
+        self.node_throughput = dict(
+            movements.values("node_id")
+            .annotate(lots=Count("lot", distinct=True))
+            .values_list("node_id", "lots")
+        )
+
+    def path(self, lot_pk: int) -> List[Dict[str, Any]]:
+        return [self.nodes[node_id] for node_id in self.lot_paths.get(lot_pk, [])]
+
+    def rank(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Node diurutkan dari porsi throughput bermasalah terbesar."""
+        suspects = []
+        for node_id, info in self.nodes.items():
+            lots = self.node_lots[node_id]
+            total = max(self.node_throughput.get(node_id, 0), len(lots))
+            share = len(lots) / total if total else 0.0
+            suspects.append(
+                {
+                    **info,
+                    "movement_count": self.node_movements[node_id],
+                    "lots_count": len(lots),
+                    "total_lots": total,
+                    "share": round(share, 3),
+                    "risk": _suspect_risk(share),
+                    "lots": sorted(self.lot_codes[pk] for pk in lots),
+                }
+            )
+        suspects.sort(key=lambda s: (s["share"], s["lots_count"]), reverse=True)
+        return suspects[:limit] if limit else suspects
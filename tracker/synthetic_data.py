@@ -0,0 +1,473 @@
+"""
+Generator data sintetis (farm, node, lot, movement, PondLog, sampling, uji lab,
+insiden) untuk benchmark & data dummy dalam skala besar.
+
+Semua entitas ditulis dengan bulk_create per potongan (batch_size), jadi
+memori tetap kecil walau jutaan lot. bulk_create tidak memicu signal:
+FarmStats / NodeStats dibangun ulang di akhir.
+
+Tiap farm diberi kelas (FARM_TIERS) dan tiap lot profil kontaminasi acak
+(OK / HOLD / INVESTIGATE) sesuai kelas farm-nya. Profil hanya membentuk data
+turunannya (umur, nilai uji lab, insiden, rute). Lot sendiri disimpan belum
+di-score; status & risiko dihitung dari data itu oleh jalur scoring batch
+(manage.py rescore_lots).
+"""
+
+import random
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .farm_stats import rebuild_farm_stats
+from .models import (
+    Document,
+    Farm,
+    Incident,
+    IncidentRelatedLot,
+    LabTest,
+    Lot,
+    LotMovement,
+    Node,
+    PondLog,
+    Sampling,
+)
+from .node_stats import rebuild_node_stats
+
+# nama "asli" untuk node & farm pertama, selebihnya bernomor
+NODE_NAMES = {
+    "COLLECTOR": [
+        "Pengumpul Jaya",
+        "Pengumpul Sentosa",
+        "Pengumpul Makmur",
+        "Pengumpul Bahari",
+        "Pengumpul Nusantara",
+    ],
+    "PROCESSOR": [
+        "PT Sumber Jaya Processing",
+        "PT Mandiri Seafood",
+        "PT Bahari Prima",
+        "PT Ocean Fresh",
+        "PT Sentosa Marine",
+    ],
+    "EXPORTER": [
+        "PT Global Shrimp Export",
+        "PT Indo Marine Export",
+        "PT Nusantara Seafood",
+        "PT Asia Pacific Shrimp",
+    ],
+}
+FARM_NAMES = [
+    "Tambak Jaya Abadi",
+    "Tambak Sentosa Mulya",
+    "Tambak Makmur Sejahtera",
+    "Tambak Bahari Nusantara",
+    "Tambak Mina Lestari",
+    "Tambak Rejeki Nusantara",
+    "Tambak Sumber Rezeki",
+    "Tambak Putra Mandiri",
+    "Tambak Karya Utama",
+    "Tambak Berkah Jaya",
+    "Tambak Tirta Bahari",
+    "Tambak Laut Biru",
+    "Tambak Samudra Jaya",
+    "Tambak Pantai Indah",
+    "Tambak Bintang Laut",
+]
+LOCATIONS = [
+    "Sidoarjo, Jawa Timur",
+    "Gresik, Jawa Timur",
+    "Lampung Selatan, Lampung",
+    "Tuban, Jawa Timur",
+    "Brebes, Jawa Tengah",
+    "Kendal, Jawa Tengah",
+    "Demak, Jawa Tengah",
+    "Pati, Jawa Tengah",
+    "Banyuwangi, Jawa Timur",
+    "Situbondo, Jawa Timur",
+]
+OWNERS = [
+    "Budi Santoso",
+    "Ahmad Wijaya",
+    "Siti Rahayu",
+    "Hendra Kusuma",
+    "Dewi Lestari",
+    "Agus Priyanto",
+    "Nur Hidayah",
+    "Bambang Sutopo",
+    "Ratna Sari",
+    "Eko Prasetyo",
+]
+KONTAMINASI_TYPES = [
+    "Cesium tinggi",
+    "Timbal (Pb) melebihi batas",
+    "Kadmium terdeteksi",
+    "Merkuri tinggi",
+    "TPC melebihi standar",
+    "Salmonella terdeteksi",
+    "E.coli positif",
+    "Antibiotik terdeteksi",
+    "Formalin terdeteksi",
+    "Warna tidak normal",
+]
+# (parameter, satuan, batas) mengikuti standar awal LabStandard (migrasi 0006),
+# jadi hasil uji sintetis dinilai dengan batas yang sama oleh risk engine
+TEST_PARAMETERS = [
+    ("ALT", "koloni/g", 1000000),
+    ("E.coli", "APM/g", 1),
+    ("Salmonella", "/25g", 0),
+    ("Vibrio parahaemolyticus", "APM/g", 10),
+    ("Merkuri (Hg)", "mg/kg", 0.5),
+    ("Timbal (Pb)", "mg/kg", 0.2),
+    ("Kadmium (Cd)", "mg/kg", 0.1),
+    ("Kloramfenikol", "µg/kg", 0),
+]
+# pelanggaran kritis (severity >= risk_engine.CRITICAL_SEVERITY) -> INVESTIGATE
+CRITICAL_PARAMETERS = {"Salmonella", "Kloramfenikol"}
+INCIDENT_DESCRIPTIONS = [
+    "Lot ditolak oleh buyer karena hasil lab tidak memenuhi standar.",
+    "Kontaminasi terdeteksi saat inspeksi rutin.",
+    "Buyer melaporkan kualitas tidak sesuai spesifikasi.",
+    "Hasil uji lab menunjukkan parameter melebihi batas aman.",
+    "Penolakan ekspor karena dokumen tidak lengkap dan hasil lab buruk.",
+]
+
+PROFILES = ["OK", "HOLD", "INVESTIGATE"]
+# (bobot farm, bobot profil lot OK / HOLD / INVESTIGATE): kebanyakan farm jarang
+# bermasalah, lot bermasalah terkumpul di sedikit farm (seperti data nyata;
+# kalau merata, faktor reputasi farm menaikkan skor semua lot)
+FARM_TIERS = [
+    (80, (98, 1, 1)),
+    (10, (80, 12, 8)),
+    (10, (50, 30, 20)),
+]
+# lot yang punya sampling + uji lab, per profil
+SAMPLED_RATIO = {"OK": 0.99, "HOLD": 0.85, "INVESTIGATE": 0.95}
+INCIDENT_RATIO = 0.4  # dari lot bermasalah
+# rata-rata umur lot sejak panen (hari, distribusi eksponensial): lot yang
+# masih dilacak umumnya baru panen, lot yang ditahan tertahan lebih lama
+HARVEST_AGE_MEAN_DAYS = {"OK": 1.5, "HOLD": 6, "INVESTIGATE": 8}
+MAX_HARVEST_AGE_DAYS = 30
+HISTORY_DAYS = 180
+
+
+def default_farm_count(lots: int) -> int:
+    return max(15, lots // 100)
+
+
+def default_node_count(lots: int) -> int:
+    """Node rantai pasok (pengumpul / processor / eksportir), selain node farm."""
+    return max(14, lots // 2000)
+
+
+def _chunks(total: int, size: int):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+class SyntheticDataGenerator:
+    """
+    Usage:
+        gen = SyntheticDataGenerator(seed=42, batch_size=5000)
+        gen.generate(lots=100_000)   # farm & node default mengikuti jumlah lot
+    Pemanggilan berikutnya menambah data (lot_id melanjutkan nomor terakhir).
+    """
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        batch_size: int = 5000,
+        prefix: str = "LOT-SYN",
+        creator=None,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.creator = creator
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.counts: Dict[str, int] = {}
+        # farm pk -> bobot profil lot (dari FARM_TIERS)
+        self.farm_profiles: Dict[int, Tuple[int, ...]] = {}
+
+    def _count(self, key: str, n: int):
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    # === Node & Farm ===
+
+    def create_nodes(self, count: int) -> Dict[str, List[Node]]:
+        # proporsi tipe node kira-kira seperti data dummy: 5 pengumpul, 5 processor, 4 eksportir
+        types = ["COLLECTOR"] * 5 + ["PROCESSOR"] * 5 + ["EXPORTER"] * 4
+        names = {"COLLECTOR": "Pengumpul", "PROCESSOR": "PT Processing", "EXPORTER": "PT Export"}
+        start = Node.objects.exclude(type="FARM").count()
+        nodes = []
+        for i in range(start, start + count):
+            node_type = types[i % len(types)]
+            known = NODE_NAMES[node_type]
+            # urutan node ini di antara node setipe
+            nth = i // len(types) * types.count(node_type) + types[: i % len(types)].count(node_type)
+            name = known[nth] if nth < len(known) else f"{names[node_type]} {i + 1}"
+            nodes.append(Node(name=name, type=node_type))
+        Node.objects.bulk_create(nodes, batch_size=self.batch_size)
+        self._count("nodes", len(nodes))
+
+        by_type: Dict[str, List[Node]] = {"COLLECTOR": [], "PROCESSOR": [], "EXPORTER": []}
+        for node in Node.objects.exclude(type="FARM").only("pk", "type"):
+            by_type[node.type].append(node)
+        return by_type
+
+    def create_farms(self, count: int) -> List[Farm]:
+        rng = self.rng
+        start = Farm.objects.count()
+        farm_nodes = [
+            Node(name=FARM_NAMES[i] if i < len(FARM_NAMES) else f"Tambak {i + 1}", type="FARM")
+            for i in range(start, start + count)
+        ]
+        Node.objects.bulk_create(farm_nodes, batch_size=self.batch_size)
+        farms = [
+            Farm(
+                node=node,
+                name=node.name,
+                location=rng.choice(LOCATIONS),
+                owner_name=rng.choice(OWNERS),
+            )
+            for node in farm_nodes
+        ]
+        Farm.objects.bulk_create(farms, batch_size=self.batch_size)
+        tiers = rng.choices([w for _, w in FARM_TIERS], [n for n, _ in FARM_TIERS], k=len(farms))
+        self.farm_profiles.update(zip((farm.pk for farm in farms), tiers))
+        self._count("farms", len(farms))
+        return farms
+
+    def create_pond_logs(self, farms: List[Farm], per_farm=(20, 40)):
+        rng = self.rng
+        base_date = (self.now - timedelta(days=HISTORY_DAYS)).date()
+        logs = []
+        for farm in farms:
+            for _ in range(rng.randint(*per_farm)):
+                logs.append(
+                    PondLog(
+                        farm=farm,
+                        date=base_date + timedelta(days=rng.randint(0, HISTORY_DAYS)),
+                        # sesekali di luar rentang aman (pH 7-8.5, salinitas 10-30 ppt)
+                        ph=round(rng.gauss(7.7, 0.25), 2),
+                        temperature_c=round(rng.uniform(26.0, 32.0), 1),
+                        salinity_ppt=round(rng.gauss(20.0, 3.0), 1),
+                        feed_type=rng.choice(["Pelet Komersial", "Pelet Khusus", "Natural Feed"]),
+                        chemicals_used=rng.choice(["Probiotik", "Kapur", "Tidak ada", "Vitamin C"]),
+                        notes=rng.choice(["Kondisi normal", "Udang aktif", "Warna air sedikit keruh", ""]),
+                    )
+                )
+            if len(logs) >= self.batch_size:
+                PondLog.objects.bulk_create(logs, batch_size=self.batch_size)
+                self._count("pond_logs", len(logs))
+                logs = []
+        PondLog.objects.bulk_create(logs, batch_size=self.batch_size)
+        self._count("pond_logs", len(logs))
+
+    def create_documents(self, farms: List[Farm]):
+        rng = self.rng
+        documents = []
+        for farm in farms:
+            if rng.random() < 0.66:
+                issue_date = (self.now - timedelta(days=rng.randint(30, 365))).date()
+                documents.append(
+                    Document(
+                        doc_type=rng.choice(["FARM_CERT", "LAB_CERT"]),
+                        title=f"Sertifikat {farm.name} - {issue_date.year}",
+                        farm=farm,
+                        issued_by=rng.choice(["BPOM", "Kementerian KKP", "ISO Certification"]),
+                        issue_date=issue_date,
+                        expiry_date=issue_date + timedelta(days=365),
+                    )
+                )
+        Document.objects.bulk_create(documents, batch_size=self.batch_size)
+        self._count("documents", len(documents))
+
+    # === Lot & turunannya ===
+
+    def _lot_batch(self, start: int, size: int, farms: List[Farm]) -> Tuple[List[Lot], List[str]]:
+        """Lot baru (belum di-score) + profil kontaminasi per lot (sesuai kelas farm-nya)."""
+        rng = self.rng
+        today = self.now.date()
+        lots, profiles = [], []
+        for i in range(start, start + size):
+            farm = rng.choice(farms)
+            profile = rng.choices(PROFILES, self.farm_profiles[farm.pk])[0]
+            age = min(int(rng.expovariate(1 / HARVEST_AGE_MEAN_DAYS[profile])), MAX_HARVEST_AGE_DAYS)
+            profiles.append(profile)
+            lots.append(
+                Lot(
+                    lot_id=f"{self.prefix}-{i + 1:08d}",
+                    creator=self.creator,
+                    farm=farm,
+                    harvest_date=today - timedelta(days=age),
+                    volume_kg=round(rng.uniform(300, 3000), 2),
+                    jenis_kontaminasi=rng.choice(KONTAMINASI_TYPES) if profile != "OK" else "",
+                    # Lot.save() tidak dipanggil oleh bulk_create
+                    public_token=get_random_string(24),
+                )
+            )
+        return Lot.objects.bulk_create(lots), profiles
+
+    def _movements(self, lots: List[Lot], profiles: List[str], nodes: Dict[str, List[Node]]):
+        rng = self.rng
+        movements = []
+        for lot, profile in zip(lots, profiles):
+            base_time = timezone.make_aware(datetime.combine(lot.harvest_date, time.min))
+            steps = [
+                LotMovement(
+                    lot=lot,
+                    node=rng.choice(nodes["COLLECTOR"]),
+                    timestamp=base_time + timedelta(hours=rng.randint(6, 24)),
+                    location=lot.farm.location,
+                    quantity_kg=lot.volume_kg,
+                ),
+                LotMovement(
+                    lot=lot,
+                    node=rng.choice(nodes["PROCESSOR"]),
+                    timestamp=base_time + timedelta(days=1, hours=rng.randint(0, 48)),
+                    quantity_kg=lot.volume_kg * rng.uniform(0.85, 0.95),
+                ),
+            ]
+            if profile == "OK" and rng.random() > 0.3:
+                steps.append(LotMovement(
+                    lot=lot,
+                    node=rng.choice(nodes["EXPORTER"]),
+                    timestamp=base_time + timedelta(days=3, hours=rng.randint(0, 96)),
+                    quantity_kg=lot.volume_kg * rng.uniform(0.75, 0.85),
+                ))
+            # lot yang baru panen belum sampai ke node berikutnya
+            movements.extend(mv for mv in steps if mv.timestamp <= self.now)
+        LotMovement.objects.bulk_create(movements, batch_size=self.batch_size)
+        self._count("movements", len(movements))
+
+    def _test_value(self, limit: float, fail: bool) -> float:
+        rng = self.rng
+        if not fail:
+            return rng.uniform(0, limit * 0.8)
+        # batas 0 (harus tidak terdeteksi): nilai positif apa pun melanggar
+        return rng.uniform(limit * 1.05, limit * 1.5) if limit else rng.uniform(0.5, 5.0)
+
+    def _lab_results(self, lots: List[Lot], profiles: List[str]):
+        rng = self.rng
+        today = self.now.date()
+        critical = [p for p in TEST_PARAMETERS if p[0] in CRITICAL_PARAMETERS]
+        non_critical = [p for p in TEST_PARAMETERS if p[0] not in CRITICAL_PARAMETERS]
+        sampled = [
+            (lot, profile) for lot, profile in zip(lots, profiles) if rng.random() < SAMPLED_RATIO[profile]
+        ]
+        samplings = Sampling.objects.bulk_create([
+            Sampling(
+                lot=lot,
+                date=min(lot.harvest_date + timedelta(days=rng.randint(0, 2)), today),
+                location=lot.farm.location,
+                requested_by="Quality Control Team",
+                status=rng.choice(["SAMPLED", "SENT_TO_LAB"]),
+            )
+            for lot, _profile in sampled
+        ], batch_size=self.batch_size)
+
+        tests = []
+        for sampling, (_lot, profile) in zip(samplings, sampled):
+            # HOLD: satu parameter non-kritis melebihi batas; INVESTIGATE: satu
+            # parameter kritis (mikroba / antibiotik); sisanya sesuai batas
+            failing = None
+            if profile == "HOLD":
+                failing = rng.choice(non_critical)
+            elif profile == "INVESTIGATE":
+                failing = rng.choice(critical)
+            params = rng.sample([p for p in TEST_PARAMETERS if p != failing], k=rng.randint(3, 5))
+            if failing is not None:
+                params.append(failing)
+            for name, unit, limit in params:
+                value = self._test_value(limit, fail=(name, unit, limit) == failing)
+                tests.append(LabTest(
+                    sampling=sampling,
+                    parameter=name,
+                    value=round(value, 3),
+                    unit=unit,
+                    limit_value=limit,
+                    result="FAIL" if value > limit else "PASS",
+                ))
+        LabTest.objects.bulk_create(tests, batch_size=self.batch_size)
+        self._count("samplings", len(samplings))
+        self._count("lab_tests", len(tests))
+
+    def _incidents(self, lots: List[Lot], profiles: List[str]):
+        rng = self.rng
+        problematic = [lot for lot, profile in zip(lots, profiles) if profile in Lot.PROBLEMATIC_STATUSES]
+        incident_lots = [lot for lot in problematic if rng.random() < INCIDENT_RATIO]
+        incidents = Incident.objects.bulk_create([
+            Incident(
+                lot=lot,
+                incident_type=rng.choice(["EXPORT_REJECT", "LAB_FAIL", "COMPLAINT"]),
+                description=rng.choice(INCIDENT_DESCRIPTIONS),
+                date=min(lot.harvest_date + timedelta(days=rng.randint(1, 5)), self.now.date()),
+                status=rng.choice(["OPEN", "IN_PROGRESS", "CLOSED"]),
+            )
+            for lot in incident_lots
+        ], batch_size=self.batch_size)
+
+        related = []
+        for incident in incidents:
+            # ambil satu lebih banyak lalu buang lot insiden itu sendiri (tanpa menyalin daftar)
+            k = min(rng.randint(1, 3), len(problematic) - 1)
+            picked = [lot for lot in rng.sample(problematic, k=k + 1) if lot.pk != incident.lot_id]
+            for lot in picked[:k]:
+                related.append(IncidentRelatedLot(incident=incident, lot=lot))
+        IncidentRelatedLot.objects.bulk_create(related, batch_size=self.batch_size)
+        self._count("incidents", len(incidents))
+        self._count("incident_related_lots", len(related))
+
+    def _lot_documents(self, lots: List[Lot], profiles: List[str]):
+        rng = self.rng
+        documents = [
+            Document(
+                doc_type="LAB_CERT",
+                title=f"Lab Test Result - {lot.lot_id}",
+                lot=lot,
+                issued_by="Lab Uji Standar",
+                issue_date=min(lot.harvest_date + timedelta(days=3), self.now.date()),
+            )
+            for lot, profile in zip(lots, profiles)
+            if profile in Lot.PROBLEMATIC_STATUSES and rng.random() < 0.15
+        ]
+        Document.objects.bulk_create(documents, batch_size=self.batch_size)
+        self._count("documents", len(documents))
+
+    # === Entry point ===
+
+    def generate(self, lots: int, farms: Optional[int] = None, nodes: Optional[int] = None) -> Dict[str, int]:
+        """
+        Tambahkan `lots` lot beserta farm, node & data turunannya (lot belum di-score).
+        Return: jumlah baris yang dibuat per entitas.
+        """
+        farms = max(1, default_farm_count(lots) if farms is None else farms)
+        # minimal satu node per tipe rantai pasok
+        nodes = max(3, default_node_count(lots) if nodes is None else nodes)
+
+        with transaction.atomic():
+            node_map = self.create_nodes(nodes)
+            farm_list = self.create_farms(farms)
+            self.create_pond_logs(farm_list)
+            self.create_documents(farm_list)
+        self.log(f"{nodes} node, {farms} farm, {self.counts.get('pond_logs', 0)} PondLog dibuat")
+
+        start = Lot.objects.filter(lot_id__startswith=f"{self.prefix}-").count()
+        for offset, size in _chunks(lots, self.batch_size):
+            with transaction.atomic():
+                batch, profiles = self._lot_batch(start + offset, size, farm_list)
+                self._movements(batch, profiles, node_map)
+                self._lab_results(batch, profiles)
+                self._incidents(batch, profiles)
+                self._lot_documents(batch, profiles)
+            self._count("lots", len(batch))
+            self.log(f"  {offset + size}/{lots} lot")
+
+        rebuild_farm_stats()
+        rebuild_node_stats()
+        return dict(self.counts)
@@ -0,0 +1,157 @@
+"""
+Penyimpanan telemetri sensor tambak (pH, suhu, salinitas per menit per kolam).
+
+- Satu PondTelemetryChunk per (farm, kolam, hari) berisi array float32 lebar
+  tetap [metrik][menit] = 3 x 1440 (NaN = kosong), bukan satu baris per
+  pembacaan (~17 KB per kolam per hari).
+- Rollup per jam & per hari (jumlah sampel / min / max / mean, plus menit di
+  luar rentang aman untuk pH & salinitas) dihitung dari chunk dengan NumPy.
+- water_quality_summary() membaca rollup per jam 24 jam terakhir untuk faktor
+  kualitas air risk engine.
+Ingest batch ada di tracker/telemetry_ingest.py.
+"""
+
+import warnings
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import PondTelemetryRollup
+
+METRICS = ("ph", "temperature_c", "salinity_ppt")
+SLOTS_PER_DAY = 24 * 60
+DTYPE = np.dtype("<f4")
+WINDOW_HOURS = 24
+
+# metrik yang punya rentang aman (kolom *_out di rollup)
+RANGED_METRICS = ("ph", "salinity_ppt")
+ROLLUP_FIELDS = [
+    f"{metric}_{agg}" for metric in METRICS for agg in ("count", "min", "max", "mean")
+] + [f"{metric}_out" for metric in RANGED_METRICS]
+
+_CHUNK = 500
+
+
+def empty_chunk() -> np.ndarray:
+    return np.full((len(METRICS), SLOTS_PER_DAY), np.nan, dtype=DTYPE)
+
+
+def decode_chunk(data) -> np.ndarray:
+    # salinan agar array bisa ditulis (frombuffer read-only)
+    return np.frombuffer(bytes(data), dtype=DTYPE).reshape(len(METRICS), SLOTS_PER_DAY).copy()
+
+
+def slot_of(moment: datetime) -> Tuple[date, int]:
+    """Timestamp -> (tanggal chunk, menit ke-n dalam hari itu) di zona waktu proyek."""
+    local = timezone.localtime(moment)
+    return local.date(), local.hour * 60 + local.minute
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+# === rollup ===
+
+def _aggregate(values: np.ndarray, axis: int):
+    """values [..., n] -> (count, min, max, mean) per baris; None kalau kosong."""
+    count = (~np.isnan(values)).sum(axis=axis)
+    with warnings.catch_warnings():
+        # baris tanpa data -> NaN (dijadikan None), bukan peringatan
+        warnings.simplefilter("ignore", RuntimeWarning)
+        low = np.nanmin(values, axis=axis)
+        high = np.nanmax(values, axis=axis)
+        mean = np.nanmean(values, axis=axis)
+    return count, low, high, mean
+
+
+def _out_of_range(values: np.ndarray, safe_range: Tuple[float, float], axis: int) -> np.ndarray:
+    low, high = safe_range
+    with np.errstate(invalid="ignore"):
+        return (~np.isnan(values) & ((values < low) | (values > high))).sum(axis=axis)
+
+
+def _nullable(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def build_rollups(
+    farm_id: int,
+    pond: str,
+    day: date,
+    chunk: np.ndarray,
+    safe_ranges: Dict[str, Tuple[float, float]],
+) -> List[PondTelemetryRollup]:
+    """24 rollup per jam + 1 rollup harian untuk satu chunk; safe_ranges per RANGED_METRICS."""
+    start = _day_start(day)
+    hourly = {"H": chunk.reshape(len(METRICS), 24, 60), "D": chunk.reshape(len(METRICS), 1, SLOTS_PER_DAY)}
+    rollups = []
+    for period, blocks in hourly.items():
+        fields: Dict[str, Any] = {}
+        for i, metric in enumerate(METRICS):
+            count, low, high, mean = _aggregate(blocks[i], axis=1)
+            fields[metric] = (count, low, high, mean)
+            if metric in RANGED_METRICS:
+                fields[f"{metric}_out"] = _out_of_range(blocks[i], safe_ranges[metric], axis=1)
+        for n in range(blocks.shape[1]):
+            values = {"farm_id": farm_id, "pond": pond, "period": period}
+            values["start"] = start + timedelta(hours=n) if period == "H" else start
+            for metric in METRICS:
+                count, low, high, mean = fields[metric]
+                values[f"{metric}_count"] = int(count[n])
+                values[f"{metric}_min"] = _nullable(low[n])
+                values[f"{metric}_max"] = _nullable(high[n])
+                values[f"{metric}_mean"] = _nullable(mean[n])
+            for metric in RANGED_METRICS:
+                values[f"{metric}_out"] = int(fields[f"{metric}_out"][n])
+            rollups.append(PondTelemetryRollup(**values))
+    return rollups
+
+
+# === ringkasan untuk risk engine ===
+
+def window_bounds(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    Jendela rollup per jam [awal, akhir): WINDOW_HOURS jam penuh sampai dengan
+    jam berjalan. Dengan `now` di masa lalu hasilnya jendela pada saat itu.
+    """
+    now = timezone.localtime(now or timezone.now())
+    end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return end - timedelta(hours=WINDOW_HOURS), end
+
+
+def water_quality_summary(farm_ids: Iterable[int], now: Optional[datetime] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    farm_id -> {"<metrik>_share": porsi menit di luar rentang aman 24 jam terakhir
+    (None kalau tidak ada sampel), "<metrik>_count": jumlah sampel}
+    untuk RANGED_METRICS, gabungan semua kolam. Farm tanpa telemetri tidak ada di hasil.
+    `now` di masa lalu -> ringkasan jendela pada saat itu (rescore_water_quality).
+    """
+    farm_ids = sorted({fid for fid in farm_ids if fid is not None})
+    sums = {}
+    for metric in RANGED_METRICS:
+        sums[f"{metric}_count"] = Sum(f"{metric}_count")
+        sums[f"{metric}_out"] = Sum(f"{metric}_out")
+
+    summary: Dict[int, Dict[str, Any]] = {}
+    since, until = window_bounds(now)
+    for start in range(0, len(farm_ids), _CHUNK):
+        rows = (
+            PondTelemetryRollup.objects.filter(
+                farm_id__in=farm_ids[start:start + _CHUNK], period="H", start__gte=since, start__lt=until
+            )
+            .values("farm_id")
+            .annotate(**sums)
+        )
+        for row in rows:
+            entry = {}
+            for metric in RANGED_METRICS:
+                count = row[f"{metric}_count"] or 0
+                entry[f"{metric}_count"] = count
+                entry[f"{metric}_share"] = (row[f"{metric}_out"] or 0) / count if count else None
+            if any(entry[f"{metric}_count"] for metric in RANGED_METRICS):
+                summary[row["farm_id"]] = entry
+    return summary
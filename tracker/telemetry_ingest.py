@@ -0,0 +1,177 @@
+"""
+Ingest batch telemetri sensor tambak (POST /telemetry/).
+
+Satu kiriman berisi banyak pembacaan per menit dari banyak kolam:
+    {"readings": [
+        {"farm": 12, "pond": "K1", "timestamp": "2026-10-01T08:15:00+07:00",
+         "ph": 7.9, "temperature_c": 29.1, "salinity_ppt": 18.5}
+    ]}
+
+- Pembacaan dikelompokkan per (farm, kolam, hari); chunk terdampak dimuat
+  sekaligus, diisi dengan NumPy, lalu ditulis dengan bulk_create / bulk_update
+  dalam satu transaksi. Pembacaan di menit yang sama menimpa nilai sebelumnya,
+  jadi kiriman ulang aman.
+- Rollup per jam & per hari untuk chunk yang berubah dihitung ulang dan
+  di-upsert (bulk_create update_conflicts).
+- Hanya lot di farm yang flag kualitas airnya (risk_engine.water_quality_flags)
+  berubah karena batch ini yang ditandai lewat mark_lots_dirty.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import risk_engine
+from .models import Farm, Lot, PondTelemetryChunk, PondTelemetryRollup
+from .recompute import mark_lots_dirty
+from .telemetry import (
+    DTYPE,
+    METRICS,
+    ROLLUP_FIELDS,
+    build_rollups,
+    decode_chunk,
+    empty_chunk,
+    slot_of,
+    water_quality_summary,
+)
+
+# potongan parameter IN / bulk_*
+_CHUNK = 500
+
+Reading = Tuple[int, str, datetime, Tuple[Optional[float], ...]]
+ChunkKey = Tuple[int, str, date]
+
+
+class TelemetryError(ValueError):
+    pass
+
+
+def max_readings() -> int:
+    return getattr(settings, "TELEMETRY_MAX_READINGS", 50000)
+
+
+def _safe_ranges() -> Dict[str, Tuple[float, float]]:
+    return {"ph": risk_engine.PH_SAFE_RANGE, "salinity_ppt": risk_engine.SALINITY_SAFE_RANGE}
+
+
+def parse_readings(raw: Any) -> List[Reading]:
+    """
+    [{"farm": pk, "pond": "K1", "timestamp": ISO 8601, "ph", "temperature_c", "salinity_ppt"}, ...]
+    -> [(farm_id, pond, timestamp, (nilai per METRICS))]. TelemetryError kalau ada yang salah.
+    """
+    if not isinstance(raw, list):
+        raise TelemetryError("readings harus berupa list")
+    if len(raw) > max_readings():
+        raise TelemetryError(f"maksimal {max_readings()} pembacaan per kiriman")
+
+    readings = []
+    for i, item in enumerate(raw):
+        if not isinstance(item, dict):
+            raise TelemetryError(f"readings[{i}] harus berupa objek")
+        try:
+            farm_id = int(item.get("farm"))
+            moment = parse_datetime(str(item.get("timestamp") or ""))
+        except (TypeError, ValueError):
+            raise TelemetryError(f"readings[{i}]: farm / timestamp tidak valid")
+        if moment is None:
+            raise TelemetryError(f"readings[{i}]: timestamp harus ISO 8601")
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        values = []
+        for metric in METRICS:
+            value = item.get(metric)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise TelemetryError(f"readings[{i}].{metric} harus angka")
+            values.append(None if value is None else float(value))
+        pond = str(item.get("pond") or "").strip()[:50]
+        readings.append((farm_id, pond, moment, tuple(values)))
+
+    farm_ids = {r[0] for r in readings}
+    known = set(Farm.objects.filter(pk__in=farm_ids).values_list("pk", flat=True))
+    missing = sorted(farm_ids - known)
+    if missing:
+        raise TelemetryError(f"Farm tidak ditemukan: {', '.join(map(str, missing[:20]))}")
+    return readings
+
+
+def ingest_readings(readings: List[Reading]) -> Dict[str, int]:
+    """Simpan satu batch pembacaan (hasil parse_readings), perbarui rollup & tandai lot terdampak."""
+    grouped: Dict[ChunkKey, List[Tuple[int, Tuple[Optional[float], ...]]]] = defaultdict(list)
+    for farm_id, pond, moment, values in readings:
+        day, slot = slot_of(moment)
+        grouped[(farm_id, pond, day)].append((slot, values))
+    if not grouped:
+        return {"readings": 0, "chunks_created": 0, "chunks_updated": 0, "rollups": 0, "farms_rescored": 0}
+
+    farm_ids = sorted({key[0] for key in grouped})
+    days = sorted({key[2] for key in grouped})
+    safe_ranges = _safe_ranges()
+
+    with transaction.atomic():
+        before = water_quality_summary(farm_ids)
+
+        existing: Dict[ChunkKey, PondTelemetryChunk] = {}
+        for start in range(0, len(farm_ids), _CHUNK):
+            chunks = PondTelemetryChunk.objects.select_for_update().filter(
+                farm_id__in=farm_ids[start:start + _CHUNK], date__in=days
+            )
+            for chunk in chunks:
+                existing[(chunk.farm_id, chunk.pond, chunk.date)] = chunk
+
+        created, updated, rollups = [], [], []
+        for key, items in grouped.items():
+            chunk = existing.get(key)
+            array = decode_chunk(chunk.data) if chunk is not None else empty_chunk()
+            slots = np.array([slot for slot, _ in items], dtype=int)
+            values = np.array(
+                [[np.nan if v is None else v for v in vals] for _, vals in items], dtype=DTYPE
+            ).T
+            for i in range(len(METRICS)):
+                # metrik kosong di pembacaan tidak menghapus nilai yang sudah ada
+                present = ~np.isnan(values[i])
+                array[i, slots[present]] = values[i][present]
+
+            if chunk is None:
+                chunk = PondTelemetryChunk(farm_id=key[0], pond=key[1], date=key[2])
+                created.append(chunk)
+            else:
+                updated.append(chunk)
+            chunk.data = array.tobytes()
+            rollups.extend(build_rollups(key[0], key[1], key[2], array, safe_ranges))
+
+        PondTelemetryChunk.objects.bulk_create(created, batch_size=_CHUNK)
+        if updated:
+            now = timezone.now()
+            for chunk in updated:
+                chunk.updated_at = now
+            PondTelemetryChunk.objects.bulk_update(updated, ["data", "updated_at"], batch_size=_CHUNK)
+        PondTelemetryRollup.objects.bulk_create(
+            rollups,
+            batch_size=_CHUNK,
+            update_conflicts=True,
+            unique_fields=["farm", "pond", "period", "start"],
+            update_fields=ROLLUP_FIELDS,
+        )
+
+        # hanya farm yang flag kualitas airnya berubah yang perlu di-score ulang
+        after = water_quality_summary(farm_ids)
+        changed_farms = [
+            fid for fid in farm_ids
+            if risk_engine.water_quality_flags(before.get(fid)) != risk_engine.water_quality_flags(after.get(fid))
+        ]
+        if changed_farms:
+            mark_lots_dirty(Lot.objects.filter(farm_id__in=changed_farms).values_list("pk", flat=True))
+
+    return {
+        "readings": len(readings),
+        "chunks_created": len(created),
+        "chunks_updated": len(updated),
+        "rollups": len(rollups),
+        "farms_rescored": len(changed_farms),
+    }
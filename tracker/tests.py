@@ -1,3 +1,739 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, transaction
+from asgiref.sync import async_to_sync
+from django.shortcuts import render
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Document,
+    Farm,
+    FarmStats,
+    Incident,
+    DirtyLot,
+    LabStandard,
+    LabTest,
+    Lot,
+    LotMovement,
+    LotRiskSnapshot,
+    Node,
+    NodeStats,
+    PondLog,
+    PondTelemetryChunk,
+    PondTelemetryRollup,
+    Sampling,
+)
+from . import concurrency, lab_ingest, views
+from .farm_stats import get_farm_stats, rebuild_farm_stats
+from .importer import DataImporter
+from .lab_standards import invalidate_lab_standards
+from .node_stats import get_node_stats, rebuild_node_stats
+from .recompute import water_window_lot_ids
+from .risk_engine import explain_lot_risk
+from .risk_history import FACTOR_BITS, factor_bitmask, record_risk_snapshots
+from .risk_vector import score_id_range
+
+
+class LotDetailQueryBudgetTests(TestCase):
+    """lot_detail harus memakai jumlah query yang sama berapa pun data lot-nya."""
+
+    def setUp(self):
+        self.farm = Farm.objects.create(name="Tambak Uji", location="Lampung")
+        self.nodes = [
+            Node.objects.create(name=f"Node {i}", type=node_type)
+            for i, node_type in enumerate(["FARM", "COLLECTOR", "PROCESSOR", "EXPORTER"])
+        ]
+        self.lot = Lot.objects.create(
+            lot_id="LOT-BUDGET-1",
+            farm=self.farm,
+            harvest_date=date.today() - timedelta(days=3),
+            volume_kg=500,
+        )
+        self.grown = 0
+
+    def _grow(self, n):
+        """Tambah n movement, n sampling (2 uji lab), n dokumen & n insiden ke lot."""
+        now = timezone.now()
+        for i in range(self.grown, self.grown + n):
+            LotMovement.objects.create(
+                lot=self.lot,
+                node=self.nodes[i % len(self.nodes)],
+                timestamp=now + timedelta(hours=i),
+            )
+            sampling = Sampling.objects.create(lot=self.lot, date=date.today() - timedelta(days=i))
+            LabTest.objects.create(sampling=sampling, parameter="TPC", value=1.0, limit_value=5.0)
+            LabTest.objects.create(sampling=sampling, parameter="Pb", value=0.1, limit_value=0.5)
+            Document.objects.create(doc_type="LAB_CERT", title=f"Sertifikat {i}", lot=self.lot)
+            Document.objects.create(doc_type="FARM_CERT", title=f"Izin {i}", farm=self.farm)
+            Incident.objects.create(
+                lot=self.lot,
+                incident_type="COMPLAINT",
+                description="Keluhan buyer",
+                date=date.today() - timedelta(days=i),
+            )
+        self.grown += n
+        # NodeStats dibangun saat pertama dibaca; bangun di sini agar yang diukur hanya view
+        rebuild_node_stats()
+
+    def _count_queries(self):
+        url = reverse("tracker:lot_detail", args=[self.lot.lot_id])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_constant_for_scored_lot(self):
+        self.lot.risk_score = 10
+        self.lot.risk_breakdown = [{"factor": "volume", "delta": 10, "message": "Volume besar"}]
+        self.lot.save()
+
+        self._grow(1)
+        baseline = self._count_queries()
+        self._grow(6)
+        self.assertEqual(self._count_queries(), baseline)
+
+    def test_query_count_constant_for_unscored_lot(self):
+        self._grow(1)
+        baseline = self._count_queries()
+        self._grow(6)
+        self.assertEqual(self._count_queries(), baseline)
+
+    def test_documents_without_farm_are_not_shared(self):
+        # lot tanpa tambak tidak boleh ikut menampilkan dokumen lot lain
+        other = Lot.objects.create(lot_id="LOT-BUDGET-2")
+        Document.objects.create(doc_type="OTHER", title="Milik lot lain", lot=other)
+        orphan = Lot.objects.create(lot_id="LOT-BUDGET-3")
+
+        response = self.client.get(reverse("tracker:lot_detail", args=[orphan.lot_id]))
+        self.assertEqual(response.context["documents"], [])
+
+
+class AsyncDetailViewTests(TransactionTestCase):
+    """
+    lot_detail_async / farm_detail_async (dipakai kalau ASYNC_VIEWS aktif) harus
+    menghasilkan context & jumlah query yang sama dengan view sinkron. Bagian
+    halaman jalan di thread & koneksi DB sendiri, jadi data harus sudah commit
+    (TransactionTestCase).
+    """
+
+    # standar lab dari migrasi 0006 dipulihkan untuk test lain
+    serialized_rollback = True
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.farm = Farm.objects.create(name="Tambak Async", location="Gresik")
+        nodes = [Node.objects.create(name=f"Node Async {i}", type="COLLECTOR") for i in range(3)]
+        PondLog.objects.create(farm=self.farm, date=date.today(), ph=7.5, salinity_ppt=20)
+        self.lot = Lot.objects.create(
+            lot_id="LOT-ASYNC-1", farm=self.farm, harvest_date=date.today() - timedelta(days=2), volume_kg=700
+        )
+        Lot.objects.create(lot_id="LOT-ASYNC-2", farm=self.farm, harvest_date=date.today(), volume_kg=300)
+        now = timezone.now()
+        for i, node in enumerate(nodes):
+            LotMovement.objects.create(lot=self.lot, node=node, timestamp=now + timedelta(hours=i))
+        sampling = Sampling.objects.create(lot=self.lot, date=date.today())
+        LabTest.objects.create(sampling=sampling, parameter="TPC", value=1.0, limit_value=5.0)
+        Document.objects.create(doc_type="FARM_CERT", title="Izin tambak", farm=self.farm)
+        Incident.objects.create(lot=self.lot, incident_type="COMPLAINT", description="Keluhan", date=date.today())
+        rebuild_node_stats()
+        rebuild_farm_stats()
+        self.thread_queries = 0
+        self._lock = threading.Lock()
+
+    def _run_counted(self, func, *args):
+        # query di thread pekerja (koneksi per thread) ikut dihitung
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args)
+        with self._lock:
+            self.thread_queries += len(ctx.captured_queries)
+        return result
+
+    def _call(self, view, path, *args):
+        """Panggil view (sync / async) -> (context yang di-render, jumlah query semua thread)."""
+        request = self.factory.get(path)
+        if view in (views.lot_detail_async, views.farm_detail_async):
+            view = async_to_sync(view)
+        self.thread_queries = 0
+        real_run = concurrency._run_with_own_connection
+        with mock.patch("tracker.views.render", wraps=render) as rendered, mock.patch(
+            "tracker.concurrency._run_with_own_connection",
+            side_effect=lambda func, *a: real_run(self._run_counted, func, *a),
+        ):
+            with CaptureQueriesContext(connection) as ctx:
+                response = view(request, *args)
+        self.assertEqual(response.status_code, 200)
+        return rendered.call_args.args[2], len(ctx.captured_queries) + self.thread_queries
+
+    def test_lot_detail_async_matches_sync(self):
+        path = reverse("tracker:lot_detail", args=[self.lot.lot_id])
+        # panggilan pertama mengisi cache proses (standar lab); yang dibandingkan panggilan berikutnya
+        self._call(views.lot_detail, path, self.lot.lot_id)
+        async_context, async_queries = self._call(views.lot_detail_async, path, self.lot.lot_id)
+        self.assertGreater(self.thread_queries, 0)
+        sync_context, sync_queries = self._call(views.lot_detail, path, self.lot.lot_id)
+        self.assertEqual(async_context, sync_context)
+        self.assertEqual(async_queries, sync_queries)
+
+    def test_lot_detail_async_scores_unscored_lot_in_worker_thread(self):
+        # lot belum di-score & FarmStats belum ada -> thread pekerja menulis FarmStats
+        Lot.objects.filter(pk=self.lot.pk).update(risk_breakdown=[])
+        FarmStats.objects.filter(farm=self.farm).delete()
+        path = reverse("tracker:lot_detail", args=[self.lot.lot_id])
+        async_context, _queries = self._call(views.lot_detail_async, path, self.lot.lot_id)
+        self.assertTrue(FarmStats.objects.filter(farm=self.farm).exists())
+        self.assertTrue(async_context["risk_info"]["factors"])
+        sync_context, _queries = self._call(views.lot_detail, path, self.lot.lot_id)
+        self.assertEqual(async_context, sync_context)
+
+    def test_farm_detail_async_matches_sync(self):
+        path = reverse("tracker:farm_detail", args=[self.farm.pk])
+        self._call(views.farm_detail, path, self.farm.pk)
+        async_context, async_queries = self._call(views.farm_detail_async, path, self.farm.pk)
+        sync_context, sync_queries = self._call(views.farm_detail, path, self.farm.pk)
+        self.assertEqual(async_context, sync_context)
+        self.assertEqual(async_queries, sync_queries)
+
+
+class RiskRecomputeTests(TestCase):
+    """Tanda dirty digabung per transaksi; mode default mengantrekan ke worker."""
+
+    def setUp(self):
+        self.farm = Farm.objects.create(name="Tambak Dirty", location="Pati")
+        self.lots = [Lot.objects.create(lot_id=f"LOT-DIRTY-{i}", farm=self.farm) for i in range(3)]
+
+    def _burst(self):
+        # banyak baris input dalam satu transaksi
+        for lot in self.lots:
+            Incident.objects.create(lot=lot, incident_type="COMPLAINT", description="Keluhan", date=date(2026, 10, 1))
+        PondLog.objects.create(farm=self.farm, date=date(2026, 10, 1), ph=9.3)
+
+    def test_deferred_by_default_one_queue_row_per_lot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._burst()
+        self.assertEqual(
+            sorted(DirtyLot.objects.values_list("lot_id", flat=True)), [lot.pk for lot in self.lots]
+        )
+
+    @override_settings(RISK_RECOMPUTE_MODE="immediate")
+    def test_immediate_mode_recomputes_once_per_transaction(self):
+        with mock.patch("tracker.recompute.recompute_lots") as recompute:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._burst()
+        recompute.assert_called_once_with([lot.pk for lot in self.lots])
+
+    @override_settings(RISK_RECOMPUTE_MODE="immediate")
+    def test_rolled_back_savepoint_does_not_drop_later_marks(self):
+        with mock.patch("tracker.recompute.recompute_lots") as recompute:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        PondLog.objects.create(farm=self.farm, date=date(2026, 10, 1), ph=9.3)
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                Sampling.objects.create(lot=self.lots[0], date=date(2026, 10, 1))
+        recompute.assert_called_once_with([self.lots[0].pk])
+
+    @override_settings(RISK_RECOMPUTE_MODE="immediate")
+    def test_incident_rescores_lot_after_commit(self):
+        lot = Lot.objects.create(lot_id="LOT-RECOMPUTE-1")
+        with self.captureOnCommitCallbacks(execute=True):
+            Incident.objects.create(lot=lot, incident_type="LAB_FAIL", description="Uji ulang", date=date(2026, 10, 1))
+        lot.refresh_from_db()
+        self.assertTrue(any(f["factor"] == "incident" for f in lot.risk_breakdown))
+        self.assertFalse(DirtyLot.objects.exists())
+
+
+class LotRiskHistoryTests(TestCase):
+    """Endpoint JSON riwayat skor risiko (grafik di halaman detail lot)."""
+
+    def setUp(self):
+        self.lot = Lot.objects.create(lot_id="LOT-HISTORY-1")
+        LotRiskSnapshot.objects.all().delete()
+        self.url = reverse("tracker:lot_risk_history_json", args=[self.lot.lot_id])
+
+    def test_downsamples_keeping_peak_and_decodes_factors(self):
+        start = timezone.now() - timedelta(hours=10)
+        lab_and_incident = FACTOR_BITS["lab"] | FACTOR_BITS["incident"]
+        for hour, score in enumerate([10, 20, 95, 30, 40, 50, 15, 25, 35, 45]):
+            bits = lab_and_incident if score == 95 else FACTOR_BITS["volume"]
+            record_risk_snapshots([(self.lot.pk, score, "LOW", bits)], taken_at=start + timedelta(hours=hour))
+
+        points = self.client.get(self.url, {"points": 3}).json()["points"]
+        self.assertEqual(len(points), 3)
+        # skor tertinggi per ember dipertahankan
+        self.assertEqual([p["score"] for p in points], [95, 50, 45])
+        self.assertEqual(points[0]["factors"], ["lab", "incident"])
+        self.assertEqual(points[1]["factors"], ["volume"])
+
+        full = self.client.get(self.url).json()["points"]
+        self.assertEqual(len(full), 10)
+        self.assertEqual(full[0]["taken_at"], start.isoformat())
+
+    def test_unknown_lot_returns_404(self):
+        url = reverse("tracker:lot_risk_history_json", args=["LOT-TIDAK-ADA"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class FarmStatsTests(TestCase):
+    """FarmStats dipelihara incremental lewat signal Lot / Incident / PondLog."""
+
+    def setUp(self):
+        self.farm = Farm.objects.create(name="Tambak Stats", location="Jepara")
+
+    def test_delete_farm_with_pond_logs(self):
+        PondLog.objects.create(farm=self.farm, date=date(2026, 10, 1), ph=7.5)
+        PondLog.objects.create(farm=self.farm, date=date(2026, 10, 2), ph=9.1)
+        self.assertEqual(get_farm_stats([self.farm.pk])[self.farm.pk].last_ph, 9.1)
+
+        self.farm.delete()
+        self.assertFalse(FarmStats.objects.exists())
+        self.assertFalse(PondLog.objects.exists())
+
+    def _stats(self, farm=None):
+        return FarmStats.objects.filter(farm=farm or self.farm).values(
+            "lot_count", "problematic_lot_count", "incident_count", "open_incident_count"
+        ).get()
+
+    def _assert_matches_rebuild(self, *farms):
+        incremental = [self._stats(farm) for farm in farms]
+        rebuild_farm_stats([farm.pk for farm in farms])
+        self.assertEqual(incremental, [self._stats(farm) for farm in farms])
+
+    def test_lot_and_incident_deltas(self):
+        # baris dibuat dulu -> perubahan berikutnya diterapkan sebagai delta
+        get_farm_stats([self.farm.pk])
+        lot = Lot.objects.create(lot_id="LOT-STATS-1", farm=self.farm)
+        Lot.objects.create(lot_id="LOT-STATS-2", farm=self.farm, status="HOLD")
+        incident = Incident.objects.create(
+            lot=lot, incident_type="COMPLAINT", description="Keluhan", date=date(2026, 10, 1)
+        )
+        self.assertEqual(
+            self._stats(),
+            {"lot_count": 2, "problematic_lot_count": 1, "incident_count": 1, "open_incident_count": 1},
+        )
+
+        lot.status = "INVESTIGATE"
+        lot.save()
+        incident.status = "CLOSED"
+        incident.save()
+        self.assertEqual((self._stats()["problematic_lot_count"], self._stats()["open_incident_count"]), (2, 0))
+        self._assert_matches_rebuild(self.farm)
+
+        # cascade: insiden ikut terhapus bersama lot-nya
+        lot.delete()
+        self.assertEqual(
+            self._stats(),
+            {"lot_count": 1, "problematic_lot_count": 1, "incident_count": 0, "open_incident_count": 0},
+        )
+        self._assert_matches_rebuild(self.farm)
+
+    def test_lot_moved_to_other_farm(self):
+        other = Farm.objects.create(name="Tambak Lain", location="Rembang")
+        get_farm_stats([self.farm.pk, other.pk])
+        lot = Lot.objects.create(lot_id="LOT-STATS-3", farm=self.farm, status="HOLD")
+        Incident.objects.create(lot=lot, incident_type="LAB_FAIL", description="Gagal uji", date=date(2026, 10, 1))
+
+        lot.farm = other
+        lot.save()
+        self.assertEqual(self._stats()["lot_count"], 0)
+        self.assertEqual(
+            self._stats(other),
+            {"lot_count": 1, "problematic_lot_count": 1, "incident_count": 1, "open_incident_count": 1},
+        )
+        self._assert_matches_rebuild(self.farm, other)
+
+
+class NodeStatsTests(TestCase):
+    """NodeStats: satu lot dihitung sekali per node, delta status / insiden ke semua node yang dilewati."""
+
+    def setUp(self):
+        self.nodes = [Node.objects.create(name=f"Node Stats {i}", type="COLLECTOR") for i in range(2)]
+        self.lot = Lot.objects.create(lot_id="LOT-NODE-1")
+        self.time = timezone.now()
+        # baris dibuat dulu -> perubahan berikutnya diterapkan sebagai delta
+        rebuild_node_stats([node.pk for node in self.nodes])
+
+    def _move(self, node, hours=0):
+        return LotMovement.objects.create(lot=self.lot, node=node, timestamp=self.time + timedelta(hours=hours))
+
+    def _stats(self):
+        return [
+            (s.lot_count, s.problematic_count, s.open_incident_count)
+            for s in NodeStats.objects.filter(node__in=self.nodes).order_by("node_id")
+        ]
+
+    def _assert_matches_rebuild(self):
+        incremental = self._stats()
+        rebuild_node_stats([node.pk for node in self.nodes])
+        self.assertEqual(incremental, self._stats())
+
+    def test_repeat_visits_counted_once(self):
+        first = self._move(self.nodes[0])
+        self._move(self.nodes[0], hours=5)
+        self._move(self.nodes[1], hours=10)
+        self.assertEqual(self._stats(), [(1, 0, 0), (1, 0, 0)])
+
+        first.delete()
+        self.assertEqual(self._stats(), [(1, 0, 0), (1, 0, 0)])
+        self._assert_matches_rebuild()
+
+    def test_status_and_incident_deltas_reach_every_node(self):
+        self._move(self.nodes[0])
+        self._move(self.nodes[1], hours=1)
+        self.lot.status = "HOLD"
+        self.lot.save()
+        incident = Incident.objects.create(
+            lot=self.lot, incident_type="COMPLAINT", description="Keluhan", date=date(2026, 10, 1)
+        )
+        self.assertEqual(self._stats(), [(1, 1, 1), (1, 1, 1)])
+
+        incident.status = "CLOSED"
+        incident.save()
+        self.assertEqual(self._stats(), [(1, 1, 0), (1, 1, 0)])
+        self._assert_matches_rebuild()
+
+    def test_lot_delete_cascade(self):
+        # dua movement ke node yang sama tidak boleh dikurangkan dua kali
+        self._move(self.nodes[0])
+        self._move(self.nodes[0], hours=5)
+        self._move(self.nodes[1], hours=10)
+        Incident.objects.create(lot=self.lot, incident_type="LAB_FAIL", description="Gagal uji", date=date(2026, 10, 1))
+        self.lot.status = "INVESTIGATE"
+        self.lot.save()
+
+        self.lot.delete()
+        self.assertEqual(self._stats(), [(0, 0, 0), (0, 0, 0)])
+        self._assert_matches_rebuild()
+
+
+class RiskScoringParityTests(TestCase):
+    """Rescoring vektor (risk_vector, dipakai rescore_lots) harus sama dengan pipeline per-lot."""
+
+    def setUp(self):
+        # standar awal (migrasi 0006); cache proses bisa berisi standar dari test lain
+        invalidate_lab_standards()
+        clean = Farm.objects.create(name="Tambak Bersih", location="Jepara")
+        risky = Farm.objects.create(name="Tambak Berisiko", location="Tuban")
+        PondLog.objects.create(farm=risky, date=date.today(), ph=9.2, salinity_ppt=35)
+        for i in range(3):
+            Lot.objects.create(lot_id=f"LOT-PARITY-RIWAYAT-{i}", farm=risky, status="HOLD")
+
+        today = date.today()
+        # (farm, umur hari, volume, uji lab [(parameter, nilai, result)], status insiden)
+        specs = [
+            (clean, 1, 800, [("Timbal (Pb)", 0.1, "PASS")], None),
+            (clean, 4, 1500, [], None),
+            (clean, 8, 6000, [("Timbal (Pb)", 0.5, "PASS"), ("TPC", 9, "FAIL")], "CLOSED"),
+            (risky, 20, 300, [("Salmonella", 2, "FAIL")], None),
+            (risky, None, None, [], "OPEN"),
+            (None, 3, 2500, [("TPC", 1, "PASS")], None),
+        ]
+        for i, (farm, age, volume, tests, incident_status) in enumerate(specs):
+            lot = Lot.objects.create(
+                lot_id=f"LOT-PARITY-{i}",
+                farm=farm,
+                harvest_date=None if age is None else today - timedelta(days=age),
+                volume_kg=volume,
+            )
+            if tests:
+                sampling = Sampling.objects.create(lot=lot, date=today)
+                for parameter, value, result in tests:
+                    LabTest.objects.create(sampling=sampling, parameter=parameter, value=value, result=result)
+            if incident_status:
+                Incident.objects.create(
+                    lot=lot, incident_type="COMPLAINT", description="Keluhan", date=today, status=incident_status
+                )
+
+    def test_vector_matches_per_lot_pipeline(self):
+        # skor tersimpan mustahil -> semua lot muncul di hasil dry-run
+        Lot.objects.update(risk_score=-1)
+        lots = list(Lot.objects.order_by("pk"))
+        vector = {
+            row[0]: (row[5], row[6], row[7], row[8], row[9])
+            for row in score_id_range(0, lots[-1].pk, dry_run=True)["changed"]
+        }
+        self.assertEqual(len(vector), len(lots))
+        for lot in lots:
+            info = explain_lot_risk(lot)
+            expected = (
+                info["score"], info["risk_level"], info["status"], factor_bitmask(info["factors"]), info["factors"]
+            )
+            self.assertEqual(vector[lot.pk], expected, lot.lot_id)
+
+    def test_rescore_lots_writes_vector_results(self):
+        # satu potongan: semua lot dinilai dengan FarmStats sebelum ada yang ditulis
+        Lot.objects.update(risk_score=-1, risk_breakdown=[])
+        last_pk = Lot.objects.order_by("-pk").values_list("pk", flat=True).first()
+        expected = {row[0]: (row[5], row[6], row[7], row[9]) for row in score_id_range(0, last_pk)["changed"]}
+        call_command("rescore_lots", stdout=StringIO())
+        written = {
+            lot.pk: (lot.risk_score, lot.risk_level, lot.status, lot.risk_breakdown) for lot in Lot.objects.all()
+        }
+        self.assertEqual(written, expected)
+
+    def test_vector_breakdown_matches_telemetry_messages(self):
+        risky = Farm.objects.get(name="Tambak Berisiko")
+        # pH dari telemetri (45 dari 60 menit di luar rentang), salinitas tetap dari PondLog
+        PondTelemetryRollup.objects.create(
+            farm=risky, period="H", start=timezone.now().replace(minute=0, second=0, microsecond=0),
+            ph_count=60, ph_out=45,
+        )
+        Lot.objects.update(risk_score=-1)
+        lots = list(Lot.objects.filter(farm=risky).order_by("pk"))
+        vector = {row[0]: row[9] for row in score_id_range(0, lots[-1].pk, dry_run=True)["changed"]}
+        for lot in lots:
+            self.assertEqual(vector[lot.pk], explain_lot_risk(lot)["factors"], lot.lot_id)
+        messages = [item["message"] for item in vector[lots[0].pk]]
+        self.assertIn("pH air di luar rentang aman 75% waktu dalam 24 jam terakhir (+10)", messages)
+
+
+class ImportDataErrorsTests(TestCase):
+    """--errors berisi semua baris yang gagal; ringkasan di result / layar dibatasi."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.csv_path = os.path.join(tmpdir.name, "lots.csv")
+        self.errors_path = os.path.join(tmpdir.name, "errors.jsonl")
+        with open(self.csv_path, "w") as fh:
+            fh.write("lot_id,volume_kg\n")
+            fh.write("LOT-IMPORT-OK,100\n")
+            for i in range(30):
+                fh.write(f"LOT-IMPORT-{i},bukan-angka\n")
+
+    @mock.patch("tracker.importer.MAX_ERROR_DETAILS", 5)
+    def test_errors_file_streams_every_rejected_row(self):
+        stderr = StringIO()
+        call_command(
+            "import_data", self.csv_path, kind="lots", errors=self.errors_path,
+            stdout=StringIO(), stderr=stderr,
+        )
+
+        with open(self.errors_path) as fh:
+            errors = [json.loads(line) for line in fh]
+        self.assertEqual(len(errors), 30)
+        self.assertEqual([e["line"] for e in errors], list(range(3, 33)))
+        self.assertIn("... dan 10 error lainnya", stderr.getvalue())
+        self.assertTrue(Lot.objects.filter(lot_id="LOT-IMPORT-OK").exists())
+
+    @mock.patch("tracker.importer.MAX_ERROR_DETAILS", 5)
+    def test_result_keeps_capped_details(self):
+        importer = DataImporter(kind="lots")
+        with open(self.csv_path, newline="") as fh:
+            importer.load(fh, "csv")
+        result = importer.finish()
+        self.assertEqual((result.error_count, len(result.errors), result.more_errors), (30, 5, 25))
+
+
+class TokenIngestTestMixin:
+    """
+    Bagian bersama test endpoint ingest ber-token (lab, telemetri, scanner).
+    Subclass mengisi url_name, token & written_model, dan valid_payload().
+    """
+
+    url_name = None
+    token = None
+    # model yang ditulis endpoint; harus tetap kosong kalau token ditolak
+    written_model = None
+
+    def valid_payload(self):
+        raise NotImplementedError
+
+    def _post(self, payload, token=None, auth=True):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token or self.token}"} if auth else {}
+        return self.client.post(
+            reverse(f"tracker:{self.url_name}"),
+            json.dumps(payload),
+            content_type="application/json",
+            **headers,
+        )
+
+    def test_rejects_unknown_token(self):
+        self.assertEqual(self._post(self.valid_payload(), token="salah").status_code, 401)
+        self.assertEqual(self._post(self.valid_payload(), auth=False).status_code, 401)
+        self.assertFalse(self.written_model.objects.exists())
+
+
+@override_settings(LAB_INGEST_TOKENS=["lab-token"], RISK_RECOMPUTE_MODE="deferred")
+class LabResultsIngestTests(TokenIngestTestMixin, TestCase):
+    """Kiriman hasil lab massal: upsert berdasarkan external_id & dievaluasi terhadap standar."""
+
+    url_name = "lab_results_ingest"
+    token = "lab-token"
+    written_model = Sampling
+
+    def setUp(self):
+        self.lot = Lot.objects.create(lot_id="LOT-LAB-1")
+        LabStandard.objects.create(parameter="Pb", limit=0.2, severity=30)
+        self.payload = {
+            "samplings": [
+                {
+                    "external_id": "CERT-1",
+                    "lot_id": self.lot.lot_id,
+                    "date": "2026-10-01",
+                    "tests": [
+                        {"parameter": "Pb", "value": 0.3, "unit": "ppm", "result": "PASS"},
+                        {"parameter": "TPC", "value": 10, "limit_value": 100},
+                    ],
+                }
+            ]
+        }
+
+    def valid_payload(self):
+        return self.payload
+
+    def test_retry_does_not_duplicate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._post(self.payload).json()
+        self.assertEqual((first["samplings_created"], first["tests_created"]), (1, 2))
+        self.assertEqual(DirtyLot.objects.filter(lot=self.lot).count(), 1)
+
+        retry = self._post(self.payload).json()
+        self.assertEqual((retry["tests_created"], retry["tests_updated"], retry["unchanged"]), (0, 0, 3))
+        self.assertEqual(LabTest.objects.count(), 2)
+
+    def test_concurrent_retry_upserts_rows_created_after_read(self):
+        # kiriman lain sudah menulis baris yang sama setelah _existing membaca (masih kosong)
+        sampling = Sampling.objects.create(
+            lot=self.lot, date=date(2026, 9, 1), external_id="CERT-1", status="SENT_TO_LAB"
+        )
+        LabTest.objects.create(sampling=sampling, parameter="Pb", value=0.1, external_id="CERT-1:Pb")
+        real_existing = lab_ingest._existing
+
+        def stale_existing(model, external_ids, fields):
+            if fields in (lab_ingest.SAMPLING_FIELDS, lab_ingest.TEST_FIELDS):
+                return {}
+            return real_existing(model, external_ids, fields)
+
+        with mock.patch("tracker.lab_ingest._existing", side_effect=stale_existing):
+            response = self._post(self.payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Sampling.objects.get().date, date(2026, 10, 1))
+        self.assertEqual(
+            sorted(LabTest.objects.values_list("external_id", "sampling_id", "value")),
+            [("CERT-1:Pb", sampling.pk, 0.3), ("CERT-1:TPC", sampling.pk, 10.0)],
+        )
+
+    def test_results_follow_standards(self):
+        self._post(self.payload)
+        results = dict(LabTest.objects.values_list("parameter", "result"))
+        # Pb punya standar (limit 0.2) -> FAIL walau lab mengirim PASS
+        self.assertEqual(results, {"Pb": "FAIL", "TPC": "PASS"})
+        self.assertEqual(LabTest.objects.get(parameter="Pb").limit_value, 0.2)
+
+    def test_invalid_payload_writes_nothing(self):
+        self.payload["samplings"].append({"external_id": "CERT-2", "lot_id": "TIDAK-ADA", "date": "2026-10-01"})
+        response = self._post(self.payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"][0]["path"], "samplings[1].lot_id")
+        self.assertFalse(Sampling.objects.exists())
+
+
+@override_settings(TELEMETRY_TOKENS=["sensor-token"], RISK_RECOMPUTE_MODE="deferred")
+class TelemetryIngestTests(TokenIngestTestMixin, TestCase):
+    """Telemetri per menit disimpan per chunk harian & faktor kualitas air membaca rollup 24 jam."""
+
+    url_name = "telemetry_ingest"
+    token = "sensor-token"
+    written_model = PondTelemetryChunk
+
+    def setUp(self):
+        self.farm = Farm.objects.create(name="Tambak Sensor", location="Lampung")
+        self.lot = Lot.objects.create(lot_id="LOT-SENSOR-1", farm=self.farm)
+        self.hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+    def _readings(self, ph):
+        return [
+            {"farm": self.farm.pk, "pond": "K1", "timestamp": (self.hour + timedelta(minutes=m)).isoformat(),
+             "ph": value, "salinity_ppt": 20}
+            for m, value in enumerate(ph)
+        ]
+
+    def valid_payload(self):
+        return {"readings": self._readings([7.5])}
+
+    def test_readings_share_one_chunk_and_rollup(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self._post({"readings": self._readings([7.5] * 30 + [9.5] * 30)}).json()
+        self.assertEqual((result["chunks_created"], result["farms_rescored"]), (1, 1))
+        self.assertEqual(PondTelemetryChunk.objects.count(), 1)
+        self.assertTrue(DirtyLot.objects.filter(lot=self.lot).exists())
+
+        hourly = PondTelemetryRollup.objects.get(period="H", start=self.hour)
+        self.assertEqual((hourly.ph_count, hourly.ph_out, hourly.salinity_ppt_out), (60, 30, 0))
+        self.assertAlmostEqual(hourly.ph_mean, 8.5)
+
+        factors = [f["message"] for f in explain_lot_risk(self.lot)["factors"] if f["factor"] == "water_quality"]
+        self.assertEqual(factors, ["pH air di luar rentang aman 50% waktu dalam 24 jam terakhir (+10)"])
+
+    def test_retry_overwrites_same_minutes(self):
+        self._post({"readings": self._readings([9.5] * 10)})
+        result = self._post({"readings": self._readings([7.5] * 10)}).json()
+        self.assertEqual((result["chunks_created"], result["chunks_updated"]), (0, 1))
+        self.assertEqual(PondTelemetryRollup.objects.get(period="D").ph_out, 0)
+
+    def test_window_rescore_after_bad_readings_expire(self):
+        self.hour -= timedelta(hours=30)
+        self._post({"readings": self._readings([9.5] * 60)})
+        scored_at = self.hour + timedelta(hours=1)
+        self.assertEqual(water_window_lot_ids(scored_at, scored_at + timedelta(hours=1)), [])
+        # pembacaan buruk sudah keluar dari jendela 24 jam -> lot perlu di-score ulang
+        self.assertEqual(water_window_lot_ids(scored_at, timezone.now()), [self.lot.pk])
+
+    def test_rejects_unknown_farm(self):
+        response = self._post({"readings": [{"farm": 999, "timestamp": self.hour.isoformat(), "ph": 7}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PondTelemetryChunk.objects.exists())
+
+
+@override_settings(SCAN_TOKENS=["scanner-token"], SCAN_DEDUPE_SECONDS=600, RISK_RECOMPUTE_MODE="deferred")
+class ScanBatchIngestTests(TokenIngestTestMixin, TestCase):
+    """Batch scan checkpoint: scan berulang dilewati, turunan diperbarui sekali per batch."""
+
+    url_name = "scan_batch_ingest"
+    token = "scanner-token"
+    written_model = LotMovement
+
+    def setUp(self):
+        self.node = Node.objects.create(name="Pabrik Uji", type="PROCESSOR")
+        self.lots = [Lot.objects.create(lot_id=f"LOT-SCAN-{i}") for i in range(3)]
+        self.time = timezone.now().replace(microsecond=0)
+        rebuild_node_stats([self.node.pk])
+
+    def _scan(self, lot, minutes=0, by_token=True):
+        key = {"public_token": lot.public_token} if by_token else {"lot_id": lot.lot_id}
+        return {**key, "node": self.node.pk, "timestamp": (self.time + timedelta(minutes=minutes)).isoformat()}
+
+    def valid_payload(self):
+        return {"scans": [self._scan(lot) for lot in self.lots]}
+
+    def test_duplicates_skipped_and_stats_updated_once(self):
+        scans = [self._scan(lot) for lot in self.lots] + [
+            self._scan(self.lots[0], minutes=2),
+            self._scan(self.lots[1], minutes=5, by_token=False),
+            self._scan(self.lots[0], minutes=30),
+            {"lot_id": "TIDAK-ADA", "node": self.node.pk},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self._post({"scans": scans}).json()
+        self.assertEqual((result["created"], result["duplicates"], result["rejected_count"]), (4, 2, 1))
+        self.assertEqual(result["rejected"][0]["index"], 6)
+        self.assertEqual(LotMovement.objects.count(), 4)
+        self.assertEqual(get_node_stats([self.node.pk])[self.node.pk].lot_count, 3)
+        self.assertEqual(DirtyLot.objects.count(), 3)
+
+        # kiriman ulang tidak menambah movement
+        retry = self._post({"scans": scans}).json()
+        self.assertEqual((retry["created"], retry["duplicates"]), (0, 6))
+        self.assertEqual(LotMovement.objects.count(), 4)
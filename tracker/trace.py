@@ -0,0 +1,115 @@
+"""
+Data jejak (trace) lot dalam bentuk yang dipakai static/tracker/js/lot_graph.js:
+  nodes: [{"id", "name", "type"}]
+  links: [{"source", "target", "timestamp"}]   (perpindahan node berurutan)
+plus daftar movements mentah.
+
+iter_lot_traces() mengambil banyak lot beserta seluruh movement-nya dengan
+SATU query berurutan (LEFT JOIN, urut lot lalu waktu) dan menghasilkan satu
+dict per lot secara bertahap, jadi memori tetap datar berapa pun jumlah lot.
+"""
+
+import json
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from .models import Lot
+
+CHUNK_SIZE = 2000
+
+# query param filter -> lookup Lot
+TRACE_FILTERS = {
+    "status": "status",
+    "farm": "farm_id",
+    "harvest_from": "harvest_date__gte",
+    "harvest_to": "harvest_date__lte",
+}
+MAX_TRACE_LOT_IDS = 5000
+
+
+def build_trace(lot_id: str, status: str, movements: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """movements urut waktu: [{"timestamp", "node_id", "node", "type"}, ...]."""
+    nodes: Dict[int, Dict[str, Any]] = {}
+    links = []
+    previous = None
+    for mv in movements:
+        nodes.setdefault(mv["node_id"], {"id": mv["node_id"], "name": mv["node"], "type": mv["type"]})
+        if previous is not None and previous != mv["node_id"]:
+            links.append({"source": previous, "target": mv["node_id"], "timestamp": mv["timestamp"]})
+        previous = mv["node_id"]
+
+    return {
+        "lot_id": lot_id,
+        "status": status,
+        "movements": [
+            {"timestamp": mv["timestamp"], "node": mv["node"], "type": mv["type"]}
+            for mv in movements
+        ],
+        "nodes": list(nodes.values()),
+        "links": links,
+    }
+
+
+def iter_lot_traces(lots: QuerySet) -> Iterator[Dict[str, Any]]:
+    """Satu trace per lot (urut pk), termasuk lot tanpa movement."""
+    rows = lots.order_by("pk", "movements__timestamp", "movements__id").values_list(
+        "pk",
+        "lot_id",
+        "status",
+        "movements__node_id",
+        "movements__node__name",
+        "movements__node__type",
+        "movements__timestamp",
+    )
+
+    current_pk = None
+    current: Optional[tuple] = None
+    movements: List[Dict[str, Any]] = []
+    for pk, lot_id, status, node_id, node_name, node_type, timestamp in rows.iterator(chunk_size=CHUNK_SIZE):
+        if pk != current_pk:
+            if current is not None:
+                yield build_trace(*current, movements)
+            current_pk, current, movements = pk, (lot_id, status), []
+        if node_id is not None:
+            movements.append(
+                {
+                    "timestamp": timestamp.isoformat(),
+                    "node_id": node_id,
+                    "node": node_name,
+                    "type": node_type,
+                }
+            )
+    if current is not None:
+        yield build_trace(*current, movements)
+
+
+def filter_trace_lots(lot_ids: Iterable[str], filters: Dict[str, str]) -> QuerySet:
+    """Lot yang diminta: daftar lot_id, filter (TRACE_FILTERS), atau gabungan keduanya."""
+    lots = Lot.objects.all()
+    lot_ids = list(lot_ids)
+    if lot_ids:
+        lots = lots.filter(lot_id__in=lot_ids)
+    for param, lookup in TRACE_FILTERS.items():
+        value = filters.get(param)
+        if not value:
+            continue
+        if lookup.startswith("harvest_date"):
+            value = date.fromisoformat(value)
+        lots = lots.filter(**{lookup: value})
+    return lots
+
+
+def ndjson_lines(traces: Iterable[Dict[str, Any]], requested: Iterable[str] = ()) -> Iterator[str]:
+    """
+    Satu baris JSON per lot. lot_id yang diminta tapi tidak ditemukan
+    dilaporkan di akhir sebagai {"lot_id": ..., "error": "not_found"}.
+    """
+    missing = set(requested)
+    for trace in traces:
+        missing.discard(trace["lot_id"])
+        yield json.dumps(trace, cls=DjangoJSONEncoder) + "\n"
+    for lot_id in sorted(missing):
+        yield json.dumps({"lot_id": lot_id, "error": "not_found"}) + "\n"
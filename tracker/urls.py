@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -14,19 +15,37 @@ urlpatterns = [
     path("lots/", views.lot_list, name="lot_list"),
     path("lots/new/", views.lot_create, name="lot_create"),
     path("lots/contaminated/", views.contaminated_lots, name="contaminated_lots"),
+    path("lots/trace.ndjson", views.lot_trace_bulk, name="lot_trace_bulk"),
     path("trace/suspects/", views.suspect_nodes, name="suspect_nodes"),
-    path("lots/<str:lot_id>/", views.lot_detail, name="lot_detail"),
+    path("trace/suspects.json", views.suspect_nodes_json, name="suspect_nodes_json"),
+    path(
+        "lots/<str:lot_id>/",
+        views.lot_detail_async if settings.ASYNC_VIEWS else views.lot_detail,
+        name="lot_detail",
+    ),
     path("lots/<str:lot_id>/qr/", views.lot_qr, name="lot_qr"),
     path("lots/<str:lot_id>/trace.json", views.lot_trace_json, name="lot_trace_json"),
+    path("lots/<str:lot_id>/risk-history.json", views.lot_risk_history_json, name="lot_risk_history_json"),
 
     # FARMS
     path("farms/", views.farm_list, name="farm_list"),
-    path("farms/<int:pk>/", views.farm_detail, name="farm_detail"),
+    path(
+        "farms/<int:pk>/",
+        views.farm_detail_async if settings.ASYNC_VIEWS else views.farm_detail,
+        name="farm_detail",
+    ),
 
     # INCIDENTS
     path("incidents/", views.incident_list, name="incident_list"),
     path("incidents/<int:pk>/", views.incident_detail, name="incident_detail"),
 
+    # LAB INGEST (lab kontrak, token)
+    path("lab/results/", views.lab_results_ingest, name="lab_results_ingest"),
+    # TELEMETRI SENSOR TAMBAK (gateway, token)
+    path("telemetry/", views.telemetry_ingest, name="telemetry_ingest"),
+    # SCAN CHECKPOINT (scanner genggam, token)
+    path("scans/", views.scan_batch_ingest, name="scan_batch_ingest"),
+
     # PUBLIC VIEW
     path("public/lot/<str:token>/", views.public_lot, name="public_lot"),
 ]
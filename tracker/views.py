@@ -1,13 +1,34 @@
-import base64
-import io
-
-import qrcode
-from django.db.models import Count, Q
-from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
-from django.shortcuts import get_object_or_404, redirect, render
+import hmac
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
 from django.urls import reverse
-
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from .concurrency import gather_in_threads
+from .dashboard import get_dashboard_snapshot
 from .forms import LotForm
+from .lab_ingest import MAX_REPORTED_ERRORS, IngestError, ingest_lab_results
+from .scan_ingest import ScanError, ingest_scans, parse_scans
+from .telemetry_ingest import TelemetryError, ingest_readings, parse_readings
 from .models import (
     Document,
     Farm,
@@ -16,13 +37,29 @@ from .models import (
     LabTest,
     Lot,
     LotMovement,
-    Node,
 )
+from .pagination import keyset_paginate, page_size_from
+from .public_page import get_public_page
+from .qr_cache import get_lot_qr
 from .risk_engine import (
-    calculate_lot_risk,
-    explain_lot_risk,
+    assign_lot_risk,
+    explain_lots_risk,
     estimate_node_contamination_probabilities,
+    stored_lot_risk,
 )
+from .risk_history import lot_risk_series
+from .supply_graph import SupplyGraph, default_window_days
+from .trace import (
+    MAX_TRACE_LOT_IDS,
+    TRACE_FILTERS,
+    build_trace,
+    filter_trace_lots,
+    iter_lot_traces,
+    ndjson_lines,
+)
+
+
+LOT_LIST_ORDERING = ("-created_at", "-id")
 
 
 # ============ HOME REDIRECT ============
@@ -33,22 +70,70 @@ def home_redirect(request):
 
 # ============ LOT CORE ============
 
+def _page_url(request, **params):
+    """URL halaman ini dengan query string yang sama, kecuali cursor."""
+    query = request.GET.copy()
+    for key in ("after", "before"):
+        query.pop(key, None)
+    for key, value in params.items():
+        if value:
+            query[key] = value
+    return f"{request.path}?{query.urlencode()}"
+
+
+def _lot_list_item(lot):
+    return {
+        "lot_id": lot.lot_id,
+        "url": reverse("tracker:lot_detail", args=[lot.lot_id]),
+        "farm": {"id": lot.farm_id, "name": lot.farm.name} if lot.farm_id else None,
+        "creator": lot.creator.username if lot.creator_id else None,
+        "status": lot.status,
+        "risk_level": lot.risk_level,
+        "risk_score": lot.risk_score,
+        "created_at": lot.created_at.isoformat(),
+    }
+
+
 def lot_list(request):
-    lots = Lot.objects.all().order_by("-created_at")
+    # farm & creator ditampilkan per baris -> join sekali, bukan 1 query per lot
+    lots = Lot.objects.select_related("farm", "creator")
 
     q = request.GET.get("q", "").strip()
     status = request.GET.get("status", "all")
 
     if q:
+        # PostgreSQL: memakai index trigram lot_lot_id_trgm_idx (migrasi 0010)
         lots = lots.filter(lot_id__icontains=q)
 
     if status in ["OK", "HOLD", "INVESTIGATE"]:
         lots = lots.filter(status=status)
 
+    # keyset pagination pada (created_at, id), lihat tracker/pagination.py
+    page = keyset_paginate(
+        lots,
+        ordering=LOT_LIST_ORDERING,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        page_size=page_size_from(request),
+    )
+    next_url = _page_url(request, after=page.next_cursor) if page.has_next else None
+    prev_url = _page_url(request, before=page.prev_cursor) if page.has_prev else None
+
+    if request.GET.get("format") == "json":
+        return JsonResponse(
+            {
+                "results": [_lot_list_item(lot) for lot in page.items],
+                "next": next_url,
+                "previous": prev_url,
+            }
+        )
+
     context = {
-        "lots": lots,
+        "lots": page.items,
         "q": q,
         "status": status,
+        "next_url": next_url,
+        "prev_url": prev_url,
     }
     return render(request, "tracker/lot_list.html", context)
 
@@ -60,71 +145,67 @@ def contaminated_lots(request):
     return render(request, "tracker/contaminated_lots.html", {"lots": lots})
 
 
-def suspect_nodes(request):
-    problematic_lots = Lot.objects.filter(status__in=["HOLD", "INVESTIGATE"])
-    movements = LotMovement.objects.filter(lot__in=problematic_lots)
-
-    suspects_raw = (
-        movements.values("node__id", "node__name", "node__type")
-        .annotate(
-            movement_count=Count("id"),
-            lots_count=Count("lot", distinct=True),
-        )
-        .order_by("-movement_count")
-    )
+SUSPECT_WINDOW_CHOICES = [
+    ("30", "30 hari terakhir"),
+    ("90", "90 hari terakhir"),
+    ("365", "1 tahun terakhir"),
+    ("all", "Semua waktu"),
+]
 
-    suspects = []
-    for item in suspects_raw:
-        node_id = item["node__id"]
-        lots_involved = (
-            movements.filter(node_id=node_id)
-            .values_list("lot__lot_id", flat=True)
-            .distinct()
-        )
 
-        if item["movement_count"] >= 10:
-            risk = "Tinggi"
-        elif item["movement_count"] >= 5:
-            risk = "Sedang"
-        else:
-            risk = "Rendah"
+def _suspect_window(request):
+    """?days=N / ?days=all -> (nilai untuk form, jumlah hari atau None)."""
+    value = request.GET.get("days")
+    if value == "all":
+        return value, None
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        days = default_window_days()
+    if not days or days <= 0:
+        return "all", None
+    return str(days), days
 
-        suspects.append(
-            {
-                "name": item["node__name"],
-                "type": item["node__type"],
-                "movement_count": item["movement_count"],
-                "lots_count": item["lots_count"],
-                "lots": list(lots_involved),
-                "risk": risk,
-            }
-        )
+
+def suspect_nodes(request):
+    problematic_lots = Lot.objects.filter(status__in=Lot.PROBLEMATIC_STATUSES).order_by("-created_at")
+
+    # movement lot bermasalah dimuat sekali ke graf di memori (tracker/supply_graph.py)
+    window, days = _suspect_window(request)
+    suspects = SupplyGraph.load(days=days).rank()
 
     context = {
         "problematic_lots": problematic_lots,
         "suspects": suspects,
+        "window": window,
+        "window_choices": SUSPECT_WINDOW_CHOICES,
     }
     return render(request, "tracker/suspect_nodes.html", context)
 
 
-def _generate_lot_qr_data(public_url: str) -> str:
-    """Generate QR PNG and return data URI string."""
+def suspect_nodes_json(request):
+    window, days = _suspect_window(request)
+    graph = SupplyGraph.load(days=days)
+    return JsonResponse(
+        {
+            "window_days": days,
+            "since": graph.since.isoformat() if graph.since else None,
+            "problematic_lots": len(graph.lot_paths),
+            "suspects": graph.rank(),
+        }
+    )
 
-    image = qrcode.make(public_url)
-    buffer = io.BytesIO()
-    image.save(buffer, format="PNG")
-    image_bytes = buffer.getvalue()
-    base64_data = base64.b64encode(image_bytes).decode("ascii")
-    return f"data:image/png;base64,{base64_data}"
 
+LOT_DETAIL_QUERYSET = Lot.objects.select_related("farm", "creator")
 
-def lot_detail(request, lot_id: str):
-    lot = get_object_or_404(Lot, lot_id=lot_id)
 
-    movements = (
+def _lot_path(lot):
+    """Movement lot (urut waktu) + jalur node unik beserta estimasi peluang kontaminasinya."""
+    # satu query movement dipakai untuk jalur node, estimasi node & tabel riwayat
+    movements = list(
         LotMovement.objects.filter(lot=lot)
         .select_related("node")
-        .order_by("timestamp")
+        .order_by("timestamp", "id")
     )
 
     # urutan node unik sesuai pergerakan
@@ -140,7 +221,7 @@ def lot_detail(request, lot_id: str):
             })
             last_node_id = mv.node_id
 
-    node_risks = estimate_node_contamination_probabilities(lot)
+    node_risks = estimate_node_contamination_probabilities(lot, movements=movements)
     node_risk_map = {item["node_id"]: item for item in node_risks}
 
     path_nodes_enriched = []
@@ -156,62 +237,126 @@ def lot_detail(request, lot_id: str):
                 else 0,
             }
         )
-
-    risk_info = explain_lot_risk(lot)
-
-    # gabungkan hasil uji lab
-    samplings = lot.samplings.prefetch_related("tests").order_by("-date")
-    lab_tests = []
-    for sampling in samplings:
-        for test in sampling.tests.all():
-            lab_tests.append(
-                {
-                    "sampling_date": sampling.date,
-                    "parameter": test.parameter,
-                    "value": test.value,
-                    "unit": test.unit,
-                    "limit_value": test.limit_value,
-                    "result": test.result,
-                }
-            )
-
-    documents = (
-        Document.objects.filter(Q(lot=lot) | Q(farm=lot.farm))
-        .order_by("-issue_date", "-created_at")
-        .distinct()
+    return movements, path_nodes_enriched
+
+
+def _lot_risk_info(lot):
+    # pakai breakdown yang disimpan saat scoring; lot lama dihitung lewat jalur
+    # batch (query agregat dengan jumlah tetap)
+    return stored_lot_risk(lot) or explain_lots_risk([lot])[lot.pk]
+
+
+def _lot_lab_tests(lot):
+    # uji lab + tanggal sampling dalam satu join
+    return [
+        {
+            "sampling_date": test.sampling.date,
+            "parameter": test.parameter,
+            "value": test.value,
+            "unit": test.unit,
+            "limit_value": test.limit_value,
+            "result": test.result,
+        }
+        for test in LabTest.objects.filter(sampling__lot=lot)
+        .select_related("sampling")
+        .order_by("-sampling__date", "sampling_id", "id")
+    ]
+
+
+def _lot_documents(lot):
+    # dokumen lot + dokumen tambaknya; tanpa join jadi tidak perlu DISTINCT
+    document_filter = Q(lot=lot)
+    if lot.farm_id:
+        document_filter |= Q(farm_id=lot.farm_id)
+    return list(
+        Document.objects.filter(document_filter).order_by("-issue_date", "-created_at")
     )
 
-    incidents = lot.incidents.select_related("lot", "lot__farm").order_by("-date")
 
+def _lot_incidents(lot):
+    # inc.lot diisi dari related manager, tidak perlu join
+    return list(lot.incidents.order_by("-date"))
+
+
+def _lot_detail_context(request, lot, path, risk_info, lab_tests, documents, incidents):
+    movements, path_nodes = path
     public_url = request.build_absolute_uri(
         reverse("tracker:public_lot", args=[lot.public_token])
     )
-    qr_data_uri = _generate_lot_qr_data(public_url)
-
-    context = {
+    return {
         "lot": lot,
         "movements": movements,
-        "path_nodes": path_nodes_enriched,
+        "path_nodes": path_nodes,
         "risk_info": risk_info,
         "lab_tests": lab_tests,
         "documents": documents,
         "incidents": incidents,
         "public_url": public_url,
-        "qr_data_uri": qr_data_uri,
     }
+
+
+def lot_detail(request, lot_id: str):
+    """
+    Jumlah query tetap, berapa pun banyaknya movement / uji lab / dokumen:
+    lot, movement, NodeStats, uji lab, dokumen, insiden (+ scoring batch
+    untuk lot yang belum pernah di-score). Dijaga oleh LotDetailQueryBudgetTests.
+    """
+    lot = get_object_or_404(LOT_DETAIL_QUERYSET, lot_id=lot_id)
+    context = _lot_detail_context(
+        request,
+        lot,
+        _lot_path(lot),
+        _lot_risk_info(lot),
+        _lot_lab_tests(lot),
+        _lot_documents(lot),
+        _lot_incidents(lot),
+    )
     return render(request, "tracker/lot_detail.html", context)
 
 
+async def lot_detail_async(request, lot_id: str):
+    """
+    Versi async lot_detail untuk deployment ASGI (lihat settings.ASYNC_VIEWS):
+    bagian-bagian yang saling lepas dimuat bersamaan, masing-masing di thread
+    & koneksi DB sendiri (tracker/concurrency.py).
+    """
+    lot = await aget_object_or_404(LOT_DETAIL_QUERYSET, lot_id=lot_id)
+    sections = await gather_in_threads(
+        (_lot_path, lot),
+        (_lot_risk_info, lot),
+        (_lot_lab_tests, lot),
+        (_lot_documents, lot),
+        (_lot_incidents, lot),
+    )
+    context = _lot_detail_context(request, lot, *sections)
+    # context processor auth / session masih sinkron
+    return await sync_to_async(render)(request, "tracker/lot_detail.html", context)
+
+
+QR_CACHE_CONTROL = "public, max-age=31536000"
+
+
 def lot_qr(request, lot_id: str):
-    lot = get_object_or_404(Lot, lot_id=lot_id)
+    """
+    Gambar QR lot (?format=png|svg, ?size=2..20) dari tracker/qr_cache.py.
+    Isi gambar hanya bergantung pada public_token, jadi boleh di-cache lama
+    dan direvalidasi dengan ETag.
+    """
+    public_token = get_object_or_404(
+        Lot.objects.values_list("public_token", flat=True), lot_id=lot_id
+    )
     public_url = request.build_absolute_uri(
-        reverse("tracker:public_lot", args=[lot.public_token])
+        reverse("tracker:public_lot", args=[public_token])
     )
 
-    image = qrcode.make(public_url)
-    buffer = io.BytesIO()
-    image.save(buffer, format="PNG")
-    return HttpResponse(buffer.getvalue(), content_type="image/png")
+    qr = get_lot_qr(public_url, request.GET.get("size"), request.GET.get("format"))
+    if qr.etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(qr.content, content_type=qr.content_type)
+    response["ETag"] = qr.etag
+    response["Cache-Control"] = QR_CACHE_CONTROL
+    return response
 
 
 def lot_trace_json(request, lot_id: str):
@@ -219,24 +364,106 @@ def lot_trace_json(request, lot_id: str):
     movements = (
         LotMovement.objects.filter(lot=lot)
         .select_related("node")
-        .order_by("timestamp")
+        .order_by("timestamp", "id")
     )
 
-    data = {
-        "lot_id": lot.lot_id,
-        "status": lot.status,
-        "movements": [
+    data = build_trace(
+        lot.lot_id,
+        lot.status,
+        [
             {
                 "timestamp": mv.timestamp.isoformat(),
+                "node_id": mv.node_id,
                 "node": mv.node.name,
                 "type": mv.node.type,
             }
             for mv in movements
         ],
-    }
+    )
     return JsonResponse(data)
 
 
+# batas titik deret riwayat risiko per respons (grafik di halaman detail lot)
+RISK_HISTORY_MAX_POINTS = 200
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def lot_risk_history_json(request, lot_id: str):
+    """
+    Deret skor risiko lot dari LotRiskSnapshot (dipakai grafik di lot_detail).
+    ?days=N membatasi ke N hari terakhir; ?points=N jumlah titik maksimum
+    (di-downsample, skor tertinggi per ember tetap terlihat).
+    """
+    lot_pk = get_object_or_404(Lot.objects.values_list("pk", flat=True), lot_id=lot_id)
+    days = _positive_int(request.GET.get("days"))
+    start = timezone.now() - timedelta(days=days) if days else None
+    max_points = min(_positive_int(request.GET.get("points")) or RISK_HISTORY_MAX_POINTS, RISK_HISTORY_MAX_POINTS)
+
+    points = lot_risk_series([lot_pk], start=start, max_points=max_points).get(lot_pk, [])
+    return JsonResponse(
+        {
+            "lot_id": lot_id,
+            "points": [{**point, "taken_at": point["taken_at"].isoformat()} for point in points],
+        }
+    )
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def lot_trace_bulk(request):
+    """
+    Trace banyak lot sekaligus sebagai NDJSON (satu baris JSON per lot).
+
+    GET  ?lot_id=A&lot_id=B  atau  ?lot_ids=A,B  dan/atau filter
+         ?status=HOLD&farm=<pk>&harvest_from=YYYY-MM-DD&harvest_to=YYYY-MM-DD
+    POST {"lot_ids": [...], "status": ..., ...}  (untuk daftar lot yang panjang)
+    """
+    if request.method == "POST":
+        try:
+            params = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Body harus JSON"}, status=400)
+        if not isinstance(params, dict):
+            return JsonResponse({"error": "Body harus objek JSON"}, status=400)
+        lot_ids = params.get("lot_ids") or []
+        if not isinstance(lot_ids, list):
+            return JsonResponse({"error": "lot_ids harus berupa list"}, status=400)
+        filters = {key: str(params[key]) for key in TRACE_FILTERS if params.get(key) is not None}
+    else:
+        lot_ids = request.GET.getlist("lot_id")
+        for chunk in request.GET.getlist("lot_ids"):
+            lot_ids.extend(part for part in chunk.split(",") if part)
+        filters = {key: request.GET[key] for key in TRACE_FILTERS if request.GET.get(key)}
+
+    lot_ids = [str(lot_id).strip() for lot_id in lot_ids if str(lot_id).strip()]
+    if not lot_ids and not filters:
+        return JsonResponse({"error": "Isi lot_ids atau minimal satu filter"}, status=400)
+    if len(lot_ids) > MAX_TRACE_LOT_IDS:
+        return JsonResponse(
+            {"error": f"Maksimal {MAX_TRACE_LOT_IDS} lot_id per request; pakai filter untuk lebih"},
+            status=400,
+        )
+
+    try:
+        lots = filter_trace_lots(lot_ids, filters)
+    except (ValueError, ValidationError) as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    response = StreamingHttpResponse(
+        ndjson_lines(iter_lot_traces(lots), requested=lot_ids),
+        content_type="application/x-ndjson",
+    )
+    response["Cache-Control"] = "no-store"
+    return response
+
+
 def lot_create(request):
     if not request.user.is_authenticated or not request.user.is_staff:
         return HttpResponseForbidden("Anda tidak memiliki izin untuk menambahkan lot.")
@@ -247,11 +474,7 @@ def lot_create(request):
             lot = form.save(commit=False)
             lot.creator = request.user
 
-            score, level, status = calculate_lot_risk(lot)
-            lot.risk_score = score
-            lot.risk_level = level
-            lot.status = status
-
+            assign_lot_risk(lot)
             lot.save()
             return redirect("tracker:lot_detail", lot_id=lot.lot_id)
     else:
@@ -263,88 +486,154 @@ def lot_create(request):
 # ============ FARMS ============
 
 def farm_list(request):
-    farms = Farm.objects.all().order_by("name")
+    # jumlah lot & lot bermasalah dihitung di query yang sama (bukan farm.lots.count per baris)
+    farms = Farm.objects.annotate(
+        lot_count=Count("lots"),
+        problematic_lot_count=Count("lots", filter=Q(lots__status__in=Lot.PROBLEMATIC_STATUSES)),
+    ).order_by("name")
     context = {
         "farms": farms,
     }
     return render(request, "tracker/farm_list.html", context)
 
 
-def farm_detail(request, pk):
-    farm = get_object_or_404(Farm, pk=pk)
-    context = {
-        "farm": farm,
-    }
-    return render(request, "tracker/farm_detail.html", context)
-
-
-# ============ DASHBOARD ============
+FARM_LOT_ORDERING = ("-harvest_date", "-id")
+UNDATED_LOT_ORDERING = ("-created_at", "-id")
+FARM_POND_LOG_LIMIT = 7
+FARM_OPEN_INCIDENT_LIMIT = 5
 
-def dashboard(request):
-    lots = Lot.objects.all()
 
-    total_lots = lots.count()
-    status_counts = {
-        "OK": lots.filter(status="OK").count(),
-        "HOLD": lots.filter(status="HOLD").count(),
-        "INVESTIGATE": lots.filter(status="INVESTIGATE").count(),
+def _farm_lot_summary(farm):
+    aggregates = {
+        "total": Count("id"),
+        "problematic": Count("id", filter=Q(status__in=Lot.PROBLEMATIC_STATUSES)),
+        "undated": Count("id", filter=Q(harvest_date__isnull=True)),
     }
-    risk_counts = {
-        "LOW": lots.filter(risk_level="LOW").count(),
-        "MEDIUM": lots.filter(risk_level="MEDIUM").count(),
-        "HIGH": lots.filter(risk_level="HIGH").count(),
+    aggregates.update(
+        {f"risk_{code}": Count("id", filter=Q(risk_level=code)) for code, _label in Lot.RISK_LEVEL_CHOICES}
+    )
+    lot_counts = Lot.objects.filter(farm=farm).aggregate(**aggregates)
+    return {
+        "lot_count": lot_counts["total"],
+        "problematic_lot_count": lot_counts["problematic"],
+        "undated_lot_count": lot_counts["undated"],
+        "risk_distribution": [
+            {"level": code, "label": label, "count": lot_counts[f"risk_{code}"]}
+            for code, label in Lot.RISK_LEVEL_CHOICES
+        ],
     }
 
-    recent_problem_lots = (
-        lots.filter(status__in=["HOLD", "INVESTIGATE"])
-        .select_related("farm")
-        .order_by("-created_at")[:5]
+
+def _farm_incident_summary(farm):
+    incidents = Incident.objects.filter(lot__farm=farm)
+    incident_counts = incidents.aggregate(
+        total=Count("id"),
+        open=Count("id", filter=~Q(status__iexact="closed")),
     )
+    open_incidents = (
+        incidents.exclude(status__iexact="closed")
+        .select_related("lot")
+        .order_by("-date", "-id")[:FARM_OPEN_INCIDENT_LIMIT]
+    )
+    return {
+        "incident_count": incident_counts["total"],
+        "open_incident_count": incident_counts["open"],
+        "open_incidents": list(open_incidents),
+    }
 
-    incidents = Incident.objects.all()
-    incident_counts = {
-        "total": incidents.count(),
-        "open": incidents.exclude(status__iexact="closed").count(),
-        "closed": incidents.filter(status__iexact="closed").count(),
+
+def _farm_pond_logs(farm):
+    return {"pond_logs": list(farm.pond_logs.order_by("-date", "-id")[:FARM_POND_LOG_LIMIT])}
+
+
+def _farm_lot_page(request, farm):
+    """
+    Satu halaman lot tambak: keyset per tanggal panen (index lot_farm_harvest_id_idx);
+    lot tanpa tanggal panen tidak bisa diurutkan begitu -> daftar terpisah (?undated=1).
+    """
+    undated = request.GET.get("undated") == "1"
+    lots = Lot.objects.filter(farm=farm)
+    if undated:
+        lots, ordering = lots.filter(harvest_date__isnull=True), UNDATED_LOT_ORDERING
+    else:
+        lots, ordering = lots.filter(harvest_date__isnull=False), FARM_LOT_ORDERING
+
+    page = keyset_paginate(
+        lots,
+        ordering=ordering,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        page_size=page_size_from(request),
+    )
+    return {
+        "lots": page.items,
+        "undated": undated,
+        "next_url": _page_url(request, after=page.next_cursor) if page.has_next else None,
+        "prev_url": _page_url(request, before=page.prev_cursor) if page.has_prev else None,
     }
 
-    farms = Farm.objects.annotate(
-        lot_count=Count("lots"),
-        problematic_lot_count=Count(
-            "lots", filter=Q(lots__status__in=["HOLD", "INVESTIGATE"])
-        ),
-    ).filter(lot_count__gt=0)
 
-    top_farms = farms.order_by("-problematic_lot_count")[:5]
+def _farm_detail_context(farm, page, *summary_parts):
+    """Ringkasan farm dari agregat (jumlah query tetap, berapa pun lot-nya)."""
+    summary = {}
+    for part in summary_parts:
+        summary.update(part)
+    return {"farm": farm, "summary": summary, **page}
+
 
-    movements = LotMovement.objects.filter(
-        lot__status__in=["HOLD", "INVESTIGATE"]
+def farm_detail(request, pk):
+    farm = get_object_or_404(Farm, pk=pk)
+    context = _farm_detail_context(
+        farm,
+        _farm_lot_page(request, farm),
+        _farm_lot_summary(farm),
+        _farm_incident_summary(farm),
+        _farm_pond_logs(farm),
     )
-    top_nodes = (
-        movements.values("node__name", "node__type")
-        .annotate(
-            movement_count=Count("id"),
-            lots_count=Count("lot", distinct=True),
-        )
-        .order_by("-movement_count")[:5]
+    return render(request, "tracker/farm_detail.html", context)
+
+
+async def farm_detail_async(request, pk):
+    """Versi async farm_detail: halaman lot & tiap ringkasan dimuat bersamaan."""
+    farm = await aget_object_or_404(Farm, pk=pk)
+    sections = await gather_in_threads(
+        (_farm_lot_page, request, farm),
+        (_farm_lot_summary, farm),
+        (_farm_incident_summary, farm),
+        (_farm_pond_logs, farm),
     )
+    context = _farm_detail_context(farm, *sections)
+    return await sync_to_async(render)(request, "tracker/farm_detail.html", context)
 
-    context = {
-        "total_lots": total_lots,
-        "status_counts": status_counts,
-        "risk_counts": risk_counts,
-        "incident_counts": incident_counts,
-        "recent_problem_lots": recent_problem_lots,
-        "top_farms": top_farms,
-        "top_nodes": top_nodes,
-    }
-    return render(request, "tracker/dashboard.html", context)
+
+# ============ DASHBOARD ============
+
+def dashboard(request):
+    # counter & daftar ringkas di-cache sebagai satu snapshot (tracker/dashboard.py)
+    return render(request, "tracker/dashboard.html", get_dashboard_snapshot())
 
 
 # ============ INCIDENTS ============
 
+INCIDENT_LIST_ORDERING = ("-date", "-id")
+
+
+def _related_lot_count():
+    """Subquery jumlah IncidentRelatedLot per insiden; hanya dievaluasi untuk baris di halaman."""
+    related = (
+        IncidentRelatedLot.objects.filter(incident=OuterRef("pk"))
+        .order_by()
+        .values("incident")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(related), 0)
+
+
 def incident_list(request):
-    incidents = Incident.objects.select_related("lot").order_by("-date")
+    incidents = Incident.objects.select_related("lot").annotate(
+        related_count=_related_lot_count()
+    )
 
     status_filter = request.GET.get("status", "all")
     q = request.GET.get("q", "").strip()
@@ -359,25 +648,32 @@ def incident_list(request):
             Q(lot__lot_id__icontains=q) | Q(incident_type__icontains=q)
         )
 
-    total_incidents = Incident.objects.count()
-    open_incidents = Incident.objects.exclude(status__iexact="closed").count()
-    closed_incidents = Incident.objects.filter(status__iexact="closed").count()
-
-    related_counts = IncidentRelatedLot.objects.values("incident_id").annotate(
-        total=Count("lot_id")
+    counts = Incident.objects.aggregate(
+        total=Count("id"),
+        open=Count("id", filter=~Q(status__iexact="closed")),
+        closed=Count("id", filter=Q(status__iexact="closed")),
     )
-    related_map = {row["incident_id"]: row["total"] for row in related_counts}
 
-    for inc in incidents:
-        inc.related_lot_count = related_map.get(inc.id, 0) + (1 if inc.lot_id else 0)
+    # keyset pagination pada (date, id), lihat tracker/pagination.py
+    page = keyset_paginate(
+        incidents,
+        ordering=INCIDENT_LIST_ORDERING,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        page_size=page_size_from(request),
+    )
+    for inc in page.items:
+        inc.related_lot_count = inc.related_count + (1 if inc.lot_id else 0)
 
     context = {
-        "incidents": incidents,
+        "incidents": page.items,
         "status_filter": status_filter,
         "q": q,
-        "total_incidents": total_incidents,
-        "open_incidents": open_incidents,
-        "closed_incidents": closed_incidents,
+        "total_incidents": counts["total"],
+        "open_incidents": counts["open"],
+        "closed_incidents": counts["closed"],
+        "next_url": _page_url(request, after=page.next_cursor) if page.has_next else None,
+        "prev_url": _page_url(request, before=page.prev_cursor) if page.has_prev else None,
     }
     return render(request, "tracker/incident_list.html", context)
 
@@ -399,13 +695,120 @@ def incident_detail(request, pk: int):
     return render(request, "tracker/incident_detail.html", context)
 
 
-# ============ PUBLIC VIEW ============
+# ============ LAB INGEST, TELEMETRI & SCAN ============
+
+def _bearer_token_valid(request, tokens) -> bool:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    return any(hmac.compare_digest(token.encode(), known.encode()) for known in tokens)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def lab_results_ingest(request):
+    """
+    Kiriman hasil lab massal dari lab kontrak (lihat tracker/lab_ingest.py).
+    Auth: header "Authorization: Bearer <token>" (settings.LAB_INGEST_TOKENS).
+    Aman dikirim ulang: baris di-upsert berdasarkan external_id.
+    """
+    if not _bearer_token_valid(request, settings.LAB_INGEST_TOKENS):
+        return JsonResponse({"error": "Token lab tidak valid"}, status=401)
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Body harus JSON"}, status=400)
+
+    try:
+        result = ingest_lab_results(payload)
+    except IngestError as exc:
+        return JsonResponse(
+            {
+                "error": str(exc),
+                "errors": exc.errors[:MAX_REPORTED_ERRORS],
+                "error_count": len(exc.errors),
+            },
+            status=400,
+        )
+    return JsonResponse(result.as_dict())
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def telemetry_ingest(request):
+    """
+    Batch pembacaan sensor kolam dari gateway tambak (lihat tracker/telemetry_ingest.py).
+    Auth: header "Authorization: Bearer <token>" (settings.TELEMETRY_TOKENS).
+    """
+    if not _bearer_token_valid(request, settings.TELEMETRY_TOKENS):
+        return JsonResponse({"error": "Token telemetri tidak valid"}, status=401)
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Body harus JSON"}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({"error": "Body harus berupa objek"}, status=400)
+
+    try:
+        readings = parse_readings(payload.get("readings"))
+    except TelemetryError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse(ingest_readings(readings))
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def scan_batch_ingest(request):
+    """
+    Batch scan label lot dari scanner checkpoint (lihat tracker/scan_ingest.py).
+    Auth: header "Authorization: Bearer <token>" (settings.SCAN_TOKENS).
+    Scan duplikat dilewati; scan yang tidak valid dilaporkan di "rejected".
+    """
+    if not _bearer_token_valid(request, settings.SCAN_TOKENS):
+        return JsonResponse({"error": "Token scanner tidak valid"}, status=401)
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Body harus JSON"}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({"error": "Body harus berupa objek"}, status=400)
+
+    try:
+        scans, rejected = parse_scans(payload.get("scans"))
+    except ScanError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    result = ingest_scans(scans)
+    return JsonResponse({
+        "received": len(scans) + len(rejected),
+        **result,
+        "rejected": rejected[:MAX_REPORTED_ERRORS],
+        "rejected_count": len(rejected),
+    })
 
-def public_lot(request, token):
-    lot = get_object_or_404(Lot, public_token=token)
-    context = {
-        "lot": lot,
-    }
-    return render(request, "tracker/public_lot.html", context)
 
+# ============ PUBLIC VIEW ============
 
+def public_lot(request, token):
+    """
+    Halaman hasil scan QR. Dirender sekali per versi lot (tracker/public_page.py);
+    klien yang sudah punya versi terbaru mendapat 304, dan header Cache-Control
+    membolehkan CDN / reverse proxy menahan lonjakan scan.
+    """
+    page = get_public_page(token)
+    if page is None:
+        raise Http404("Lot tidak ditemukan")
+
+    response = get_conditional_response(
+        request, etag=page["etag"], last_modified=int(page["last_modified"])
+    )
+    if response is None:
+        response = HttpResponse(page["html"])
+    response["ETag"] = page["etag"]
+    response["Last-Modified"] = http_date(page["last_modified"])
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.PUBLIC_LOT_MAX_AGE,
+        stale_while_revalidate=settings.PUBLIC_LOT_STALE_SECONDS,
+    )
+    return response
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'udangtracker_project.settings')
+# di ASGI, lot_detail & farm_detail memakai versi async (settings.ASYNC_VIEWS)
+os.environ.setdefault('TRACKER_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -86,6 +86,48 @@ DATABASES = {
 }
 
 
+# Hitung ulang risiko lot (tracker/recompute.py)
+# "deferred" (default): perubahan diantrekan di DirtyLot lalu diproses worker
+#             `process_dirty_lots` (proses `worker` di Procfile)
+# "immediate": dihitung ulang sekali per transaksi setelah commit, di dalam request
+#             -- hanya untuk deployment tanpa worker
+RISK_RECOMPUTE_MODE = os.getenv("RISK_RECOMPUTE_MODE", "deferred")
+# lot baru diproses kalau tidak berubah lagi selama N detik (debounce)
+RISK_RECOMPUTE_SETTLE_SECONDS = int(os.getenv("RISK_RECOMPUTE_SETTLE_SECONDS", "5"))
+# cache standar lab per proses: versi di DB dicek ulang paling cepat tiap N detik
+LAB_STANDARDS_RECHECK_SECONDS = int(os.getenv("LAB_STANDARDS_RECHECK_SECONDS", "30"))
+
+# snapshot dashboard disimpan di cache default (tracker/dashboard.py) selama N detik;
+# dibuang lebih cepat saat Lot / Incident berubah. Tanpa CACHES, cache-nya per proses
+# (LocMemCache), jadi proses lain melihat perubahan paling lambat setelah N detik.
+DASHBOARD_CACHE_SECONDS = int(os.getenv("DASHBOARD_CACHE_SECONDS", "30"))
+# jendela waktu default analisis node tersangka (hari); 0 = semua waktu
+SUSPECT_WINDOW_DAYS = int(os.getenv("SUSPECT_WINDOW_DAYS", "90"))
+# cache gambar QR (tracker/qr_cache.py): LRU per proses + file bersama di disk
+QR_CACHE_MEMORY_ITEMS = int(os.getenv("QR_CACHE_MEMORY_ITEMS", "256"))
+QR_CACHE_DIR = Path(os.getenv("QR_CACHE_DIR", str(BASE_DIR / "qr_cache")))
+# halaman publik lot (scan QR): render disimpan di cache default selama N detik
+# (dibuang saat lot berubah); browser / CDN boleh menyimpan PUBLIC_LOT_MAX_AGE detik
+# dan menyajikan versi lama sambil revalidasi selama PUBLIC_LOT_STALE_SECONDS
+PUBLIC_LOT_CACHE_SECONDS = int(os.getenv("PUBLIC_LOT_CACHE_SECONDS", "300"))
+PUBLIC_LOT_MAX_AGE = int(os.getenv("PUBLIC_LOT_MAX_AGE", "60"))
+PUBLIC_LOT_STALE_SECONDS = int(os.getenv("PUBLIC_LOT_STALE_SECONDS", "300"))
+# view baca berat versi async (lot_detail, farm_detail). Aktif otomatis di entry
+# point ASGI (udangtracker_project/asgi.py); di WSGI tetap view sinkron
+ASYNC_VIEWS = os.getenv("TRACKER_ASYNC_VIEWS", "0") == "1"
+# ingest hasil lab massal (POST /lab/results/): token bearer per lab, dipisah koma
+LAB_INGEST_TOKENS = [t.strip() for t in os.getenv("LAB_INGEST_TOKENS", "").split(",") if t.strip()]
+LAB_INGEST_MAX_RESULTS = int(os.getenv("LAB_INGEST_MAX_RESULTS", "20000"))
+# ingest telemetri sensor tambak (POST /telemetry/): token bearer per gateway, dipisah koma
+TELEMETRY_TOKENS = [t.strip() for t in os.getenv("TELEMETRY_TOKENS", "").split(",") if t.strip()]
+TELEMETRY_MAX_READINGS = int(os.getenv("TELEMETRY_MAX_READINGS", "50000"))
+# batch scan checkpoint (POST /scans/): token bearer per scanner / node, dipisah koma
+SCAN_TOKENS = [t.strip() for t in os.getenv("SCAN_TOKENS", "").split(",") if t.strip()]
+SCAN_MAX_EVENTS = int(os.getenv("SCAN_MAX_EVENTS", "10000"))
+# scan ulang lot yang sama di node yang sama dalam jendela ini dianggap duplikat
+SCAN_DEDUPE_SECONDS = int(os.getenv("SCAN_DEDUPE_SECONDS", "600"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 